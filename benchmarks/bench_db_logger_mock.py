@@ -0,0 +1,143 @@
+"""
+Indexed DBLoggerMock against the previous linear-scan implementation.
+
+Run from the repository root: python -m benchmarks.bench_db_logger_mock
+"""
+
+import random
+import time
+from datetime import datetime
+from typing import List, Optional
+from uuid import uuid4
+
+from shared.db_logger_mock import DBLoggerMock
+from shared.models import (
+    CommandInfo,
+    LogEntry,
+    LogEntrySummary,
+    LogSeverity,
+    LogsFilter,
+    Paging,
+)
+
+ENTRIES = 300_000
+QUERIES = 200
+
+
+class _LinearScanLoggerMock:
+    """DBLoggerMock as it was before indexing, kept here for comparison"""
+
+    def __init__(self):
+        self.logs: List[LogEntry] = []
+
+    def insert_log(self, log_entry: LogEntry) -> None:
+        self.logs.append(log_entry)
+
+    def get_logs(self, filters: LogsFilter, paging: Paging) -> List[LogEntrySummary]:
+        filtered_logs = self.logs
+        if filters.trace_id:
+            filtered_logs = [
+                log for log in filtered_logs if log.trace_id == filters.trace_id
+            ]
+        if filters.commands_only:
+            filtered_logs = [
+                log for log in filtered_logs if log.command_info is not None
+            ]
+        if filters.severity:
+            filtered_logs = [
+                log for log in filtered_logs if log.severity in filters.severity
+            ]
+        start = (paging.page - 1) * paging.page_size
+        end = start + paging.page_size
+        return [LogEntrySummary.of(log) for log in filtered_logs[start:end]]
+
+    def get_log_entry(self, log_id: int) -> Optional[LogEntry]:
+        for log in self.logs:
+            if log.entry_id == log_id:
+                return log
+        return None
+
+
+def _entries() -> List[LogEntry]:
+    rng = random.Random(42)
+    traces = [uuid4() for _ in range(ENTRIES // 5)]
+    severities = [LogSeverity.DEBUG] * 6 + [LogSeverity.INFO] * 3 + [LogSeverity.ERROR]
+    command = CommandInfo(
+        command="step-ca renew test.crt test.key",
+        output="ok",
+        exit_code=0,
+        action="RENEW_CERT",
+    )
+    return [
+        LogEntry(
+            entry_id=i,
+            timestamp=datetime.now(),
+            severity=rng.choice(severities),
+            message=f"Test log message {i}",
+            trace_id=rng.choice(traces),
+            command_info=command if rng.random() < 0.05 else None,
+        )
+        for i in range(1, ENTRIES + 1)
+    ]
+
+
+def _time(label: str, fn) -> None:
+    start = time.perf_counter()
+    for i in range(QUERIES):
+        fn(i)
+    elapsed = (time.perf_counter() - start) / QUERIES
+    print(f"  {label:<28} {elapsed * 1e6:12.1f} us/query")
+
+
+def main():
+    entries = _entries()
+    rng = random.Random(7)
+    trace_ids = [rng.choice(entries).trace_id for _ in range(QUERIES)]
+    entry_ids = [rng.randint(1, ENTRIES) for _ in range(QUERIES)]
+    all_severities = list(LogSeverity)
+    page = Paging(page=1, page_size=50)
+
+    for name, store in (
+        ("linear scan", _LinearScanLoggerMock()),
+        ("indexed", DBLoggerMock(max_entries=None)),
+    ):
+        start = time.perf_counter()
+        for entry in entries:
+            store.insert_log(entry)
+        insert = (time.perf_counter() - start) / ENTRIES
+        print(f"{name} ({ENTRIES} entries, insert {insert * 1e6:.2f} us/entry)")
+
+        _time("get_log_entry", lambda i: store.get_log_entry(entry_ids[i]))
+        _time(
+            "trace id",
+            lambda i: store.get_logs(
+                LogsFilter(
+                    trace_id=trace_ids[i],
+                    severity=all_severities,
+                    commands_only=False,
+                ),
+                page,
+            ),
+        )
+        _time(
+            "ERROR only",
+            lambda i: store.get_logs(
+                LogsFilter(severity=[LogSeverity.ERROR], commands_only=False), page
+            ),
+        )
+        _time(
+            "commands only",
+            lambda i: store.get_logs(
+                LogsFilter(severity=all_severities, commands_only=True), page
+            ),
+        )
+        _time(
+            "first page, no filter",
+            lambda i: store.get_logs(
+                LogsFilter(severity=all_severities, commands_only=False), page
+            ),
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Cold-start cost of the front templates and transfer size of its static files.
+
+Templates are loaded by a fresh Jinja environment, as in a new worker: once
+compiled from source, once from a warm bytecode cache. Static files are sized
+as served uncompressed and with each precompressed encoding; repeat visits
+fetch none of them, since fingerprinted URLs are cached as immutable.
+
+Run from the repository root: python -m benchmarks.bench_front_assets
+"""
+
+import os
+import tempfile
+import time
+from typing import Optional
+
+from jinja2 import BytecodeCache, Environment, FileSystemBytecodeCache, FileSystemLoader
+
+from front.static_assets import StaticAssets
+
+FRONT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "front")
+REPEATS = 20
+
+
+def _load_ms(bytecode_cache: Optional[BytecodeCache]) -> float:
+    best = float("inf")
+    for _ in range(REPEATS):
+        env = Environment(
+            loader=FileSystemLoader(os.path.join(FRONT_DIR, "templates")),
+            bytecode_cache=bytecode_cache,
+        )
+        start = time.perf_counter()
+        for name in env.list_templates():
+            env.get_template(name)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        bytecode_cache = FileSystemBytecodeCache(directory)
+        _load_ms(bytecode_cache)  # fills the cache
+        compiled = _load_ms(None)
+        cached = _load_ms(bytecode_cache)
+
+    print(f"templates, best of {REPEATS}, ms to load all in a new environment")
+    print(f"compiled from source {compiled:8.2f}")
+    print(f"bytecode cache       {cached:8.2f}  ({compiled / cached:4.1f}x)")
+
+    assets = StaticAssets(os.path.join(FRONT_DIR, "static"))
+    print("static files, bytes per encoding")
+    for name in sorted(os.listdir(os.path.join(FRONT_DIR, "static"))):
+        encodings = assets._assets[name].encodings
+        sizes = "  ".join(f"{coding} {len(body):6d}" for coding, body in encodings)
+        print(f"{name:<12} {sizes}")
+
+
+if __name__ == "__main__":
+    main()
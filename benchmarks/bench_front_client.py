@@ -0,0 +1,115 @@
+"""
+Front dashboard throughput against a core served by uvicorn over TCP, with a
+new APIClient per page request, as the front used to do, against the client
+shared through the app lifespan, and with the page cache on top of it.
+
+A fresh client pays for a TCP connect and a new connection pool on every page;
+the shared one reuses keep-alive connections. The first two runs bypass the
+page cache, so every page calls core. Pages are requested through the front
+ASGI app in-process, so the numbers leave out the browser side.
+
+Run from the repository root: python -m benchmarks.bench_front_client
+"""
+
+import asyncio
+import os
+import socket
+import threading
+import time
+from unittest.mock import Mock
+
+import httpx
+import uvicorn
+
+from core.api_server import APIServer
+from core.certificate_manager_mock import CertificateManagerMock
+from front.api_client import APIClient, ResponseCache
+
+CONCURRENCY = 16
+REQUESTS = 200
+REPEATS = 3
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_core(port: int) -> uvicorn.Server:
+    api_server = APIServer(CertificateManagerMock(), Mock(), "bench", port)
+    server = uvicorn.Server(
+        uvicorn.Config(api_server.App, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def _pages_per_second(front_app) -> float:
+    transport = httpx.ASGITransport(app=front_app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://front"
+    ) as client:
+        remaining = iter(range(REQUESTS))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/")
+                assert response.status_code == 200
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+        return REQUESTS / (time.perf_counter() - start)
+
+
+class _Uncached:
+    async def get(self, key, render):
+        return await render()
+
+
+async def _best_of(front_app) -> float:
+    return max([await _pages_per_second(front_app) for _ in range(REPEATS)])
+
+
+async def _run(front_main) -> None:
+    app = front_main.app
+    response_cache = ResponseCache()
+
+    async def per_request_client():
+        client = APIClient(front_main.API_BASE_URL, response_cache)
+        try:
+            yield client
+        finally:
+            await client.close()
+
+    async with front_main.lifespan(app):
+        app.dependency_overrides[front_main.get_page_cache] = _Uncached
+        app.dependency_overrides[front_main.get_api_client] = per_request_client
+        before = await _best_of(app)
+        del app.dependency_overrides[front_main.get_api_client]
+        shared = await _best_of(app)
+        app.dependency_overrides.clear()
+        cached = await _best_of(app)
+
+    print(f"{REQUESTS} dashboard pages, {CONCURRENCY} concurrent, best of {REPEATS}")
+    print(f"client per request {before:8.0f} pages/s")
+    print(f"shared client      {shared:8.0f} pages/s  ({shared / before:4.2f}x)")
+    print(f"page cache         {cached:8.0f} pages/s  ({cached / before:4.2f}x)")
+
+
+def main():
+    port = _free_port()
+    server = _start_core(port)
+    os.environ["API_BASE_URL"] = f"http://127.0.0.1:{port}"
+    import front.main  # reads API_BASE_URL on import
+
+    try:
+        asyncio.run(_run(front.main))
+    finally:
+        server.should_exit = True
+
+
+if __name__ == "__main__":
+    main()
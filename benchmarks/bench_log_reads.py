@@ -0,0 +1,89 @@
+"""
+CPU per row of a `/logs` page read from the database: DBLogger.get_logs alone,
+and with the DTO validation and JSON encoding of the API response added.
+
+Run from the repository root: python -m benchmarks.bench_log_reads
+"""
+
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+
+from core.api_server import (
+    _LOG_SUMMARY_DTO_GETTERS,
+    _LOG_SUMMARY_DTOS,
+    _dto_list_response,
+)
+from shared.db_logger import DBLogger
+from shared.models import CommandInfo, LogEntry, LogSeverity, LogsFilter, Paging
+
+ROWS = 5_000
+PAGE_SIZE = 1_000
+REPEATS = 30
+
+
+def _make_db_logger(path: str) -> DBLogger:
+    db_logger = DBLogger(is_test=True)
+    db_logger._connect(create_engine(f"sqlite:///{path}"))
+    started = datetime.now()
+    db_logger.insert_logs(
+        [
+            LogEntry(
+                entry_id=i,
+                timestamp=started + timedelta(seconds=i),
+                severity=LogSeverity.INFO,
+                message=f"Certificate test-cert-{i} renewed successfully",
+                trace_id=uuid4(),
+                command_info=(
+                    CommandInfo(
+                        command=f"step-ca renew test-cert-{i}.crt test-cert-{i}.key",
+                        output="Your certificate has been saved in test.crt.\n" * 20,
+                        exit_code=0,
+                        action="RENEW_CERT",
+                    )
+                    if i % 2
+                    else None
+                ),
+            )
+            for i in range(1, ROWS + 1)
+        ]
+    )
+    return db_logger
+
+
+def _us_per_row(read) -> float:
+    """Fastest page of REPEATS, the others mostly measure machine noise"""
+    timings = []
+    for _ in range(REPEATS):
+        start = time.process_time()
+        read()
+        timings.append(time.process_time() - start)
+    return min(timings) / PAGE_SIZE * 1_000_000
+
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        db_logger = _make_db_logger(os.path.join(directory, "logs.db"))
+        filters = LogsFilter(commands_only=False, severity=list(LogSeverity))
+        paging = Paging(page=1, page_size=PAGE_SIZE)
+
+        def read():
+            return db_logger.get_logs(filters, paging)
+
+        def read_and_encode():
+            logs = db_logger.get_logs(filters, paging)
+            return _dto_list_response(
+                _LOG_SUMMARY_DTOS, _LOG_SUMMARY_DTO_GETTERS, logs
+            ).body
+
+        print(f"pages of {PAGE_SIZE} rows, half with command info, best of {REPEATS}")
+        print(f"get_logs:              {_us_per_row(read):6.1f} us CPU/row")
+        print(f"get_logs + JSON body:  {_us_per_row(read_and_encode):6.1f} us CPU/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+CPU per 1k-row `/logs` and `/certificates` page body: FastAPI's response_model
+path against the prebuilt TypeAdapter path the API server uses.
+
+The response_model path is replayed step by step: DTOs built with validation,
+validated again against the response model, dumped to JSON-compatible Python
+and encoded with json.dumps, as FastAPI's JSONResponse does.
+
+Run from the repository root: python -m benchmarks.bench_serialization
+"""
+
+import json
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Type
+from uuid import uuid4
+
+from pydantic import TypeAdapter
+
+from core.api_server import (
+    _CERTIFICATE_DTO_GETTERS,
+    _LOG_SUMMARY_DTO_GETTERS,
+    _CERTIFICATE_DTOS,
+    _LOG_SUMMARY_DTOS,
+    _dto_list_response,
+)
+from core.certificate_manager_interface import Certificate
+from shared.api_models import CertificateDTO, LogEntrySummaryDTO
+from shared.models import CommandInfo, LogEntry, LogEntrySummary, LogSeverity
+
+ROWS = 1_000
+REPEATS = 50
+
+
+def _logs() -> List[LogEntrySummary]:
+    return [
+        LogEntrySummary.of(
+            LogEntry(
+                entry_id=i,
+                timestamp=datetime.now(),
+                severity=LogSeverity.INFO,
+                message=f"Certificate test-cert-{i} renewed successfully",
+                trace_id=uuid4(),
+                command_info=CommandInfo(
+                    command=f"step-ca renew test-cert-{i}.crt test-cert-{i}.key",
+                    output="Your certificate has been saved in test.crt.\n" * 20,
+                    exit_code=0,
+                    action="RENEW_CERT",
+                ),
+            )
+        )
+        for i in range(1, ROWS + 1)
+    ]
+
+
+def _certificates() -> List[Certificate]:
+    return [
+        Certificate(
+            id=f"cert-{i}",
+            name=f"test-cert-{i}",
+            status="valid",
+            expiration_date=datetime.now() + timedelta(days=i),
+        )
+        for i in range(ROWS)
+    ]
+
+
+def _response_model_body(dto: Type, getters: Dict, adapter: TypeAdapter, rows):
+    dtos = [dto(**{field: get(row) for field, get in getters.items()}) for row in rows]
+    dtos = adapter.validate_python(dtos)
+    return json.dumps(adapter.dump_python(dtos, mode="json")).encode("utf-8")
+
+
+def _adapter_body(getters: Dict, adapter: TypeAdapter, rows) -> bytes:
+    return _dto_list_response(adapter, getters, rows).body
+
+
+def _cpu_ms(render: Callable[[], bytes]) -> float:
+    start = time.process_time()
+    for _ in range(REPEATS):
+        render()
+    return (time.process_time() - start) / REPEATS * 1000
+
+
+def main():
+    pages = {
+        "/logs": (
+            _logs(),
+            LogEntrySummaryDTO,
+            _LOG_SUMMARY_DTO_GETTERS,
+            _LOG_SUMMARY_DTOS,
+        ),
+        "/certificates": (
+            _certificates(),
+            CertificateDTO,
+            _CERTIFICATE_DTO_GETTERS,
+            _CERTIFICATE_DTOS,
+        ),
+    }
+
+    print(f"pages of {ROWS} rows, {REPEATS} repeats, ms CPU per page")
+    for path, (rows, dto, getters, adapter) in pages.items():
+        assert json.loads(_response_model_body(dto, getters, adapter, rows)) == (
+            json.loads(_adapter_body(getters, adapter, rows))
+        )
+        before = _cpu_ms(lambda: _response_model_body(dto, getters, adapter, rows))
+        after = _cpu_ms(lambda: _adapter_body(getters, adapter, rows))
+        print(
+            f"{path:<14} response_model {before:8.2f}  adapter {after:8.2f}"
+            + f"  speedup {before / after:5.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Bytes and CPU per `POST /logs` page with and without a `fields` selector.
+
+Run from the repository root: python -m benchmarks.bench_sparse_fields
+"""
+
+import os
+import tempfile
+import time
+from datetime import datetime
+from unittest.mock import Mock
+from uuid import uuid4
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from core.api_server import APIServer
+from core.certificate_manager_interface import ICertificateManager
+
+# noinspection PyProtectedMember
+from shared.db_logger import DBLogger, _Base as Base
+from shared.logger import Logger, TraceIdProvider
+from shared.models import CommandInfo, LogEntry, LogSeverity
+
+ROWS = 5_000
+PAGE_SIZE = 200
+REPEATS = 50
+
+
+def _make_client() -> TestClient:
+    engine = create_engine(
+        "sqlite://",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    Base.metadata.create_all(engine)
+    db_logger = DBLogger(is_test=True)
+    db_logger.engine = engine
+    db_logger.Session = sessionmaker(bind=engine)
+
+    for i in range(1, ROWS + 1):
+        db_logger.insert_log(
+            LogEntry(
+                entry_id=i,
+                timestamp=datetime.now(),
+                severity=LogSeverity.INFO,
+                message=f"Certificate test-cert-{i} renewed successfully",
+                trace_id=uuid4(),
+                command_info=CommandInfo(
+                    command=f"step-ca renew test-cert-{i}.crt test-cert-{i}.key",
+                    output="Your certificate has been saved in test.crt.\n" * 20,
+                    exit_code=0,
+                    action="RENEW_CERT",
+                ),
+            )
+        )
+
+    logger = Logger(TraceIdProvider(lambda: None), db_logger)
+    server = APIServer(Mock(spec=ICertificateManager), logger, "bench", 5000)
+    return TestClient(server.App)
+
+
+def _measure(client: TestClient, fields) -> tuple[int, float]:
+    body = {
+        "traceId": None,
+        "commandsOnly": False,
+        "severity": ["INFO"],
+        "page": 1,
+        "pageSize": PAGE_SIZE,
+    }
+    if fields:
+        body["fields"] = fields
+
+    size = len(client.post("/logs", json=body).content)
+    start = time.process_time()
+    for _ in range(REPEATS):
+        client.post("/logs", json=body)
+    return size, (time.process_time() - start) / REPEATS
+
+
+def main():
+    os.chdir(tempfile.mkdtemp())  # Logger writes application.log to cwd
+    client = _make_client()
+
+    full_bytes, full_cpu = _measure(client, None)
+    sparse_bytes, sparse_cpu = _measure(client, ["entryId", "severity", "timestamp"])
+
+    print(f"page of {PAGE_SIZE} rows, {REPEATS} repeats")
+    print(f"full:   {full_bytes:>8} bytes  {full_cpu * 1000:8.2f} ms CPU/page")
+    print(f"sparse: {sparse_bytes:>8} bytes  {sparse_cpu * 1000:8.2f} ms CPU/page")
+    print(
+        f"saved:  {full_bytes - sparse_bytes:>8} bytes  "
+        + f"{(full_cpu - sparse_cpu) * 1000:8.2f} ms CPU/page"
+    )
+
+
+if __name__ == "__main__":
+    main()
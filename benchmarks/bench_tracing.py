@@ -0,0 +1,50 @@
+"""
+Cost of the span API per call, with tracing off and on.
+
+Run from the repository root: python -m benchmarks.bench_tracing
+"""
+
+import os
+import tempfile
+import time
+
+from shared import tracing
+
+CALLS = 200_000
+
+
+def _plain() -> int:
+    return 1
+
+
+@tracing.traced("bench.traced")
+def _traced() -> int:
+    return 1
+
+
+def _with_span() -> int:
+    with tracing.span("bench.span"):
+        return 1
+
+
+def _per_call_ns(func) -> float:
+    started = time.perf_counter_ns()
+    for _ in range(CALLS):
+        func()
+    return (time.perf_counter_ns() - started) / CALLS
+
+
+def main() -> None:
+    baseline = _per_call_ns(_plain)
+    print(f"plain call:              {baseline:8.0f} ns")
+    print(f"traced, tracing off:     {_per_call_ns(_traced):8.0f} ns")
+    print(f"span(), tracing off:     {_per_call_ns(_with_span):8.0f} ns")
+
+    with tempfile.TemporaryDirectory() as directory:
+        tracing.configure(os.path.join(directory, "spans.jsonl"), "bench")
+        print(f"traced, tracing on:      {_per_call_ns(_traced):8.0f} ns")
+        tracing.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Latency of one core API call from the front's APIClient over loopback TCP and
+over a Unix domain socket, with pooled keep-alive connections on both.
+
+Calls are made one at a time against a core served by uvicorn in a thread of
+this process, so the figures are round trips of a small JSON response rather
+than throughput. The command preview endpoint is used, as it does no work.
+
+Run from the repository root: python -m benchmarks.bench_uds
+"""
+
+import asyncio
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+from typing import List, Optional
+from unittest.mock import Mock
+
+import uvicorn
+
+from core.api_server import APIServer, _bind_unix_socket
+from core.certificate_manager_mock import CertificateManagerMock
+from front.api_client import APIClient
+
+CALLS = 2_000
+WARMUP = 100
+REPEATS = 3
+
+
+def _serve(port: int = 0, sock: Optional[socket.socket] = None) -> uvicorn.Server:
+    """On TCP `port`, bound by uvicorn as in `APIServer.run`, or on `sock`"""
+    api_server = APIServer(CertificateManagerMock(), Mock(), "bench", port)
+    server = uvicorn.Server(
+        uvicorn.Config(api_server.App, host="127.0.0.1", port=port, log_level="warning")
+    )
+    threading.Thread(
+        target=server.run, kwargs={"sockets": [sock] if sock else None}
+    ).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def _latencies_us(api_client: APIClient) -> List[float]:
+    async def call():
+        response = await api_client.client.get("/certificates?preview=true")
+        response.raise_for_status()
+
+    for _ in range(WARMUP):
+        await call()
+
+    latencies = []
+    for _ in range(CALLS):
+        start = time.perf_counter()
+        await call()
+        latencies.append((time.perf_counter() - start) * 1e6)
+    return latencies
+
+
+async def _best_of(api_client: APIClient) -> List[float]:
+    runs = [await _latencies_us(api_client) for _ in range(REPEATS)]
+    await api_client.close()
+    return min(runs, key=statistics.median)
+
+
+def main():
+    directory = tempfile.TemporaryDirectory()
+    uds_path = os.path.join(directory.name, "core.sock")
+    port = _free_port()
+    uds_sock = _bind_unix_socket(uds_path, APIServer.UDS_MODE)
+    servers = [_serve(port=port), _serve(sock=uds_sock)]
+
+    try:
+        tcp = asyncio.run(_best_of(APIClient(f"http://127.0.0.1:{port}")))
+        uds = asyncio.run(_best_of(APIClient("http://core", uds=uds_path)))
+    finally:
+        for server in servers:
+            server.should_exit = True
+
+    print(f"{CALLS} sequential calls, best of {REPEATS}, us per call")
+    for name, latencies in [("tcp", tcp), ("uds", uds)]:
+        quantiles = statistics.quantiles(latencies, n=100)
+        print(
+            f"{name}  median {statistics.median(latencies):8.1f}"
+            + f"  p90 {quantiles[89]:8.1f}  p99 {quantiles[98]:8.1f}"
+        )
+    print(f"median speedup {statistics.median(tcp) / statistics.median(uds):4.2f}x")
+
+
+if __name__ == "__main__":
+    main()
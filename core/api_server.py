@@ -1,24 +1,73 @@
-from typing import List, Union
+import asyncio
+import csv
+import io
+import os
+import secrets
+import socket
+import stat
+import uuid
+from datetime import datetime
+from typing import (
+    AbstractSet,
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
 
 import uvicorn
-from fastapi import FastAPI, Query, HTTPException, Request
-from fastapi.responses import PlainTextResponse
+from fastapi import Depends, FastAPI, Header, Query, HTTPException, Request
+from pydantic import TypeAdapter, ValidationError
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 
+from core.certificate_change_log import CertificateChange, CertificateChangeLog
 from core.certificate_manager_interface import ICertificateManager
+from core.etags import InventoryVersion, content_etag, etag_matches
+from core.request_profiler import PROFILE_HEADER, RequestProfiler
 from core.trace_id_handler import TraceIdHandler
 from shared.api_models import (
+    CacheStatsDTO,
+    CertificateChangeDTO,
+    CertificateChangesDTO,
     CertificateDTO,
+    CertificateDTOField,
     CertificateGenerateRequest,
     CertificateGenerateResult,
     CertificateRenewResult,
     CertificateRevokeResult,
     CommandPreviewDTO,
     LogEntryDTO,
+    LogEntrySummaryDTO,
+    LogEntrySummaryDTOField,
+    LogExportFormat,
+    LogPolicyDTO,
+    LogPolicyStatusDTO,
     LogsRequest,
+    LogStatsDTO,
+    ProfileFormat,
+    RequestProfileDTO,
+    TimeBucketCountDTO,
     CommandInfoDTO,
+    CommandSummaryDTO,
 )
+from core.certificate_manager_interface import Certificate
+from shared.log_broadcaster import LogSubscription
 from shared.logger import Logger, LogsFilter, Paging
-from shared.models import LogSeverity
+from shared.models import (
+    CertificateChangeType,
+    LogEntry,
+    LogEntryField,
+    LogEntrySummary,
+    LogPolicyConfig,
+    LogSeverity,
+    StatsBucket,
+)
+from shared import metrics, tracing
+from shared.trace_context import TRACEPARENT_HEADER
 
 _default_response = {
     500: {
@@ -27,9 +76,237 @@ _default_response = {
     }
 }
 
+_not_modified_response = {
+    304: {"description": "Not modified, the ETag in If-None-Match is current"}
+}
+
+_CERTIFICATES_VERSION_HEADER = "X-Certificates-Version"
+_certificates_version_headers = {
+    _CERTIFICATES_VERSION_HEADER: {
+        "description": "Change feed version of the listing, pass it as `since`",
+        "schema": {"type": "string"},
+    }
+}
+
+
+_CERTIFICATE_DTO_GETTERS: Dict[CertificateDTOField, Callable[[Certificate], object]] = {
+    CertificateDTOField.ID: lambda cert: cert.id,
+    CertificateDTOField.NAME: lambda cert: cert.name,
+    CertificateDTOField.STATUS: lambda cert: cert.status,
+    CertificateDTOField.EXPIRATION_DATE: lambda cert: cert.expiration_date,
+}
+
+_LOG_SUMMARY_DTO_GETTERS: Dict[
+    LogEntrySummaryDTOField, Callable[[LogEntrySummary], object]
+] = {
+    LogEntrySummaryDTOField.ENTRY_ID: lambda log: log.entry_id,
+    LogEntrySummaryDTOField.TIMESTAMP: lambda log: log.timestamp,
+    LogEntrySummaryDTOField.SEVERITY: lambda log: log.severity,
+    LogEntrySummaryDTOField.MESSAGE: lambda log: log.message,
+    LogEntrySummaryDTOField.TRACE_ID: lambda log: log.trace_id,
+    LogEntrySummaryDTOField.COMMAND_INFO: lambda log: (
+        CommandSummaryDTO(
+            command=log.command_info.command,
+            exitCode=log.command_info.exit_code,
+            action=log.command_info.action,
+            outputPreview=log.command_info.output_preview,
+            outputSize=log.command_info.output_size,
+        )
+        if log.command_info
+        else None
+    ),
+}
+
+_LOG_ENTRY_FIELDS: Dict[LogEntrySummaryDTOField, LogEntryField] = {
+    LogEntrySummaryDTOField.ENTRY_ID: LogEntryField.ENTRY_ID,
+    LogEntrySummaryDTOField.TIMESTAMP: LogEntryField.TIMESTAMP,
+    LogEntrySummaryDTOField.SEVERITY: LogEntryField.SEVERITY,
+    LogEntrySummaryDTOField.MESSAGE: LogEntryField.MESSAGE,
+    LogEntrySummaryDTOField.TRACE_ID: LogEntryField.TRACE_ID,
+    LogEntrySummaryDTOField.COMMAND_INFO: LogEntryField.COMMAND_INFO,
+}
+
+
+def _to_log_summary_dto(log: LogEntrySummary) -> LogEntrySummaryDTO:
+    return LogEntrySummaryDTO(
+        **{field: get(log) for field, get in _LOG_SUMMARY_DTO_GETTERS.items()}
+    )
+
+
+def _to_log_entry_dto(log_entry: LogEntry) -> LogEntryDTO:
+    return LogEntryDTO(
+        entryId=log_entry.entry_id,
+        timestamp=log_entry.timestamp,
+        severity=log_entry.severity,
+        message=log_entry.message,
+        traceId=log_entry.trace_id,
+        commandInfo=(
+            CommandInfoDTO(
+                command=log_entry.command_info.command,
+                output=log_entry.command_info.output,
+                exitCode=log_entry.command_info.exit_code,
+                action=log_entry.command_info.action,
+            )
+            if log_entry.command_info
+            else None
+        ),
+    )
+
+
+def _to_certificate_change_dto(change: CertificateChange) -> CertificateChangeDTO:
+    return CertificateChangeDTO(
+        version=change.version,
+        changeType=change.change_type,
+        certificateId=change.certificate_id,
+        timestamp=change.timestamp,
+        certificateName=change.certificate_name,
+        expirationDate=change.expiration_date,
+        revocationDate=change.revocation_date,
+    )
+
+
+_CSV_EXPORT_COLUMNS = [
+    "entryId",
+    "timestamp",
+    "severity",
+    "traceId",
+    "message",
+    "command",
+    "exitCode",
+    "action",
+    "output",
+]
+
+
+def _export_ndjson(logs: Iterator[LogEntry], rows_per_chunk: int) -> Iterator[str]:
+    chunk: List[str] = []
+    for log_entry in logs:
+        chunk.append(_to_log_entry_dto(log_entry).model_dump_json() + "\n")
+        if len(chunk) >= rows_per_chunk:
+            yield "".join(chunk)
+            chunk = []
+    if chunk:
+        yield "".join(chunk)
+
+
+def _export_csv(logs: Iterator[LogEntry], rows_per_chunk: int) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(_CSV_EXPORT_COLUMNS)
+
+    rows = 0
+    for log_entry in logs:
+        command_info = log_entry.command_info
+        writer.writerow(
+            [
+                log_entry.entry_id,
+                log_entry.timestamp.isoformat(),
+                log_entry.severity.value,
+                log_entry.trace_id,
+                log_entry.message,
+            ]
+            + (
+                [
+                    command_info.command,
+                    command_info.exit_code,
+                    command_info.action,
+                    command_info.output,
+                ]
+                if command_info
+                else ["", "", "", ""]
+            )
+        )
+        rows += 1
+        if rows % rows_per_chunk == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+_LOG_EXPORTERS: Dict[
+    LogExportFormat, Callable[[Iterator[LogEntry], int], Iterator[str]]
+] = {
+    LogExportFormat.NDJSON: _export_ndjson,
+    LogExportFormat.CSV: _export_csv,
+}
+
+_LOG_EXPORT_MEDIA_TYPES: Dict[LogExportFormat, str] = {
+    LogExportFormat.NDJSON: "application/x-ndjson",
+    LogExportFormat.CSV: "text/csv",
+}
+
+
+_CERTIFICATE_DTOS = TypeAdapter(List[CertificateDTO])
+_LOG_SUMMARY_DTOS = TypeAdapter(List[LogEntrySummaryDTO])
+_LOG_ENTRY_DTO = TypeAdapter(LogEntryDTO)
+
+
+def _json_response(
+    adapter: TypeAdapter, content: Any, exclude_unset: bool = False
+) -> Response:
+    """
+    Serializes DTOs straight to JSON bytes with a prebuilt adapter. Returning a
+    Response skips FastAPI's second validation against response_model and its
+    encoding through jsonable dicts; response_model still documents the body.
+    `exclude_unset` leaves out the fields a sparse DTO was constructed without.
+    """
+    return Response(
+        adapter.dump_json(content, exclude_unset=exclude_unset),
+        media_type="application/json",
+    )
+
+
+def _with_etag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"  # cache, but revalidate
+    return response
+
+
+def _not_modified(etag: str) -> Response:
+    return _with_etag(Response(status_code=304), etag)
+
+
+def _with_version(response: Response, version: str) -> Response:
+    response.headers[_CERTIFICATES_VERSION_HEADER] = version
+    return response
+
+
+def _dto_list_response(
+    adapter: TypeAdapter, getters: Dict[str, Callable[[Any], object]], rows: List
+) -> Response:
+    # one validation call for the whole page instead of a constructor per row
+    dtos = adapter.validate_python(
+        [{field: get(row) for field, get in getters.items()} for row in rows]
+    )
+    return _json_response(adapter, dtos)
+
+
+def _bind_unix_socket(path: str, mode: int) -> socket.socket:
+    try:
+        if stat.S_ISSOCK(os.stat(path).st_mode):
+            os.unlink(path)  # left over by a server that did not shut down
+    except FileNotFoundError:
+        pass
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # created without any permissions, so no one connects before the chmod
+    umask = os.umask(0o777)
+    try:
+        sock.bind(path)
+    finally:
+        os.umask(umask)
+    os.chmod(path, mode)
+    return sock
+
 
 # noinspection PyPep8Naming
 class APIServer:
+    STREAM_KEEPALIVE_SECONDS = 15
+    UDS_MODE = 0o660
+    EXPORT_ROWS_PER_CHUNK = 500
+
     def __init__(
         self,
         cert_manager: ICertificateManager,
@@ -37,10 +314,17 @@ class APIServer:
         version: str,
         port: int,
         prod_url: str = None,
+        admin_token: Optional[str] = None,
+        profiler: Optional[RequestProfiler] = None,
+        change_log: Optional[CertificateChangeLog] = None,
     ):
         self._cert_manager = cert_manager
         self._logger = logger
         self._port = port
+        self._admin_token = admin_token
+        self._profiler = profiler or RequestProfiler()
+        self._inventory_version = InventoryVersion()
+        self._change_log = change_log or CertificateChangeLog()
         self.App = FastAPI(
             title="Step-CA Management API",
             version=version,
@@ -62,34 +346,107 @@ class APIServer:
         )
 
         self._setup_routes()
+        self._setup_admin_routes()
         self._setup_handlers()
 
-    def run(self):
-        uvicorn.run(self.App, host="0.0.0.0", port=self._port)
+    def run(self, uds: Optional[str] = None, uds_mode: int = UDS_MODE):
+        """
+        Serves on TCP `port`, or only on the Unix domain socket `uds` if given.
+        The socket file permissions are then the access control: `uds_mode`
+        allows the owner and group by default, so the front has to run as the
+        same user or in the group of the core.
+        """
+        if not uds:
+            uvicorn.run(self.App, host="0.0.0.0", port=self._port)
+            return
+
+        # uvicorn would make its own socket world-writable, so bind it here
+        sock = _bind_unix_socket(uds, uds_mode)
+        try:
+            uvicorn.Server(uvicorn.Config(self.App)).run(sockets=[sock])
+        finally:
+            sock.close()
+            os.unlink(uds)
 
     def _setup_routes(self):
         @self.App.get(
             "/certificates",
             response_model=Union[List[CertificateDTO], CommandPreviewDTO],
-            responses=_default_response,
+            responses={
+                200: {"headers": _certificates_version_headers},
+                304: {
+                    **_not_modified_response[304],
+                    "headers": _certificates_version_headers,
+                },
+                **_default_response,
+            },
         )
         async def list_certificates(
             preview: bool = Query(...),
+            fields: Optional[List[CertificateDTOField]] = Query(
+                None, description="Return only these fields, all of them if omitted"
+            ),
+            if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
         ) -> Union[List[CertificateDTO], CommandPreviewDTO]:
             if preview:
                 command = self._cert_manager.preview_list_certificates()
                 return CommandPreviewDTO(command=command)
+
+            # the sparse variants are separate representations with own ETags
+            etag = self._inventory_version.etag(",".join(fields or []))
+            # read before listing, a change during the listing is then fed again
+            version = self._change_log.version
+            if etag_matches(if_none_match, etag):
+                return _with_version(_not_modified(etag), version)
+
             certs = self._cert_manager.list_certificates()
+            self._inventory_version.observe_expirations(
+                cert.expiration_date for cert in certs
+            )
 
-            return [
-                CertificateDTO(
-                    id=cert.id,
-                    name=cert.name,
-                    status=cert.status,
-                    expirationDate=cert.expiration_date,
-                )
-                for cert in certs
-            ]
+            with tracing.span("api.build_dtos", {"dto.count": len(certs)}):
+                if fields:
+                    getters = {
+                        field: _CERTIFICATE_DTO_GETTERS[field] for field in fields
+                    }
+                    response = _json_response(
+                        _CERTIFICATE_DTOS,
+                        [
+                            CertificateDTO.model_construct(
+                                **{field: get(cert) for field, get in getters.items()}
+                            )
+                            for cert in certs
+                        ],
+                        exclude_unset=True,
+                    )
+                else:
+                    response = _dto_list_response(
+                        _CERTIFICATE_DTOS, _CERTIFICATE_DTO_GETTERS, certs
+                    )
+            return _with_version(_with_etag(response, etag), version)
+
+        @self.App.get(
+            "/certificates/changes",
+            response_model=CertificateChangesDTO,
+            responses=_default_response,
+        )
+        async def get_certificate_changes(
+            since: str = Query(
+                ...,
+                description="X-Certificates-Version of the last listing or version "
+                "of the last change feed read",
+            ),
+        ) -> CertificateChangesDTO:
+            try:
+                changes = self._change_log.changes_since(since)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid version token")
+
+            return CertificateChangesDTO(
+                version=changes.version,
+                resyncRequired=changes.resync_required,
+                changes=[_to_certificate_change_dto(c) for c in changes.changes],
+            )
 
         @self.App.post(
             "/certificates/generate",
@@ -107,6 +464,14 @@ class APIServer:
             cert = self._cert_manager.generate_certificate(
                 cert_request.keyName, cert_request.keyType, cert_request.duration
             )
+            self._inventory_version.bump()
+            if cert.success:
+                self._change_log.record(
+                    CertificateChangeType.CREATED,
+                    cert.certificate_id,
+                    certificate_name=cert.certificate_name,
+                    expiration_date=cert.expiration_date,
+                )
 
             return CertificateGenerateResult(
                 success=cert.success,
@@ -131,6 +496,13 @@ class APIServer:
                 command = self._cert_manager.preview_renew_certificate(certId, duration)
                 return CommandPreviewDTO(command=command)
             cert = self._cert_manager.renew_certificate(certId, duration)
+            self._inventory_version.bump()
+            if cert.success:
+                self._change_log.record(
+                    CertificateChangeType.RENEWED,
+                    cert.certificate_id,
+                    expiration_date=cert.new_expiration_date,
+                )
 
             return CertificateRenewResult(
                 success=cert.success,
@@ -152,6 +524,13 @@ class APIServer:
                 command = self._cert_manager.preview_revoke_certificate(certId)
                 return CommandPreviewDTO(command=command)
             cert = self._cert_manager.revoke_certificate(certId)
+            self._inventory_version.bump()
+            if cert.success:
+                self._change_log.record(
+                    CertificateChangeType.REVOKED,
+                    cert.certificate_id,
+                    revocation_date=cert.revocation_date,
+                )
 
             return CertificateRevokeResult(
                 success=cert.success,
@@ -162,65 +541,343 @@ class APIServer:
             )
 
         @self.App.get(
-            "/logs/single", response_model=LogEntryDTO, responses=_default_response
+            "/logs/single",
+            response_model=LogEntryDTO,
+            responses={**_not_modified_response, **_default_response},
         )
-        async def get_log_entry(logId: int = Query(..., gt=0)):
+        async def get_log_entry(
+            logId: int = Query(..., gt=0),
+            if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+        ):
             log_entry = self._logger.get_log_entry(logId)
             if not log_entry:
                 raise HTTPException(status_code=404, detail="Log entry not found")
 
-            return LogEntryDTO(
-                entryId=log_entry.entry_id,
-                timestamp=log_entry.timestamp,
-                severity=log_entry.severity,
-                message=log_entry.message,
-                traceId=log_entry.trace_id,
-                commandInfo=(
-                    CommandInfoDTO(
-                        command=log_entry.command_info.command,
-                        output=log_entry.command_info.output,
-                        exitCode=log_entry.command_info.exit_code,
-                        action=log_entry.command_info.action,
-                    )
-                    if log_entry.command_info
-                    else None
-                ),
-            )
+            with tracing.span("api.build_dtos", {"dto.count": 1}):
+                response = _json_response(_LOG_ENTRY_DTO, _to_log_entry_dto(log_entry))
+
+            # entries never change, so the hash of the body identifies them
+            etag = content_etag(response.body)
+            if etag_matches(if_none_match, etag):
+                return _not_modified(etag)
+            return _with_etag(response, etag)
 
         @self.App.post(
-            "/logs", response_model=List[LogEntryDTO], responses=_default_response
+            "/logs",
+            response_model=List[LogEntrySummaryDTO],
+            responses=_default_response,
         )
-        async def get_logs(logs_request: LogsRequest) -> List[LogEntryDTO]:
+        async def get_logs(logs_request: LogsRequest) -> List[LogEntrySummaryDTO]:
+            fields: Optional[AbstractSet[LogEntryField]] = (
+                {_LOG_ENTRY_FIELDS[field] for field in logs_request.fields}
+                if logs_request.fields
+                else None
+            )
             logs = self._logger.get_logs(
                 LogsFilter(
                     trace_id=logs_request.traceId,
                     commands_only=logs_request.commandsOnly,
                     severity=logs_request.severity,
+                    date_from=logs_request.dateFrom,
+                    date_to=logs_request.dateTo,
+                    before=logs_request.before,
+                    before_id=logs_request.beforeId,
                 ),
                 Paging(page=logs_request.page, page_size=logs_request.pageSize),
+                fields,
+            )
+
+            with tracing.span("api.build_dtos", {"dto.count": len(logs)}):
+                if fields is not None:
+                    getters = {
+                        field: _LOG_SUMMARY_DTO_GETTERS[field]
+                        for field in logs_request.fields
+                    }
+                    return _json_response(
+                        _LOG_SUMMARY_DTOS,
+                        [
+                            LogEntrySummaryDTO.model_construct(
+                                **{field: get(log) for field, get in getters.items()}
+                            )
+                            for log in logs
+                        ],
+                        exclude_unset=True,
+                    )
+
+                return _dto_list_response(
+                    _LOG_SUMMARY_DTOS, _LOG_SUMMARY_DTO_GETTERS, logs
+                )
+
+        @self.App.get(
+            "/logs/stats", response_model=LogStatsDTO, responses=_default_response
+        )
+        async def get_log_stats(
+            traceId: Optional[uuid.UUID] = Query(None),
+            commandsOnly: bool = Query(False),
+            severity: List[LogSeverity] = Query(list(LogSeverity)),
+            dateFrom: Optional[datetime] = Query(None, description="Inclusive"),
+            dateTo: Optional[datetime] = Query(None, description="Exclusive"),
+            bucket: StatsBucket = Query(StatsBucket.HOUR),
+        ) -> LogStatsDTO:
+            stats = self._logger.get_log_stats(
+                LogsFilter(
+                    trace_id=traceId,
+                    commands_only=commandsOnly,
+                    severity=severity,
+                    date_from=dateFrom,
+                    date_to=dateTo,
+                ),
+                bucket,
+            )
+
+            return LogStatsDTO(
+                total=stats.total,
+                bucket=bucket,
+                bySeverity=stats.by_severity,
+                byAction=stats.by_action,
+                byExitCode=stats.by_exit_code,
+                byTime=[
+                    TimeBucketCountDTO(bucketStart=b.bucket_start, count=b.count)
+                    for b in stats.by_time
+                ],
+            )
+
+        @self.App.get(
+            "/logs/export",
+            response_class=StreamingResponse,
+            responses={
+                200: {
+                    "description": "Every matching entry, oldest first, as one"
+                    + " LogEntryDTO per line (ndjson) or one row per entry (csv)",
+                    "content": {"application/x-ndjson": {}, "text/csv": {}},
+                },
+                **_default_response,
+            },
+        )
+        async def export_logs(
+            traceId: Optional[uuid.UUID] = Query(None),
+            commandsOnly: bool = Query(False),
+            severity: List[LogSeverity] = Query(list(LogSeverity)),
+            dateFrom: Optional[datetime] = Query(None, description="Inclusive"),
+            dateTo: Optional[datetime] = Query(None, description="Exclusive"),
+            format: LogExportFormat = Query(LogExportFormat.NDJSON),
+        ) -> StreamingResponse:
+            logs = self._logger.iter_logs(
+                LogsFilter(
+                    trace_id=traceId,
+                    commands_only=commandsOnly,
+                    severity=severity,
+                    date_from=dateFrom,
+                    date_to=dateTo,
+                )
+            )
+            # a sync iterator, starlette pulls it in a worker thread
+            return StreamingResponse(
+                _LOG_EXPORTERS[format](logs, self.EXPORT_ROWS_PER_CHUNK),
+                media_type=_LOG_EXPORT_MEDIA_TYPES[format],
+                headers={
+                    "Content-Disposition": f'attachment; filename="logs.{format}"'
+                },
+            )
+
+        @self.App.get(
+            "/logs/stream",
+            response_class=StreamingResponse,
+            responses={
+                200: {
+                    "description": "Server-sent events: `data` is a LogEntrySummaryDTO"
+                    + " for every new matching entry, a `dropped` event carries"
+                    + " the number of entries skipped because the client was slow",
+                    "content": {"text/event-stream": {}},
+                },
+                **_default_response,
+            },
+        )
+        async def stream_logs(
+            traceId: Optional[uuid.UUID] = Query(None),
+            commandsOnly: bool = Query(False),
+            severity: List[LogSeverity] = Query(list(LogSeverity)),
+        ) -> StreamingResponse:
+            subscription = self._logger.broadcaster.subscribe(
+                LogsFilter(
+                    trace_id=traceId, commands_only=commandsOnly, severity=severity
+                )
+            )
+            return StreamingResponse(
+                self._log_events(subscription),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+
+        @self.App.get(
+            "/metrics",
+            response_class=PlainTextResponse,
+            responses={
+                200: {
+                    "description": "Metrics in the Prometheus text exposition format",
+                    "content": {"text/plain": {}},
+                },
+            },
+        )
+        async def get_metrics() -> PlainTextResponse:
+            return PlainTextResponse(
+                metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE
             )
 
+    def _require_admin(
+        self, x_admin_token: Optional[str] = Header(None, alias="X-Admin-Token")
+    ) -> None:
+        if self._admin_token is None:
+            raise HTTPException(status_code=403, detail="Admin API is disabled")
+        if not self._is_admin_token(x_admin_token):
+            raise HTTPException(status_code=401, detail="Invalid admin token")
+
+    def _is_admin_token(self, token: Optional[str]) -> bool:
+        return (
+            self._admin_token is not None
+            and token is not None
+            and secrets.compare_digest(token, self._admin_token)
+        )
+
+    def _log_policy_status(self) -> LogPolicyStatusDTO:
+        config = self._logger.policy.config
+        stats = self._logger.policy.stats()
+        return LogPolicyStatusDTO(
+            policy=LogPolicyDTO(
+                minSeverity=config.min_severity,
+                severitySampleRates=config.severity_sample_rates,
+                actionSampleRates=config.action_sample_rates,
+                dedupeWindowSeconds=config.dedupe_window_seconds,
+            ),
+            sampledOut=stats.sampled_out,
+            suppressed=stats.suppressed,
+        )
+
+    async def _log_events(self, subscription: LogSubscription) -> AsyncIterator[str]:
+        try:
+            while True:
+                try:
+                    batch = await asyncio.wait_for(
+                        subscription.next_batch(), self.STREAM_KEEPALIVE_SECONDS
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+
+                if subscription.dropped:
+                    yield f"event: dropped\ndata: {subscription.dropped}\n\n"
+                    subscription.dropped = 0
+
+                for log_entry in batch:
+                    try:
+                        dto = _to_log_summary_dto(LogEntrySummary.of(log_entry))
+                    except ValidationError:  # skipped, the stream goes on
+                        continue
+                    yield f"id: {log_entry.entry_id}\ndata: {dto.model_dump_json()}\n\n"
+        finally:
+            self._logger.broadcaster.unsubscribe(subscription)
+
+    def _setup_admin_routes(self):
+        @self.App.get(
+            "/admin/log-policy",
+            response_model=LogPolicyStatusDTO,
+            responses=_default_response,
+            dependencies=[Depends(self._require_admin)],
+        )
+        async def get_log_policy() -> LogPolicyStatusDTO:
+            return self._log_policy_status()
+
+        @self.App.put(
+            "/admin/log-policy",
+            response_model=LogPolicyStatusDTO,
+            responses=_default_response,
+            dependencies=[Depends(self._require_admin)],
+        )
+        async def set_log_policy(policy: LogPolicyDTO) -> LogPolicyStatusDTO:
+            self._logger.set_policy(
+                LogPolicyConfig(
+                    min_severity=policy.minSeverity,
+                    severity_sample_rates=policy.severitySampleRates,
+                    action_sample_rates=policy.actionSampleRates,
+                    dedupe_window_seconds=policy.dedupeWindowSeconds,
+                )
+            )
+            return self._log_policy_status()
+
+        @self.App.get(
+            "/admin/log-cache",
+            response_model=CacheStatsDTO,
+            responses=_default_response,
+            dependencies=[Depends(self._require_admin)],
+        )
+        async def get_log_cache_stats() -> CacheStatsDTO:
+            stats = self._logger.get_recent_cache_stats()
+            return CacheStatsDTO(
+                hits=stats.hits,
+                misses=stats.misses,
+                hitRatio=stats.hit_ratio,
+                size=stats.size,
+                capacity=stats.capacity,
+            )
+
+        @self.App.get(
+            "/admin/profiles",
+            response_model=List[RequestProfileDTO],
+            responses=_default_response,
+            dependencies=[Depends(self._require_admin)],
+        )
+        async def list_profiles() -> List[RequestProfileDTO]:
             return [
-                LogEntryDTO(
-                    entryId=log.entry_id,
-                    timestamp=log.timestamp,
-                    severity=log.severity,
-                    message=log.message,
-                    traceId=log.trace_id,
-                    commandInfo=(
-                        CommandInfoDTO(
-                            command=log.command_info.command,
-                            output=log.command_info.output,
-                            exitCode=log.command_info.exit_code,
-                            action=log.command_info.action,
-                        )
-                        if log.command_info
-                        else None
-                    ),
+                RequestProfileDTO(
+                    traceId=profile.trace_id,
+                    spanId=profile.span_id,
+                    method=profile.method,
+                    path=profile.path,
+                    startedAt=profile.started_at,
+                    durationSeconds=profile.duration_seconds,
                 )
-                for log in logs
+                for profile in self._profiler.get_profiles()
             ]
 
+        @self.App.get(
+            "/admin/profiles/{traceId}",
+            response_class=Response,
+            responses={
+                200: {
+                    "description": "cProfile stats, readable with pstats or"
+                    + " snakeviz, or a text report of the slowest functions",
+                    "content": {"application/octet-stream": {}, "text/plain": {}},
+                },
+                404: {
+                    "description": "No profile kept for this trace or span",
+                    "content": {"text/plain": {"example": "Profile not found"}},
+                },
+                **_default_response,
+            },
+            dependencies=[Depends(self._require_admin)],
+        )
+        async def get_profile(
+            traceId: uuid.UUID,
+            spanId: Optional[str] = Query(
+                None, description="The trace's newest profile if omitted"
+            ),
+            format: ProfileFormat = Query(ProfileFormat.PSTATS),
+        ) -> Response:
+            profile = self._profiler.get_profile(traceId, spanId)
+            if profile is None:
+                raise HTTPException(status_code=404, detail="Profile not found")
+
+            if format == ProfileFormat.TEXT:
+                return PlainTextResponse(profile.as_text())
+            return Response(
+                profile.stats,
+                media_type="application/octet-stream",
+                headers={
+                    "Content-Disposition": "attachment;"
+                    + f' filename="{traceId}-{profile.span_id}.prof"'
+                },
+            )
+
     def _setup_handlers(self):
         @self.App.exception_handler(HTTPException)
         async def custom_http_exception_handler(request: Request, exc: HTTPException):
@@ -236,8 +893,39 @@ class APIServer:
                 f"Internal server error, trace_id [{trace_id}]", status_code=500
             )
 
+        # registered first so it runs inside the trace scope set up below
+        @self.App.middleware("http")
+        async def profile_request(request: Request, call_next):
+            headers = request.headers
+            requested = headers.get(PROFILE_HEADER) == "1" and self._is_admin_token(
+                headers.get("X-Admin-Token")
+            )
+            if not self._profiler.should_profile(requested):
+                return await call_next(request)
+
+            with self._profiler.profile(
+                request.state.trace_id,
+                request.state.span_id,
+                request.method,
+                request.url.path,
+            ):
+                return await call_next(request)
+
         @self.App.middleware("http")
         async def setup_logging_scope(request: Request, call_next):
-            async with TraceIdHandler.logging_scope():
-                response = await call_next(request)
+            async with TraceIdHandler.logging_scope(
+                request.headers.get(TRACEPARENT_HEADER)
+            ) as context:
+                request.state.trace_id = context.trace_id
+                request.state.span_id = context.span_id
+                with tracing.span(
+                    f"{request.method} {request.url.path}",
+                    {"http.request.method": request.method},
+                    scope=context,
+                ) as span:
+                    response = await metrics.measure_request(request, call_next)
+                    span.set_attribute(
+                        "http.response.status_code", response.status_code
+                    )
+            response.headers[TRACEPARENT_HEADER] = context.to_traceparent()
             return response
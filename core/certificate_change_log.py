@@ -0,0 +1,162 @@
+import json
+import os
+import secrets
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Deque, Iterator, List, Optional
+
+from pydantic import BaseModel, ValidationError
+
+from shared.models import CertificateChangeType
+
+
+class CertificateChange(BaseModel):
+    version: int
+    change_type: CertificateChangeType
+    certificate_id: str
+    timestamp: datetime
+    certificate_name: Optional[str] = None
+    expiration_date: Optional[datetime] = None
+    revocation_date: Optional[datetime] = None
+
+
+class CertificateChanges(BaseModel):
+    version: str  # token to pass as `since` next time
+    resync_required: bool  # `since` is too old or unknown, `changes` is empty
+    changes: List[CertificateChange]  # oldest first
+
+
+class CertificateChangeLog:
+    """
+    Numbered certificate changes, for clients that mirror the inventory.
+
+    The newest `capacity` changes are kept in memory. With a `path`, every
+    change is also appended to a JSON lines file that answers older `since`
+    tokens and keeps versions going across restarts; it is compacted to the
+    newest `persisted_capacity` changes once it holds twice as many.
+
+    Version tokens are `<log id>.<version>`. The log id is random per file, or
+    per process without a file, so a token from another log is never mistaken
+    for one of ours and gets a resync instead.
+    """
+
+    CAPACITY = 1000
+    PERSISTED_CAPACITY = 100_000
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        capacity: int = CAPACITY,
+        persisted_capacity: int = PERSISTED_CAPACITY,
+    ):
+        self._path = path
+        self._persisted_capacity = persisted_capacity
+        self._changes: Deque[CertificateChange] = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._log_id = secrets.token_hex(8)
+        self._version = 0
+        self._persisted = 0
+        self._first_persisted = 1
+
+        if path and os.path.exists(path):
+            self._load()
+        elif path:
+            self._rewrite([])
+
+    @property
+    def version(self) -> str:
+        with self._lock:
+            return self._token(self._version)
+
+    def record(
+        self,
+        change_type: CertificateChangeType,
+        certificate_id: str,
+        certificate_name: Optional[str] = None,
+        expiration_date: Optional[datetime] = None,
+        revocation_date: Optional[datetime] = None,
+    ) -> CertificateChange:
+        with self._lock:
+            self._version += 1
+            change = CertificateChange(
+                version=self._version,
+                change_type=change_type,
+                certificate_id=certificate_id,
+                timestamp=datetime.now(),
+                certificate_name=certificate_name,
+                expiration_date=expiration_date,
+                revocation_date=revocation_date,
+            )
+            self._changes.append(change)
+            if self._path:
+                self._persist(change)
+            return change
+
+    def changes_since(self, since: str) -> CertificateChanges:
+        """Raises ValueError if `since` is not a version token"""
+        log_id, _, version_text = since.rpartition(".")
+        version = int(version_text)
+
+        with self._lock:
+            current = self._token(self._version)
+            if log_id != self._log_id or not 0 <= version <= self._version:
+                return CertificateChanges(
+                    version=current, resync_required=True, changes=[]
+                )
+
+            first_in_memory = (
+                self._changes[0].version if self._changes else self._version + 1
+            )
+            if version + 1 >= first_in_memory:
+                changes = [c for c in self._changes if c.version > version]
+            elif self._path and version + 1 >= self._first_persisted:
+                changes = [c for c in self._read() if c.version > version]
+            else:
+                return CertificateChanges(
+                    version=current, resync_required=True, changes=[]
+                )
+
+        return CertificateChanges(
+            version=current, resync_required=False, changes=changes
+        )
+
+    def _token(self, version: int) -> str:
+        return f"{self._log_id}.{version}"
+
+    def _load(self) -> None:
+        with open(self._path, encoding="utf-8") as file:
+            self._log_id = json.loads(file.readline())["logId"]
+        for change in self._read():
+            if self._persisted == 0:
+                self._first_persisted = change.version
+            self._persisted += 1
+            self._version = change.version
+            self._changes.append(change)
+
+    def _read(self) -> Iterator[CertificateChange]:
+        with open(self._path, encoding="utf-8") as file:
+            file.readline()  # header
+            for line in file:
+                try:
+                    yield CertificateChange.model_validate_json(line)
+                except ValidationError:  # torn last line of a crashed append
+                    continue
+
+    def _persist(self, change: CertificateChange) -> None:
+        with open(self._path, "a", encoding="utf-8") as file:
+            file.write(change.model_dump_json() + "\n")
+        self._persisted += 1
+        if self._persisted >= 2 * self._persisted_capacity:
+            kept = deque(self._read(), maxlen=self._persisted_capacity)
+            self._rewrite(list(kept))
+
+    def _rewrite(self, changes: List[CertificateChange]) -> None:
+        temporary_path = self._path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(json.dumps({"logId": self._log_id}) + "\n")
+            for change in changes:
+                file.write(change.model_dump_json() + "\n")
+        os.replace(temporary_path, self._path)
+        self._persisted = len(changes)
+        self._first_persisted = changes[0].version if changes else self._version + 1
@@ -17,7 +17,7 @@ class CertificateManager(ICertificateManager):
 
     def list_certificates(self) -> List[Certificate]:
         command = self.preview_list_certificates()
-        output, exit_code = self._cli_wrapper.execute_command(command)
+        output, exit_code = self._cli_wrapper.execute_command(command, "LIST_CERTS")
 
         # Parse the output and create a list of Certificate objects
         certificates = []
@@ -30,7 +30,7 @@ class CertificateManager(ICertificateManager):
 
     def generate_certificate(self, key_name: str, key_type: KeyType, duration_in_seconds: int) -> CertificateResult:
         command = self.preview_generate_certificate(key_name, key_type, duration_in_seconds)
-        output, exit_code = self._cli_wrapper.execute_command(command)
+        output, exit_code = self._cli_wrapper.execute_command(command, "GENERATE_CERT")
 
         success = exit_code == 0
         message = "Certificate generated successfully" if success else "Failed to generate certificate"
@@ -58,7 +58,7 @@ class CertificateManager(ICertificateManager):
 
     def renew_certificate(self, cert_id: str, duration: int) -> CertificateResult:
         command = self.preview_renew_certificate(cert_id, duration)
-        output, exit_code = self._cli_wrapper.execute_command(command)
+        output, exit_code = self._cli_wrapper.execute_command(command, "RENEW_CERT")
 
         success = exit_code == 0
         message = "Certificate renewed successfully" if success else "Failed to renew certificate"
@@ -84,7 +84,7 @@ class CertificateManager(ICertificateManager):
 
     def revoke_certificate(self, cert_id: str) -> CertificateResult:
         command = self.preview_revoke_certificate(cert_id)
-        output, exit_code = self._cli_wrapper.execute_command(command)
+        output, exit_code = self._cli_wrapper.execute_command(command, "REVOKE_CERT")
 
         success = exit_code == 0
         message = "Certificate revoked successfully" if success else "Failed to revoke certificate"
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Protocol
+from typing import List, Optional, Protocol
 
 from pydantic import BaseModel
 
@@ -9,7 +9,7 @@ from shared.models import KeyType
 class CertificateResult(BaseModel):
     success: bool
     message: str
-    log_entry_id: int
+    log_entry_id: Optional[int]
     certificate_id: str
     certificate_name: str = None
     expiration_date: datetime = None
@@ -0,0 +1,63 @@
+import hashlib
+import secrets
+import threading
+from datetime import datetime
+from typing import Iterable, Optional
+
+
+class InventoryVersion:
+    """
+    Version of the certificate inventory, for ETags on certificate listings.
+
+    It is bumped by every generate, renew and revoke, and when the earliest
+    expiration seen in the last listing passes, since certificate status can
+    change with time alone. The value carries a token picked at startup, so a
+    restarted server never reuses the ETag of different content.
+    """
+
+    def __init__(self):
+        self._instance = secrets.token_hex(4)
+        self._version = 0
+        self._next_expiration: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def bump(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._next_expiration = None
+
+    def observe_expirations(self, expirations: Iterable[datetime]) -> None:
+        upcoming = [
+            expiration
+            for expiration in expirations
+            if expiration > datetime.now(expiration.tzinfo)
+        ]
+        with self._lock:
+            self._next_expiration = min(upcoming, default=None)
+
+    def etag(self, variant: str = "") -> str:
+        """
+        Strong ETag of the current version. Read it before listing, so a change
+        made during the listing is not hidden behind the older ETag.
+        """
+        with self._lock:
+            expiration = self._next_expiration
+            if expiration and expiration <= datetime.now(expiration.tzinfo):
+                self._version += 1
+                self._next_expiration = None
+            version = self._version
+        return f'"{self._instance}-{version}{"-" + variant if variant else ""}"'
+
+
+def content_etag(body: bytes) -> str:
+    return f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so W/ prefixes are ignored"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in tags)
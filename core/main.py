@@ -1,15 +1,73 @@
+import os
+
 from core.api_server import APIServer
+from core.certificate_change_log import CertificateChangeLog
 from core.certificate_manager_mock import CertificateManagerMock
+from core.request_profiler import RequestProfiler
 from core.trace_id_handler import TraceIdHandler
+from shared import tracing
+from shared.db_logger import DBLogger
+from shared.db_logger_interface import IDBLogger
 from shared.db_logger_mock import DBLoggerMock
+from shared.db_logger_sqlite import SQLiteDBLogger
+from shared.log_spool import LogSpool, SpoolFsync, SpoolingDBLogger
 from shared.logger import Logger, TraceIdProvider
+from shared.pg_log_listener import PostgresLogListener
+
+if os.getenv("TRACE_EXPORT_PATH"):
+    tracing.configure(os.getenv("TRACE_EXPORT_PATH"), "step-ca-webui-core")
+
+
+def _create_db_logger() -> IDBLogger:
+    if os.getenv("SQLITE_LOG_PATH"):
+        return SQLiteDBLogger(os.getenv("SQLITE_LOG_PATH"))
+    if os.getenv("DB_HOST"):
+        spool = LogSpool(
+            os.getenv("LOG_SPOOL_PATH", "log_spool.jsonl"),
+            SpoolFsync(os.getenv("LOG_SPOOL_FSYNC", SpoolFsync.INTERVAL)),
+        )
+        return SpoolingDBLogger(DBLogger(), spool)
+    return DBLoggerMock(
+        int(os.getenv("LOG_STORE_MAX_ENTRIES", DBLoggerMock.DEFAULT_MAX_ENTRIES))
+    )
 
+
+db_logger = _create_db_logger()
+# Postgres is shared by several workers, whose entries this process's cache
+# never sees; pages served from it would silently leave them out
+shared_database = isinstance(db_logger, SpoolingDBLogger)
 logger = Logger(
-    TraceIdProvider(lambda: TraceIdHandler.get_current_trace_id()), DBLoggerMock()
+    TraceIdProvider(lambda: TraceIdHandler.get_current_trace_id()),
+    db_logger,
+    json_format=os.getenv("LOG_FORMAT") == "json",
+    recent_cache_size=int(
+        os.getenv(
+            "RECENT_LOG_CACHE_SIZE", 0 if shared_database else Logger.RECENT_CACHE_SIZE
+        )
+    ),
 )
+if shared_database:
+    PostgresLogListener(db_logger.db_logger, logger.broadcaster).start()
+
 certificate_manager = CertificateManagerMock()
-api_server = APIServer(certificate_manager, logger, "0.0.1", 5000)
+api_server = APIServer(
+    certificate_manager,
+    logger,
+    "0.0.1",
+    5000,
+    admin_token=os.getenv("ADMIN_TOKEN"),
+    profiler=RequestProfiler(
+        int(os.getenv("PROFILE_CAPACITY", RequestProfiler.DEFAULT_CAPACITY)),
+        float(os.getenv("PROFILE_SAMPLE_RATE", 0)),
+    ),
+    change_log=CertificateChangeLog(
+        os.getenv("CERT_CHANGE_LOG_PATH", "certificate_changes.jsonl")
+    ),
+)
 app = api_server.App
 
 if __name__ == "__main__":
-    api_server.run()
+    api_server.run(
+        uds=os.getenv("CORE_UDS_PATH"),
+        uds_mode=int(os.getenv("CORE_UDS_MODE", oct(APIServer.UDS_MODE)), 8),
+    )
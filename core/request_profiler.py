@@ -0,0 +1,138 @@
+import cProfile
+import io
+import marshal
+import pstats
+import random
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Iterator, List, Optional, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel
+
+PROFILE_HEADER = "X-Profile"
+
+
+class RequestProfile(BaseModel):
+    trace_id: UUID
+    span_id: str
+    method: str
+    path: str
+    started_at: datetime
+    duration_seconds: float
+    stats: bytes
+
+    def as_text(self, limit: int = 50) -> str:
+        """pstats report of the `limit` functions with the most cumulative time"""
+        output = io.StringIO()
+        stats = pstats.Stats(_LoadedStats(marshal.loads(self.stats)), stream=output)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(limit)
+        return output.getvalue()
+
+
+class _LoadedStats:
+    """What pstats.Stats expects of a profiler, for stats read back from bytes"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class RequestProfiler:
+    """
+    Profiles selected requests with cProfile, keeping the newest `capacity`.
+
+    Profiles are kept by trace and span id: the calls one front page makes to
+    core share a trace, each request is a span of its own.
+
+    cProfile hooks the thread it is enabled on, so only one request is profiled
+    at a time; requests selected meanwhile run unprofiled. The profile covers
+    the event loop thread, so coroutines of other requests interleaving with
+    the profiled one show up in it as separate call trees.
+    """
+
+    DEFAULT_CAPACITY = 20
+
+    def __init__(
+        self,
+        capacity: int = DEFAULT_CAPACITY,
+        sample_rate: float = 0.0,
+        sample: Callable[[], float] = random.random,
+    ):
+        self._capacity = capacity
+        self._sample_rate = sample_rate
+        self._sample = sample
+        self._profiles: OrderedDict[Tuple[UUID, str], RequestProfile] = OrderedDict()
+        self._lock = threading.Lock()
+        self._busy = threading.Lock()
+
+    def should_profile(self, requested: bool) -> bool:
+        return requested or (
+            self._sample_rate > 0 and self._sample() < self._sample_rate
+        )
+
+    @contextmanager
+    def profile(
+        self, trace_id: UUID, span_id: str, method: str, path: str
+    ) -> Iterator[bool]:
+        """Yields whether the block is profiled, False if another profile runs"""
+        if not self._busy.acquire(blocking=False):
+            yield False
+            return
+
+        profiler = cProfile.Profile()
+        started_at = datetime.now()
+        started = time.perf_counter()
+        profiler.enable()
+        try:
+            yield True
+        finally:
+            profiler.disable()
+            duration = time.perf_counter() - started
+            self._busy.release()
+            profiler.create_stats()
+            self._store(
+                RequestProfile(
+                    trace_id=trace_id,
+                    span_id=span_id,
+                    method=method,
+                    path=path,
+                    started_at=started_at,
+                    duration_seconds=duration,
+                    stats=marshal.dumps(profiler.stats),
+                )
+            )
+
+    def get_profiles(self) -> List[RequestProfile]:
+        """Newest first"""
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+    def get_profile(
+        self, trace_id: UUID, span_id: Optional[str] = None
+    ) -> Optional[RequestProfile]:
+        """The profile of one span, or without `span_id` the trace's newest"""
+        with self._lock:
+            if span_id is not None:
+                return self._profiles.get((trace_id, span_id))
+            return next(
+                (
+                    profile
+                    for profile in reversed(self._profiles.values())
+                    if profile.trace_id == trace_id
+                ),
+                None,
+            )
+
+    def _store(self, profile: RequestProfile) -> None:
+        key = (profile.trace_id, profile.span_id)
+        with self._lock:
+            self._profiles.pop(key, None)
+            self._profiles[key] = profile
+            while len(self._profiles) > self._capacity:
+                self._profiles.popitem(last=False)
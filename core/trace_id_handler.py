@@ -1,20 +1,19 @@
-import threading
 import uuid
 from contextlib import asynccontextmanager
+from typing import Optional
 
+from shared import trace_context
+from shared.trace_context import TraceContext
 
-class TraceIdHandler:
-    _thread_local = threading.local()
 
+class TraceIdHandler:
     @staticmethod
     @asynccontextmanager
-    async def logging_scope():
-        TraceIdHandler._thread_local.trace_id = uuid.uuid4()
-        try:
-            yield
-        finally:
-            del TraceIdHandler._thread_local.trace_id
+    async def logging_scope(traceparent: Optional[str] = None):
+        """Joins the caller's trace from a W3C traceparent header, if valid"""
+        with trace_context.trace_scope(TraceContext.parse(traceparent)) as context:
+            yield context
 
     @staticmethod
     def get_current_trace_id() -> uuid.UUID | None:
-        return getattr(TraceIdHandler._thread_local, "trace_id", None)
+        return trace_context.get_current_trace_id()
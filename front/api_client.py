@@ -1,27 +1,174 @@
-from typing import List, Optional
+import asyncio
+import random
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
 
 import httpx
 
 from shared.api_models import (
     CertificateDTO,
     LogEntryDTO,
+    LogEntrySummaryDTO,
+    LogStatsDTO,
     CertificateGenerateRequest,
     CertificateGenerateResult,
     CertificateRenewResult,
     CertificateRevokeResult,
 )
+from shared import metrics, trace_context, tracing
+from shared.trace_context import TRACEPARENT_HEADER
+
+_RETRIES = metrics.counter(
+    "api_client_retries_total", "Core API reads retried by the front", ("path",)
+)
+
+
+async def _propagate_trace(request: httpx.Request) -> None:
+    # core logs the call under the trace (and span) of the caller
+    context = trace_context.get_current()
+    if context:
+        request.headers[TRACEPARENT_HEADER] = context.to_traceparent()
+
+
+class _CachedResponse(NamedTuple):
+    etag: str
+    body: Any  # decoded JSON
+
+
+class ResponseCache:
+    """
+    Bodies of GET responses with an ETag, revalidated with If-None-Match
+    before use. Least recently used entries go first once `max_entries` is hit.
+    Can be shared by several APIClient instances.
+    """
+
+    MAX_ENTRIES = 256
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._responses: OrderedDict[Tuple, _CachedResponse] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple) -> Optional[_CachedResponse]:
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached:
+                self._responses.move_to_end(key)
+            return cached
+
+    def put(self, key: Tuple, cached: _CachedResponse) -> None:
+        with self._lock:
+            self._responses[key] = cached
+            self._responses.move_to_end(key)
+            while len(self._responses) > self._max_entries:
+                self._responses.popitem(last=False)
 
 
 class APIClient:
-    def __init__(self, base_url: str):
+    """
+    Client of the core API, meant to live as long as the app so requests reuse
+    pooled keep-alive connections.
+
+    Reads are retried with jittered exponential backoff on transport errors and
+    gateway responses; certificate commands are never retried, since a lost
+    response does not mean the command did not run. Commands run the step CLI
+    on core, so they get `command_timeout` instead of the shorter `timeout`.
+    HTTP/2 needs the h2 package (httpx[http2]) and a core behind a proxy that
+    speaks it, uvicorn only serves HTTP/1.1. With `uds` set, requests go to the
+    core's Unix domain socket instead of the host of `base_url`. `on_change`
+    is called after each certificate command core accepted, to drop whatever
+    the front cached from earlier responses.
+    """
+
+    LIMITS = httpx.Limits(
+        max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0
+    )
+    TIMEOUT = httpx.Timeout(10.0, connect=2.0)
+    COMMAND_TIMEOUT = httpx.Timeout(60.0, connect=2.0)
+    RETRIES = 2
+    RETRY_BACKOFF_SECONDS = 0.1
+    RETRY_STATUS_CODES = frozenset({502, 503, 504})
+
+    def __init__(
+        self,
+        base_url: str,
+        cache: Optional[ResponseCache] = None,
+        limits: httpx.Limits = LIMITS,
+        http2: bool = False,
+        timeout: httpx.Timeout = TIMEOUT,
+        command_timeout: httpx.Timeout = COMMAND_TIMEOUT,
+        retries: int = RETRIES,
+        retry_backoff: float = RETRY_BACKOFF_SECONDS,
+        uds: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        on_change: Optional[Callable[[], None]] = None,
+    ):
         self.base_url = base_url
-        self.client = httpx.AsyncClient(base_url=base_url)
+        self.cache = cache or ResponseCache()
+        self._command_timeout = command_timeout
+        self._retries = retries
+        self._on_change = on_change
+        self._retry_backoff = retry_backoff
+        if uds and not transport:
+            # the client ignores its limits and http2 when given a transport
+            transport = httpx.AsyncHTTPTransport(uds=uds, limits=limits, http2=http2)
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            limits=limits,
+            http2=http2,
+            timeout=timeout,
+            transport=transport,
+            event_hooks={"request": [_propagate_trace]},
+        )
+
+    async def _read(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        """Request that changes nothing on core, so it is safe to retry"""
+        for attempt in range(self._retries + 1):
+            last = attempt == self._retries
+            try:
+                response = await self.client.request(method, path, **kwargs)
+                if last or response.status_code not in self.RETRY_STATUS_CODES:
+                    return response
+            except httpx.PoolTimeout:
+                raise  # the pool is saturated, retrying would only add to it
+            except httpx.TransportError:
+                if last:
+                    raise
+            _RETRIES.inc(path)
+            delay = self._retry_backoff * 2**attempt
+            await asyncio.sleep(random.uniform(delay / 2, delay))
+
+    async def _get_json(self, path: str, params: Dict[str, Any]) -> Any:
+        """GET through the cache, an unchanged resource costs only a 304"""
+        key = (path, tuple(sorted(params.items())))
+        cached = self.cache.get(key)
+        response = await self._read(
+            "GET",
+            path,
+            params=params,
+            headers={"If-None-Match": cached.etag} if cached else None,
+        )
+        if response.status_code == 304 and cached:
+            return cached.body
 
-    async def list_certificates(self) -> List[CertificateDTO]:
-        response = await self.client.get("/certificates", params={"preview": False})
         response.raise_for_status()
-        return [CertificateDTO(**cert) for cert in response.json()]
+        body = response.json()
+        if "ETag" in response.headers:
+            self.cache.put(key, _CachedResponse(response.headers["ETag"], body))
+        return body
 
+    def _changed(self) -> None:
+        if self._on_change:
+            self._on_change()
+
+    @tracing.traced("api_client.list_certificates")
+    async def list_certificates(self) -> List[CertificateDTO]:
+        certificates = await self._get_json("/certificates", {"preview": False})
+        return [CertificateDTO(**cert) for cert in certificates]
+
+    @tracing.traced("api_client.generate_certificate")
     async def generate_certificate(
         self, request: CertificateGenerateRequest
     ) -> CertificateGenerateResult:
@@ -31,27 +178,37 @@ class APIClient:
             params={
                 "preview": False,
             },
+            timeout=self._command_timeout,
         )
         response.raise_for_status()
+        self._changed()
         return CertificateGenerateResult(**response.json())
 
+    @tracing.traced("api_client.renew_certificate")
     async def renew_certificate(
         self, cert_id: str, duration: int
     ) -> CertificateRenewResult:
         response = await self.client.post(
             "/certificates/renew",
             params={"certId": cert_id, "duration": duration, "preview": False},
+            timeout=self._command_timeout,
         )
         response.raise_for_status()
+        self._changed()
         return CertificateRenewResult(**response.json())
 
+    @tracing.traced("api_client.revoke_certificate")
     async def revoke_certificate(self, cert_id: str) -> CertificateRevokeResult:
         response = await self.client.post(
-            "/certificates/revoke", params={"certId": cert_id, "preview": False}
+            "/certificates/revoke",
+            params={"certId": cert_id, "preview": False},
+            timeout=self._command_timeout,
         )
         response.raise_for_status()
+        self._changed()
         return CertificateRevokeResult(**response.json())
 
+    @tracing.traced("api_client.get_logs")
     async def get_logs(
         self,
         trace_id: Optional[str] = None,
@@ -59,17 +216,40 @@ class APIClient:
         severity: List[str] = None,
         page: int = 1,
         page_size: int = 50,
-    ) -> List[LogEntryDTO]:
+        date_from: Optional[datetime] = None,
+        date_to: Optional[datetime] = None,
+        before: Optional[datetime] = None,
+        before_id: Optional[int] = None,
+    ) -> List[LogEntrySummaryDTO]:
         params = {
             "traceId": trace_id,
             "commandsOnly": commands_only,
             "severity": severity or ["DEBUG", "INFO", "WARN", "ERROR"],
             "page": page,
             "pageSize": page_size,
+            "dateFrom": date_from.isoformat() if date_from else None,
+            "dateTo": date_to.isoformat() if date_to else None,
+            "before": before.isoformat() if before else None,
+            "beforeId": before_id,
         }
-        response = await self.client.post("/logs", json=params)
+        response = await self._read("POST", "/logs", json=params)
         response.raise_for_status()
-        return [LogEntryDTO(**log) for log in response.json()]
+        return [LogEntrySummaryDTO(**log) for log in response.json()]
+
+    @tracing.traced("api_client.get_log_stats")
+    async def get_log_stats(
+        self, date_from: Optional[datetime] = None, bucket: str = "hour"
+    ) -> LogStatsDTO:
+        params = {"bucket": bucket}
+        if date_from:
+            params["dateFrom"] = date_from.isoformat()
+        response = await self._read("GET", "/logs/stats", params=params)
+        response.raise_for_status()
+        return LogStatsDTO(**response.json())
+
+    @tracing.traced("api_client.get_log_entry")
+    async def get_log_entry(self, log_id: int) -> LogEntryDTO:
+        return LogEntryDTO(**await self._get_json("/logs/single", {"logId": log_id}))
 
     async def close(self):
         await self.client.aclose()
@@ -1,26 +1,118 @@
-from datetime import date
-from typing import List, Optional, Literal, Union
+import os
+from contextlib import asynccontextmanager
+from datetime import date, datetime, time, timedelta
+from typing import List, Optional, Literal, Tuple, Union
+from urllib.parse import urlencode
 
+import httpx
 from fastapi import FastAPI, Request, Query, Depends
-from fastapi.responses import HTMLResponse
-from fastapi.staticfiles import StaticFiles
+from fastapi.responses import HTMLResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
 from pydantic import BaseModel
 
-from front.api_client import APIClient
+from front.api_client import APIClient, ResponseCache
+from front.page_cache import PageCache, Uncached
+from front.page_composer import PageComposer
+from front.static_assets import StaticAssets
+from shared import metrics, trace_context, tracing
+from shared.api_models import CertificateDTO, LogEntrySummaryDTO
+from shared.models import LogSeverity
+from shared.trace_context import TRACEPARENT_HEADER, TraceContext
 
-API_BASE_URL = "http://localhost:5000"
-app = FastAPI()
-app.mount("/static", StaticFiles(directory="static"), name="static")
-templates = Jinja2Templates(directory="templates")
+API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:5000")
+FRONT_DIR = os.path.dirname(os.path.abspath(__file__))
 
 
-async def get_api_client():
-    client = APIClient(API_BASE_URL)
+def _create_api_client(page_cache: PageCache) -> APIClient:
+    return APIClient(
+        API_BASE_URL,
+        ResponseCache(),
+        limits=httpx.Limits(
+            max_connections=int(
+                os.getenv("CORE_MAX_CONNECTIONS", APIClient.LIMITS.max_connections)
+            ),
+            max_keepalive_connections=int(
+                os.getenv(
+                    "CORE_MAX_KEEPALIVE", APIClient.LIMITS.max_keepalive_connections
+                )
+            ),
+            keepalive_expiry=float(
+                os.getenv("CORE_KEEPALIVE_EXPIRY", APIClient.LIMITS.keepalive_expiry)
+            ),
+        ),
+        http2=os.getenv("CORE_HTTP2") == "true",
+        timeout=httpx.Timeout(
+            float(os.getenv("CORE_TIMEOUT", APIClient.TIMEOUT.read)),
+            connect=float(os.getenv("CORE_CONNECT_TIMEOUT", APIClient.TIMEOUT.connect)),
+        ),
+        retries=int(os.getenv("CORE_RETRIES", APIClient.RETRIES)),
+        uds=os.getenv("CORE_UDS_PATH"),
+        on_change=page_cache.invalidate,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # compiled, or loaded from the bytecode cache, before the first request
+    for name in templates.env.list_templates():
+        templates.env.get_template(name)
+    app.state.page_cache = PageCache(
+        float(os.getenv("PAGE_CACHE_FRESH_SECONDS", PageCache.FRESH_SECONDS)),
+        float(os.getenv("PAGE_CACHE_STALE_SECONDS", PageCache.STALE_SECONDS)),
+    )
+    # one client for the whole app, so page requests reuse pooled connections
+    app.state.api_client = _create_api_client(app.state.page_cache)
     try:
-        yield client
+        yield
     finally:
-        await client.close()
+        await app.state.api_client.close()
+
+
+app = FastAPI(lifespan=lifespan)
+if os.getenv("TRACE_EXPORT_PATH"):
+    tracing.configure(os.getenv("TRACE_EXPORT_PATH"), "step-ca-webui-front")
+static_assets = StaticAssets(os.path.join(FRONT_DIR, "static"))
+app.mount("/static", static_assets, name="static")
+templates = Jinja2Templates(
+    env=Environment(
+        loader=FileSystemLoader(os.path.join(FRONT_DIR, "templates")),
+        autoescape=True,
+        # shared by workers and kept across restarts, so only the first compiles
+        bytecode_cache=FileSystemBytecodeCache(os.getenv("TEMPLATE_CACHE_DIR")),
+    )
+)
+templates.env.globals["static_url"] = static_assets.url
+page_composer = PageComposer(
+    float(os.getenv("PAGE_DEADLINE_SECONDS", PageComposer.DEADLINE_SECONDS))
+)
+
+
+@app.middleware("http")
+async def trace_scope(request: Request, call_next):
+    parent = TraceContext.parse(request.headers.get(TRACEPARENT_HEADER))
+    with trace_context.trace_scope(parent) as context, tracing.span(
+        f"{request.method} {request.url.path}",
+        {"http.request.method": request.method},
+        scope=context,
+    ) as span:
+        response = await metrics.measure_request(request, call_next)
+        span.set_attribute("http.response.status_code", response.status_code)
+    response.headers[TRACEPARENT_HEADER] = context.to_traceparent()
+    return response
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    return PlainTextResponse(metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+
+def get_api_client(request: Request) -> APIClient:
+    return request.app.state.api_client
+
+
+def get_page_cache(request: Request) -> PageCache:
+    return request.app.state.page_cache
 
 
 class LogFilterTemplateData(BaseModel):
@@ -43,61 +135,178 @@ class LogTemplateData(BaseModel):
     timestamp: str
     severity: str
     trace_id: str
+    message: str
+
+
+class ActivityTemplateData(BaseModel):
+    total: int
+    errors: int
+
+
+LOGS_PAGE_SIZE = 50
+RECENT_LOGS = 10
+EXPIRING_SOON = timedelta(days=7)
+
+
+def _to_log_template_data(log: LogEntrySummaryDTO) -> LogTemplateData:
+    return LogTemplateData(
+        entry_id=str(log.entryId),
+        timestamp=log.timestamp.isoformat(),
+        severity=log.severity.name,
+        trace_id=str(log.traceId),
+        message=log.message,
+    )
+
+
+def _expires_soon(cert: CertificateDTO) -> bool:
+    now = datetime.now(cert.expirationDate.tzinfo)
+    return now <= cert.expirationDate < now + EXPIRING_SOON
 
 
 @app.get("/", response_class=HTMLResponse)
 async def read_dashboard(
-    request: Request, api_client: APIClient = Depends(get_api_client)
+    request: Request,
+    api_client: APIClient = Depends(get_api_client),
+    page_cache: PageCache = Depends(get_page_cache),
 ):
-    certificates = [
-        CertificateTemplateData(
-            id=cert.id,
-            name=cert.name,
-            status=cert.status,
-            actions=["renew", "revoke", "download"],
+    async def render() -> Union[str, Uncached]:
+        page = await page_composer.compose(
+            "dashboard",
+            {
+                "certificates": api_client.list_certificates,
+                "recent_logs": lambda: api_client.get_logs(page_size=RECENT_LOGS),
+                "activity": lambda: api_client.get_log_stats(
+                    date_from=datetime.now() - timedelta(days=1)
+                ),
+            },
         )
-        for cert in (await api_client.list_certificates())
-    ]
+        certificates = page.data["certificates"]
+        recent_logs = page.data["recent_logs"]
+        activity = page.data["activity"]
 
-    return templates.TemplateResponse(
-        "dashboard.html.j2", {"request": request, "certificates": certificates}
-    )
+        # shared by every user, so nothing from `request` goes into the page
+        html = templates.get_template("dashboard.html.j2").render(
+            failed=page.failed,
+            certificates=[
+                CertificateTemplateData(
+                    id=cert.id,
+                    name=cert.name,
+                    status=cert.status,
+                    actions=["renew", "revoke", "download"],
+                )
+                for cert in certificates or []
+            ],
+            expiring_soon=sum(map(_expires_soon, certificates or [])),
+            recent_logs=[_to_log_template_data(log) for log in recent_logs or []],
+            activity=(
+                ActivityTemplateData(
+                    total=activity.total,
+                    errors=activity.bySeverity.get(LogSeverity.ERROR, 0),
+                )
+                if activity
+                else None
+            ),
+        )
+        # a page missing core data would outlive core's recovery by the TTL
+        return Uncached(html) if page.failed else html
 
+    return HTMLResponse(await page_cache.get(request.url.path, render))
 
-@app.get("/logs", response_class=HTMLResponse)
-async def read_logs(
-    request: Request,
+
+def get_log_filters(
     commands_only: bool = Query(False),
     date_from: Union[date, Literal[""], None] = Query(None),
     date_to: Union[date, Literal[""], None] = Query(None),
     keywords: Optional[str] = Query(None),
     severity: List[str] = Query(["INFO", "WARN", "DEBUG", "ERROR"]),
-    api_client: APIClient = Depends(get_api_client),
-):
-    filter_data = LogFilterTemplateData(
+) -> LogFilterTemplateData:
+    return LogFilterTemplateData(
         commands_only=commands_only,
         date_from=date_from if date_from != "" else None,
         date_to=date_to if date_to != "" else None,
         keywords=keywords,
         severity=severity,
     )
-    logs = [
-        LogTemplateData(
-            entry_id=str(log.entryId),
-            timestamp=log.timestamptz.isoformat(),
-            severity=log.severity.name,
-            trace_id=str(log.traceId),
-        )
-        for log in (
-            await api_client.get_logs(
-                commands_only=filter_data.commands_only, severity=filter_data.severity
-            )
-        )
-    ]
+
+
+async def _read_log_rows(
+    api_client: APIClient,
+    filter_data: LogFilterTemplateData,
+    before: Optional[datetime],
+    before_id: Optional[int],
+) -> Tuple[List[LogTemplateData], Optional[str]]:
+    """
+    One page of log rows, and the URL of the rows after it if there may be any.
+
+    Pages after the first continue after the last entry of the previous one,
+    keyed by its timestamp and id, so entries logged while the user scrolls do
+    not shift the pages and repeat rows, and core never skips an offset.
+    """
+    logs = await api_client.get_logs(
+        commands_only=filter_data.commands_only,
+        severity=filter_data.severity,
+        page_size=LOGS_PAGE_SIZE,
+        date_from=(
+            datetime.combine(filter_data.date_from, time.min)
+            if filter_data.date_from
+            else None
+        ),
+        # the form's "to" date is inclusive, core's bound is not
+        date_to=(
+            datetime.combine(filter_data.date_to + timedelta(days=1), time.min)
+            if filter_data.date_to
+            else None
+        ),
+        before=before,
+        before_id=before_id,
+    )
+    rows = [_to_log_template_data(log) for log in logs]
+
+    if len(logs) < LOGS_PAGE_SIZE:
+        return rows, None
+    query = {
+        **filter_data.model_dump(exclude_none=True),
+        "commands_only": int(filter_data.commands_only),
+        "before": logs[-1].timestamp.isoformat(),
+        "before_id": logs[-1].entryId,
+    }
+    return rows, app.url_path_for("read_log_rows") + "?" + urlencode(query, True)
+
+
+@app.get("/logs", response_class=HTMLResponse)
+async def read_logs(
+    request: Request,
+    filter_data: LogFilterTemplateData = Depends(get_log_filters),
+    api_client: APIClient = Depends(get_api_client),
+):
+    logs, next_page = await _read_log_rows(api_client, filter_data, None, None)
 
     return templates.TemplateResponse(
         "logs.html.j2",
-        {"request": request, "logs": logs, "filter_data": filter_data},
+        {
+            "request": request,
+            "logs": logs,
+            "filter_data": filter_data,
+            "next_page": next_page,
+        },
+    )
+
+
+@app.get("/logs/rows", response_class=HTMLResponse)
+async def read_log_rows(
+    request: Request,
+    before: datetime = Query(..., description="Timestamp of the last row shown"),
+    before_id: int = Query(..., description="Entry id of the last row shown"),
+    filter_data: LogFilterTemplateData = Depends(get_log_filters),
+    api_client: APIClient = Depends(get_api_client),
+):
+    """Table rows of a later page, for "Load More" to append to the logs page"""
+    logs, next_page = await _read_log_rows(api_client, filter_data, before, before_id)
+
+    return templates.TemplateResponse(
+        "log_rows.html.j2",
+        {"request": request, "logs": logs},
+        headers={"X-Next-Page": next_page} if next_page else None,
     )
 
 
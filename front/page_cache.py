@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, NamedTuple
+
+from shared import metrics
+
+_REQUESTS = metrics.counter(
+    "front_page_cache_requests_total",
+    "Page cache lookups, by whether the entry was fresh, stale or missing",
+    ("result",),
+)
+
+
+class _Entry(NamedTuple):
+    value: Any
+    rendered_at: float
+
+
+class Uncached(NamedTuple):
+    """Returned by a render whose value is served once but not kept, e.g. a
+    page degraded by a failed core call"""
+
+    value: Any
+
+
+class PageCache:
+    """
+    Stale-while-revalidate cache of rendered pages, or any other value the
+    front builds from core responses.
+
+    An entry is served as is for `fresh_seconds`. For `stale_seconds` after
+    that it is still served at once, while a background task renders it again;
+    an older or missing entry is rendered before the response. Renders of one
+    key are shared, so a burst of requests makes a single round of core calls,
+    and a failed background render leaves the stale entry in place, as does
+    one that returns its value wrapped in `Uncached`.
+
+    `invalidate` drops every entry and discards renders already running, so a
+    page never shows data from before a mutation the front made. The cache
+    belongs to one event loop and takes no locks.
+    """
+
+    FRESH_SECONDS = 2.0
+    STALE_SECONDS = 30.0
+    MAX_ENTRIES = 128
+
+    def __init__(
+        self,
+        fresh_seconds: float = FRESH_SECONDS,
+        stale_seconds: float = STALE_SECONDS,
+        max_entries: int = MAX_ENTRIES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._fresh_seconds = fresh_seconds
+        self._stale_seconds = stale_seconds
+        self._max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, _Entry] = OrderedDict()
+        self._renders: Dict[Hashable, asyncio.Task] = {}
+        self._generation = 0
+
+    async def get(self, key: Hashable, render: Callable[[], Awaitable[Any]]) -> Any:
+        entry = self._entries.get(key)
+        if entry:
+            self._entries.move_to_end(key)
+            age = self._clock() - entry.rendered_at
+            if age < self._fresh_seconds:
+                _REQUESTS.inc("fresh")
+                return entry.value
+            if age < self._fresh_seconds + self._stale_seconds:
+                _REQUESTS.inc("stale")
+                self._start_render(key, render)
+                return entry.value
+
+        _REQUESTS.inc("miss")
+        # shielded, so a client going away does not cancel a shared render
+        return await asyncio.shield(self._start_render(key, render))
+
+    def invalidate(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._renders.clear()
+
+    def _start_render(
+        self, key: Hashable, render: Callable[[], Awaitable[Any]]
+    ) -> asyncio.Task:
+        task = self._renders.get(key)
+        if task is None:
+            task = asyncio.create_task(self._render(key, render, self._generation))
+            task.add_done_callback(_retrieve_exception)
+            self._renders[key] = task
+        return task
+
+    async def _render(
+        self, key: Hashable, render: Callable[[], Awaitable[Any]], generation: int
+    ) -> Any:
+        try:
+            value = await render()
+        finally:
+            if generation == self._generation:
+                self._renders.pop(key, None)
+
+        if isinstance(value, Uncached):
+            return value.value
+        if generation == self._generation:
+            self._entries[key] = _Entry(value, self._clock())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # a failed background render has no one awaiting it, which asyncio reports
+    if not task.cancelled():
+        task.exception()
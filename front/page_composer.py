@@ -0,0 +1,57 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, NamedTuple
+
+from shared import metrics
+
+_PANEL_FAILURES = metrics.counter(
+    "front_panel_failures_total",
+    "Page panels rendered without their data, by page, panel and reason",
+    ("page", "panel", "reason"),
+)
+
+
+class ComposedPage(NamedTuple):
+    data: Dict[str, Any]  # by panel name, None for the failed ones
+    failed: FrozenSet[str]  # panels that raised or missed the deadline
+
+
+class PageComposer:
+    """
+    Fetches the data of every panel of a page concurrently, so the page takes
+    as long as its slowest core call rather than their sum.
+
+    A page declares its panels as a name and a coroutine function to fetch the
+    panel's data. Panels still fetching at the page deadline are cancelled, and
+    they fail along with the ones that raised; the page then renders without
+    them instead of failing as a whole.
+    """
+
+    DEADLINE_SECONDS = 3.0
+
+    def __init__(self, deadline_seconds: float = DEADLINE_SECONDS):
+        self._deadline_seconds = deadline_seconds
+
+    async def compose(
+        self, page: str, panels: Dict[str, Callable[[], Awaitable[Any]]]
+    ) -> ComposedPage:
+        deadline = asyncio.get_running_loop().time() + self._deadline_seconds
+        results = await asyncio.gather(
+            *(self._fetch(fetch, deadline) for fetch in panels.values()),
+            return_exceptions=True,
+        )
+
+        data, failed = {}, set()
+        for name, result in zip(panels, results):
+            if isinstance(result, Exception):
+                reason = "timeout" if isinstance(result, TimeoutError) else "error"
+                _PANEL_FAILURES.inc(page, name, reason)
+                data[name] = None
+                failed.add(name)
+            else:
+                data[name] = result
+        return ComposedPage(data, frozenset(failed))
+
+    @staticmethod
+    async def _fetch(fetch: Callable[[], Awaitable[Any]], deadline: float) -> Any:
+        async with asyncio.timeout_at(deadline):
+            return await fetch()
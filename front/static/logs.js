@@ -0,0 +1,26 @@
+document.addEventListener('DOMContentLoaded', (_) => {
+    const loadMoreBtn = document.getElementById("load-more");
+    const logRows = document.getElementById("log-rows");
+
+    // the server renders the URL of the next rows, with the filters in it,
+    // and sends the one after that in X-Next-Page
+    loadMoreBtn.onclick = async function() {
+        loadMoreBtn.disabled = true;
+        try {
+            const response = await fetch(loadMoreBtn.dataset.next);
+            if (!response.ok) {
+                throw new Error(`Loading logs failed with ${response.status}`);
+            }
+            logRows.insertAdjacentHTML("beforeend", await response.text());
+
+            const next = response.headers.get("X-Next-Page");
+            if (next) {
+                loadMoreBtn.dataset.next = next;
+            } else {
+                loadMoreBtn.hidden = true;
+            }
+        } finally {
+            loadMoreBtn.disabled = false;
+        }
+    }
+});
@@ -0,0 +1,131 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional, assets are then served with gzip at best
+    brotli = None
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+class _Asset(NamedTuple):
+    media_type: str
+    digest: str
+    # (content coding, body) by preference, identity last
+    encodings: List[Tuple[str, bytes]]
+
+
+def _compressors() -> List[Tuple[str, Callable[[bytes], bytes]]]:
+    compressors = [("gzip", lambda body: gzip.compress(body, 9, mtime=0))]
+    if brotli:
+        compressors.insert(0, ("br", lambda body: brotli.compress(body, quality=11)))
+    return compressors
+
+
+def _accepted_encodings(accept_encoding: Optional[str]) -> List[str]:
+    accepted = []
+    for item in (accept_encoding or "").split(","):
+        coding, _, params = item.partition(";")
+        try:
+            weight = float(params.strip().removeprefix("q=") or 1)
+        except ValueError:
+            weight = 0
+        if coding.strip() and weight > 0:
+            accepted.append(coding.strip().lower())
+    return accepted
+
+
+class StaticAssets:
+    """
+    Serves the files of `directory`, read and compressed once at startup.
+
+    `url(name)` gives a path with a hash of the content in the file name,
+    such as `/static/styles.3f2a9c1e4b7d.css`, served with an immutable cache
+    lifetime: a changed file gets a new name, so browsers never revalidate.
+    Files asked for by their plain name are revalidated on every use through
+    their ETag. Bodies go out compressed with br (if the brotli package is
+    installed) or gzip when the client accepts it and it saves bytes.
+    """
+
+    def __init__(self, directory: str, prefix: str = "/static"):
+        self._prefix = prefix
+        self._assets: Dict[str, _Asset] = {}
+        self._fingerprinted: Dict[str, str] = {}  # plain name -> hashed name
+        for name in sorted(os.listdir(directory)):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path):
+                with open(path, "rb") as file:
+                    self._add(name, file.read())
+
+    def url(self, name: str) -> str:
+        return f"{self._prefix}/{self._fingerprinted[name]}"
+
+    def _add(self, name: str, body: bytes) -> None:
+        digest = hashlib.sha256(body).hexdigest()
+        stem, extension = os.path.splitext(name)
+        fingerprinted = f"{stem}.{digest[:12]}{extension}"
+
+        encodings = []
+        for coding, compress in _compressors():
+            compressed = compress(body)
+            if len(compressed) < len(body):
+                encodings.append((coding, compressed))
+        encodings.append(("identity", body))
+
+        asset = _Asset(
+            mimetypes.guess_type(name)[0] or "application/octet-stream",
+            digest[:32],
+            encodings,
+        )
+        self._assets[name] = self._assets[fingerprinted] = asset
+        self._fingerprinted[name] = fingerprinted
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        response = self._response(scope)
+        await response(scope, receive, send)
+
+    def _response(self, scope: Scope) -> Response:
+        if scope["method"] not in ("GET", "HEAD"):
+            return Response(status_code=405, headers={"Allow": "GET, HEAD"})
+        # mounted apps get the full path, with the mount point in root_path
+        name = scope["path"].removeprefix(scope.get("root_path", "")).lstrip("/")
+        asset = self._assets.get(name)
+        if asset is None:
+            return Response("Not Found", status_code=404, media_type="text/plain")
+
+        headers = Headers(scope=scope)
+        accepted = _accepted_encodings(headers.get("accept-encoding"))
+        coding, body = next(
+            (coding, body)
+            for coding, body in asset.encodings
+            if coding in accepted or coding == "identity"
+        )
+        # each encoding is a different representation, with its own ETag
+        etag = (
+            f'"{asset.digest}"'
+            if coding == "identity"
+            else f'"{asset.digest}-{coding}"'
+        )
+        response_headers = {
+            "Cache-Control": "no-cache" if name in self._fingerprinted else IMMUTABLE,
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+        }
+        if coding != "identity":
+            response_headers["Content-Encoding"] = coding
+
+        if_none_match = headers.get("if-none-match", "")
+        if etag in (tag.strip() for tag in if_none_match.split(",")):
+            return Response(status_code=304, headers=response_headers)
+        if scope["method"] == "HEAD":
+            response_headers["Content-Length"] = str(len(body))
+            return Response(headers=response_headers, media_type=asset.media_type)
+        return Response(body, headers=response_headers, media_type=asset.media_type)
@@ -1,10 +1,17 @@
+import enum
 import uuid
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
-from shared.models import LogSeverity, KeyType
+from shared.models import (
+    CertificateChangeType,
+    KeyType,
+    LogSeverity,
+    SampleRate,
+    StatsBucket,
+)
 
 
 class CertificateDTO(BaseModel):
@@ -14,6 +21,13 @@ class CertificateDTO(BaseModel):
     expirationDate: datetime
 
 
+class CertificateDTOField(enum.StrEnum):
+    ID = "id"
+    NAME = "name"
+    STATUS = "status"
+    EXPIRATION_DATE = "expirationDate"
+
+
 class CertificateGenerateRequest(BaseModel):
     keyName: str = Field(
         ...,
@@ -31,7 +45,11 @@ class CommandPreviewDTO(BaseModel):
 class CertificateGenerateResult(BaseModel):
     success: bool
     message: str
-    logEntryId: int = Field(..., gt=0)
+    logEntryId: Optional[int] = Field(
+        ...,
+        gt=0,
+        description="Null if the log policy dropped the entry or it is still spooled",
+    )
     certificateId: str
     certificateName: str
     expirationDate: datetime
@@ -40,7 +58,11 @@ class CertificateGenerateResult(BaseModel):
 class CertificateRenewResult(BaseModel):
     success: bool
     message: str
-    logEntryId: int = Field(..., gt=0)
+    logEntryId: Optional[int] = Field(
+        ...,
+        gt=0,
+        description="Null if the log policy dropped the entry or it is still spooled",
+    )
     certificateId: str
     newExpirationDate: datetime
 
@@ -48,7 +70,11 @@ class CertificateRenewResult(BaseModel):
 class CertificateRevokeResult(BaseModel):
     success: bool
     message: str
-    logEntryId: int = Field(..., gt=0)
+    logEntryId: Optional[int] = Field(
+        ...,
+        gt=0,
+        description="Null if the log policy dropped the entry or it is still spooled",
+    )
     certificateId: str
     revocationDate: datetime
 
@@ -60,6 +86,14 @@ class CommandInfoDTO(BaseModel):
     action: str
 
 
+class CommandSummaryDTO(BaseModel):
+    command: str
+    exitCode: int
+    action: str
+    outputPreview: str
+    outputSize: int
+
+
 class LogEntryDTO(BaseModel):
     entryId: int = Field(..., gt=0)
     timestamp: datetime
@@ -69,9 +103,128 @@ class LogEntryDTO(BaseModel):
     commandInfo: Optional[CommandInfoDTO]
 
 
+class LogEntrySummaryDTO(BaseModel):
+    entryId: int = Field(..., gt=0)
+    timestamp: datetime
+    severity: LogSeverity
+    message: str
+    traceId: uuid.UUID
+    commandInfo: Optional[CommandSummaryDTO]
+
+
+class LogEntrySummaryDTOField(enum.StrEnum):
+    ENTRY_ID = "entryId"
+    TIMESTAMP = "timestamp"
+    SEVERITY = "severity"
+    MESSAGE = "message"
+    TRACE_ID = "traceId"
+    COMMAND_INFO = "commandInfo"
+
+
 class LogsRequest(BaseModel):
     traceId: Optional[uuid.UUID]
     commandsOnly: bool
     severity: List[LogSeverity]
     page: int = Field(..., gt=0)
     pageSize: int = Field(..., gt=0)
+    dateFrom: Optional[datetime] = Field(None, description="Inclusive")
+    dateTo: Optional[datetime] = Field(None, description="Exclusive")
+    before: Optional[datetime] = Field(
+        None,
+        description="Timestamp of the last entry already read, entries after it "
+        "in newest first order are returned; needs beforeId",
+    )
+    beforeId: Optional[int] = Field(
+        None, description="Entry id of the last entry already read; needs before"
+    )
+    fields: Optional[List[LogEntrySummaryDTOField]] = Field(
+        None, description="Return only these fields, all of them if omitted"
+    )
+
+    @model_validator(mode="after")
+    def _check_keyset(self) -> "LogsRequest":
+        if (self.before is None) != (self.beforeId is None):
+            raise ValueError("before and beforeId are only valid together")
+        return self
+
+
+class LogExportFormat(enum.StrEnum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+class ProfileFormat(enum.StrEnum):
+    PSTATS = "pstats"  # marshalled stats, as written by cProfile's dump_stats
+    TEXT = "text"
+
+
+class TimeBucketCountDTO(BaseModel):
+    bucketStart: datetime
+    count: int
+
+
+class LogStatsDTO(BaseModel):
+    total: int
+    bucket: StatsBucket
+    bySeverity: Dict[LogSeverity, int]
+    byAction: Dict[str, int]
+    byExitCode: Dict[int, int]
+    byTime: List[TimeBucketCountDTO]
+
+
+class LogPolicyDTO(BaseModel):
+    minSeverity: LogSeverity = LogSeverity.DEBUG
+    severitySampleRates: Dict[LogSeverity, SampleRate] = Field(
+        {}, description="Share of entries kept, 1 if a severity is not listed"
+    )
+    actionSampleRates: Dict[str, SampleRate] = Field(
+        {},
+        description="Share of command entries echoed to console and file,"
+        + " they are always stored",
+    )
+    dedupeWindowSeconds: float = Field(
+        0, ge=0, description="Suppress identical messages for this long, 0 disables"
+    )
+
+
+class LogPolicyStatusDTO(BaseModel):
+    policy: LogPolicyDTO
+    sampledOut: Dict[LogSeverity, int]
+    suppressed: Dict[LogSeverity, int]
+
+
+class CacheStatsDTO(BaseModel):
+    hits: int
+    misses: int
+    hitRatio: float
+    size: int
+    capacity: int
+
+
+class RequestProfileDTO(BaseModel):
+    traceId: uuid.UUID
+    spanId: str
+    method: str
+    path: str
+    startedAt: datetime
+    durationSeconds: float
+
+
+class CertificateChangeDTO(BaseModel):
+    version: int
+    changeType: CertificateChangeType
+    certificateId: str
+    timestamp: datetime
+    certificateName: Optional[str] = None
+    expirationDate: Optional[datetime] = None
+    revocationDate: Optional[datetime] = None
+
+
+class CertificateChangesDTO(BaseModel):
+    version: str = Field(..., description="Pass as `since` in the next request")
+    resyncRequired: bool = Field(
+        ...,
+        description="`since` is too old or unknown: reload GET /certificates,"
+        + " then follow changes from `version`",
+    )
+    changes: List[CertificateChangeDTO]
@@ -1,7 +1,22 @@
 import shlex
 import subprocess
+import time
 from typing import Tuple
 
+from shared import metrics, tracing
+
+_COMMAND_DURATION = metrics.histogram(
+    "cli_command_duration_seconds",
+    "Run time of step-cli commands, by CommandInfo action",
+    ("action",),
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0),
+)
+_COMMAND_EXITS = metrics.counter(
+    "cli_command_exits_total",
+    "Finished step-cli commands, by CommandInfo action and exit code",
+    ("action", "exit_code"),
+)
+
 
 class CLIWrapper:
     @staticmethod
@@ -9,11 +24,19 @@ class CLIWrapper:
         return shlex.quote(input_str)
 
     @staticmethod
-    def execute_command(command: str) -> Tuple[str, int]:
-        try:
-            result = subprocess.run(
-                command, shell=True, check=True, text=True, capture_output=True
-            )
-            return result.stdout, result.returncode
-        except subprocess.CalledProcessError as e:
-            return e.stdout, e.returncode
+    def execute_command(command: str, action: str = "") -> Tuple[str, int]:
+        with tracing.span(
+            "cli.execute_command", {"process.executable.name": command.split(" ")[0]}
+        ) as span:
+            started = time.perf_counter()
+            try:
+                result = subprocess.run(
+                    command, shell=True, check=True, text=True, capture_output=True
+                )
+                output, exit_code = result.stdout, result.returncode
+            except subprocess.CalledProcessError as e:
+                output, exit_code = e.stdout, e.returncode
+            _COMMAND_DURATION.observe(time.perf_counter() - started, action)
+            _COMMAND_EXITS.inc(action, str(exit_code))
+            span.set_attribute("process.exit_code", exit_code)
+            return output, exit_code
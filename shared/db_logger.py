@@ -1,26 +1,119 @@
 import os
-from typing import List, Optional
+import time
+import weakref
+import zlib
+from datetime import datetime
+from typing import (
+    AbstractSet,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    TypeVar,
+    Union,
+)
+from uuid import UUID
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from sqlalchemy import (
     create_engine,
+    insert,
+    update,
+    select,
+    Engine,
     Column,
     Integer,
     String,
     DateTime,
     Enum,
+    ForeignKey,
+    Index,
     JSON,
+    LargeBinary,
     Sequence,
+    Text,
+    and_,
+    cast,
+    event,
+    or_,
 )
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy.sql import func
+from sqlalchemy.orm import Query, Session, sessionmaker
+from sqlalchemy.schema import CreateIndex
+from sqlalchemy.sql import Select, func
+from sqlalchemy.sql.elements import ColumnElement
 
+from shared import metrics, tracing
 from shared.db_logger_interface import IDBLogger
-from shared.models import LogEntry, LogsFilter, Paging, LogSeverity, CommandInfo
+from shared.models import (
+    LogEntry,
+    LogEntryField,
+    LogEntrySummary,
+    LogsFilter,
+    LogStats,
+    Paging,
+    LogSeverity,
+    CommandInfo,
+    CommandSummary,
+    StatsBucket,
+    TimeBucketCount,
+)
 
 _Base = declarative_base()
 
+LOG_NOTIFY_CHANNEL = "log_entries"
+_NOTIFY_IDS_PER_MESSAGE = 500  # keeps payloads under the 8000 byte limit
+
+_engines: "weakref.WeakSet[Engine]" = weakref.WeakSet()
+
+
+def _pool_connections() -> Dict[metrics.Labels, float]:
+    counts = {("checked_out",): 0.0, ("idle",): 0.0, ("overflow",): 0.0}
+    for engine in list(_engines):
+        pool = engine.pool
+        if hasattr(pool, "checkedout"):  # QueuePool, the default outside SQLite
+            counts[("checked_out",)] += pool.checkedout()
+            counts[("idle",)] += pool.checkedin()
+            counts[("overflow",)] += max(pool.overflow(), 0)
+    return counts
+
+
+_STATEMENT_DURATION = metrics.histogram(
+    "db_statement_duration_seconds",
+    "Time to execute a database statement, by statement type",
+    ("statement",),
+)
+_POOL_CHECKOUTS = metrics.counter(
+    "db_pool_checkouts_total", "Connections checked out of the SQLAlchemy pool"
+)
+_POOL_CONNECTIONS = metrics.gauge(
+    "db_pool_connections",
+    "SQLAlchemy pool connections by state, overflow counts those above pool_size",
+    ("state",),
+    callback=_pool_connections,
+)
+
+
+def _instrument(engine: Engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, many):
+        context.metrics_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, many):
+        _STATEMENT_DURATION.observe(
+            time.perf_counter() - context.metrics_started,
+            statement.split(None, 1)[0].lower(),
+        )
+
+    @event.listens_for(engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        _POOL_CHECKOUTS.inc()
+
+    _engines.add(engine)
+
 
 class LogEntryModel(_Base):
     __tablename__ = "log_entries"
@@ -30,7 +123,139 @@ class LogEntryModel(_Base):
     severity = Column(Enum(LogSeverity))
     message = Column(String)
     trace_id = Column(String)
-    command_info = Column(JSON)
+    # CommandSummary, full output is in command_outputs; rows written before
+    # the split hold the whole CommandInfo, output included
+    command_info = Column(JSON(none_as_null=True))
+
+
+_ACTION = LogEntryModel.command_info["action"].as_string()
+_EXIT_CODE = LogEntryModel.command_info["exit_code"].as_integer()
+
+Index("ix_log_entries_timestamp", LogEntryModel.timestamp)
+Index(
+    "ix_log_entries_severity_timestamp", LogEntryModel.severity, LogEntryModel.timestamp
+)
+Index("ix_log_entries_trace_id", LogEntryModel.trace_id)
+Index("ix_log_entries_action", _ACTION)
+
+
+class CommandOutputModel(_Base):
+    __tablename__ = "command_outputs"
+
+    log_entry_id = Column(
+        Integer, ForeignKey("log_entries.id", ondelete="CASCADE"), primary_key=True
+    )
+    output = Column(LargeBinary)  # zlib-compressed utf-8
+
+
+_LOG_ENTRY_COLUMNS = {
+    LogEntryField.ENTRY_ID: LogEntryModel.id,
+    LogEntryField.TIMESTAMP: LogEntryModel.timestamp,
+    LogEntryField.SEVERITY: LogEntryModel.severity,
+    LogEntryField.TRACE_ID: LogEntryModel.trace_id,
+    LogEntryField.MESSAGE: LogEntryModel.message,
+    # as JSON text, which pydantic parses and validates in one step
+    LogEntryField.COMMAND_INFO: cast(LogEntryModel.command_info, Text),
+}
+
+# each shape lacks a required field of the other, so exactly one validates
+_STORED_COMMAND_INFO = TypeAdapter(Union[CommandSummary, CommandInfo])
+
+
+def _command_summary(stored: Union[CommandSummary, CommandInfo]) -> CommandSummary:
+    if isinstance(stored, CommandInfo):
+        return CommandSummary.of(stored)
+    return stored
+
+
+_COMMAND_SUMMARY_CONVERTER = {
+    # rows from before none_as_null hold the JSON text null for no command
+    LogEntryField.COMMAND_INFO: lambda value: (
+        _command_summary(_STORED_COMMAND_INFO.validate_json(value))
+        if value and value != "null"
+        else None
+    ),
+}
+
+# model_construct() skips validation, so partial rows are converted by hand
+_LOG_ENTRY_CONVERTERS = {LogEntryField.TRACE_ID: UUID, **_COMMAND_SUMMARY_CONVERTER}
+
+_LOG_SUMMARIES = TypeAdapter(List[LogEntrySummary])
+
+
+def _row_dicts(
+    rows: List[Row],
+    fields: List[LogEntryField],
+    converters: Dict[LogEntryField, Callable],
+) -> List[dict]:
+    keys = [field.value for field in fields]
+    conversions = [
+        (field.value, converters[field]) for field in fields if field in converters
+    ]
+    dicts = [dict(zip(keys, row)) for row in rows]
+    for row in dicts:
+        for key, convert in conversions:
+            row[key] = convert(row[key])
+    return dicts
+
+
+def _command_info(stored: dict, output: Optional[bytes]) -> CommandInfo:
+    command_summary = _STORED_COMMAND_INFO.validate_python(stored)
+    if isinstance(command_summary, CommandInfo):
+        return command_summary  # output inline, nothing in command_outputs
+    return CommandInfo(
+        command=command_summary.command,
+        output=(
+            zlib.decompress(output).decode("utf-8")
+            if output is not None
+            else command_summary.output_preview
+        ),
+        exit_code=command_summary.exit_code,
+        action=command_summary.action,
+    )
+
+
+_Statement = TypeVar("_Statement", Query, Select)
+
+
+def _apply_filters(query: _Statement, filters: LogsFilter) -> _Statement:
+    if filters.trace_id:
+        query = query.filter(LogEntryModel.trace_id == str(filters.trace_id))
+
+    if filters.commands_only:
+        query = query.filter(LogEntryModel.command_info.isnot(None))
+
+    if filters.date_from:
+        query = query.filter(LogEntryModel.timestamp >= filters.date_from)
+
+    if filters.date_to:
+        query = query.filter(LogEntryModel.timestamp < filters.date_to)
+
+    if filters.before:
+        query = query.filter(
+            or_(
+                LogEntryModel.timestamp < filters.before,
+                and_(
+                    LogEntryModel.timestamp == filters.before,
+                    LogEntryModel.id < filters.before_id,
+                ),
+            )
+        )
+
+    return query.filter(LogEntryModel.severity.in_([s.value for s in filters.severity]))
+
+
+def _time_bucket(bucket: StatsBucket, dialect: str) -> ColumnElement:
+    if dialect == "postgresql":
+        return func.date_trunc(bucket.value, LogEntryModel.timestamp)
+
+    # SQLite has no date_trunc, it groups by a truncated ISO string instead
+    formats = {
+        StatsBucket.MINUTE: "%Y-%m-%d %H:%M:00",
+        StatsBucket.HOUR: "%Y-%m-%d %H:00:00",
+        StatsBucket.DAY: "%Y-%m-%d 00:00:00",
+    }
+    return func.strftime(formats[bucket], LogEntryModel.timestamp)
 
 
 class DbConnectionModel(BaseModel):
@@ -55,6 +280,8 @@ class DBLogger(IDBLogger):
     Make sure to set these variables in your .env file or environment.
     """
 
+    EXPORT_BATCH_SIZE = 1000
+
     def __init__(self, is_test: bool = False):
         if is_test:
             return
@@ -72,84 +299,237 @@ class DBLogger(IDBLogger):
             + f"{connection.DB_USER}:{connection.DB_PASSWORD}"
             + f"@{connection.DB_HOST}:{connection.DB_PORT}/{connection.DB_NAME}"
         )
-        self.engine = create_engine(url)
+        self._connect(create_engine(url))
+
+    def _connect(self, engine: Engine) -> None:
+        self.engine = engine
+        _instrument(engine)
         self.Session = sessionmaker(bind=self.engine)
         _Base.metadata.create_all(self.engine)
+        # create_all skips tables that exist, so indexes added later get theirs
+        # here; IF NOT EXISTS as SQLite cannot reflect expression indexes
+        with self.engine.begin() as connection:
+            for index in LogEntryModel.__table__.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+            # the old column stored JSON null for no command, which commands_only
+            # and the action stats would count; a no-op once rows are converted
+            connection.execute(
+                update(LogEntryModel)
+                .where(cast(LogEntryModel.command_info, Text) == "null")
+                .values(command_info=None)
+            )
 
+    @staticmethod
+    def _insert_entries(session: Session, log_entries: List[LogEntry]) -> None:
+        # executemany with one compiled statement per table, however many entries
+        session.execute(
+            insert(LogEntryModel),
+            [
+                {
+                    "id": log_entry.entry_id,
+                    "timestamp": log_entry.timestamp,
+                    "severity": log_entry.severity,
+                    "message": log_entry.message,
+                    "trace_id": str(log_entry.trace_id),
+                    "command_info": (
+                        CommandSummary.of(log_entry.command_info).model_dump()
+                        if log_entry.command_info
+                        else None
+                    ),
+                }
+                for log_entry in log_entries
+            ],
+        )
+
+        outputs = [
+            {
+                "log_entry_id": log_entry.entry_id,
+                "output": zlib.compress(log_entry.command_info.output.encode("utf-8")),
+            }
+            for log_entry in log_entries
+            if log_entry.command_info
+        ]
+        if outputs:
+            session.execute(insert(CommandOutputModel), outputs)
+
+        if session.get_bind().dialect.name == "postgresql":
+            # delivered on commit, see PostgresLogListener
+            ids = [str(log_entry.entry_id) for log_entry in log_entries]
+            for start in range(0, len(ids), _NOTIFY_IDS_PER_MESSAGE):
+                payload = ",".join(ids[start : start + _NOTIFY_IDS_PER_MESSAGE])
+                session.execute(select(func.pg_notify(LOG_NOTIFY_CHANNEL, payload)))
+
+    @tracing.traced("db_logger.insert_log")
     def insert_log(self, log_entry: LogEntry) -> None:
         with self.Session() as session:
-            db_log_entry = LogEntryModel(
-                timestamp=log_entry.timestamp,
-                severity=log_entry.severity,
-                message=log_entry.message,
-                trace_id=str(log_entry.trace_id),
-                command_info=(
-                    log_entry.command_info.model_dump()
-                    if log_entry.command_info
-                    else None
-                ),
-            )
-            session.add(db_log_entry)
+            self._insert_entries(session, [log_entry])
             session.commit()
 
-    def get_logs(self, filters: LogsFilter, paging: Paging) -> List[LogEntry]:
+    @tracing.traced("db_logger.insert_logs")
+    def insert_logs(self, log_entries: List[LogEntry]) -> int:
+        """Bulk insert that skips entry ids already stored, returns how many were new"""
+        unique = {log_entry.entry_id: log_entry for log_entry in log_entries}
         with self.Session() as session:
-            query = session.query(LogEntryModel)
+            stored = session.scalars(
+                select(LogEntryModel.id).where(LogEntryModel.id.in_(unique))
+            )
+            for entry_id in stored:
+                del unique[entry_id]
 
-            if filters.trace_id:
-                query = query.filter(LogEntryModel.trace_id == filters.trace_id)
+            if unique:
+                self._insert_entries(session, list(unique.values()))
+                session.commit()
+            return len(unique)
 
-            if filters.commands_only:
-                query = query.filter(LogEntryModel.command_info.isnot(None))
+    @tracing.traced("db_logger.get_logs")
+    def get_logs(
+        self,
+        filters: LogsFilter,
+        paging: Paging,
+        fields: Optional[AbstractSet[LogEntryField]] = None,
+    ) -> List[LogEntrySummary]:
+        selected = list(LogEntryField) if fields is None else list(fields)
 
-            query = query.filter(
-                LogEntryModel.severity.in_([s.value for s in filters.severity])
+        # Core select of plain columns, no ORM entities or identity map
+        statement = select(*[_LOG_ENTRY_COLUMNS[field] for field in selected])
+        statement = _apply_filters(statement, filters)
+        # the id breaks timestamp ties in the same order as the keyset filter
+        statement = statement.order_by(
+            LogEntryModel.timestamp.desc(), LogEntryModel.id.desc()
+        )
+        statement = statement.limit(paging.page_size).offset(
+            (paging.page - 1) * paging.page_size
+        )
+        with self.engine.connect() as connection:
+            rows = connection.execute(statement).all()
+
+        if fields is None:
+            # the whole page is validated in one call
+            return _LOG_SUMMARIES.validate_python(
+                _row_dicts(rows, selected, _COMMAND_SUMMARY_CONVERTER)
             )
+        return [
+            LogEntrySummary.model_construct(**row)
+            for row in _row_dicts(rows, selected, _LOG_ENTRY_CONVERTERS)
+        ]
 
-            query = query.order_by(LogEntryModel.timestamp.desc())
-            query = query.limit(paging.page_size).offset(
-                (paging.page - 1) * paging.page_size
+    @tracing.traced("db_logger.get_log_entry")
+    def get_log_entry(self, log_id: int) -> Optional[LogEntry]:
+        statement = (
+            select(
+                LogEntryModel.id,
+                LogEntryModel.timestamp,
+                LogEntryModel.severity,
+                LogEntryModel.message,
+                LogEntryModel.trace_id,
+                LogEntryModel.command_info,
+                CommandOutputModel.output,
             )
+            .outerjoin(
+                CommandOutputModel, CommandOutputModel.log_entry_id == LogEntryModel.id
+            )
+            .where(LogEntryModel.id == log_id)
+        )
+        with self.engine.connect() as connection:
+            row = connection.execute(statement).first()
+        if not row:
+            return None
 
-            results = query.all()
+        return LogEntry(
+            entry_id=row.id,
+            timestamp=row.timestamp,
+            severity=row.severity,
+            message=row.message,
+            trace_id=row.trace_id,
+            command_info=(
+                _command_info(row.command_info, row.output)
+                if row.command_info
+                else None
+            ),
+        )
 
-            return [
-                LogEntry(
-                    entry_id=result.id,
-                    timestamp=result.timestamp,
-                    severity=result.severity,
-                    message=result.message,
-                    trace_id=result.trace_id,
+    def iter_logs(self, filters: LogsFilter) -> Iterator[LogEntry]:
+        # server-side cursor on Postgres, only one batch of rows is held at a time
+        with self.Session() as session:
+            query = session.query(
+                LogEntryModel.id,
+                LogEntryModel.timestamp,
+                LogEntryModel.severity,
+                LogEntryModel.message,
+                LogEntryModel.trace_id,
+                LogEntryModel.command_info,
+                CommandOutputModel.output,
+            ).outerjoin(
+                CommandOutputModel, CommandOutputModel.log_entry_id == LogEntryModel.id
+            )
+            query = _apply_filters(query, filters)
+            query = query.order_by(LogEntryModel.timestamp, LogEntryModel.id)
+
+            for row in query.yield_per(self.EXPORT_BATCH_SIZE):
+                yield LogEntry(
+                    entry_id=row.id,
+                    timestamp=row.timestamp,
+                    severity=row.severity,
+                    message=row.message,
+                    trace_id=row.trace_id,
                     command_info=(
-                        CommandInfo.model_validate(result.command_info)
-                        if result.command_info
+                        _command_info(row.command_info, row.output)
+                        if row.command_info
                         else None
                     ),
                 )
-                for result in results
-            ]
 
-    def get_log_entry(self, log_id: int) -> Optional[LogEntry]:
+    @tracing.traced("db_logger.get_log_stats")
+    def get_log_stats(self, filters: LogsFilter, bucket: StatsBucket) -> LogStats:
+        time_bucket = _time_bucket(bucket, self.engine.dialect.name)
+
         with self.Session() as session:
-            result = (
-                session.query(LogEntryModel).filter(LogEntryModel.id == log_id).first()
-            )
-            if result:
-                return LogEntry(
-                    entry_id=result.id,
-                    timestamp=result.timestamp,
-                    severity=result.severity,
-                    message=result.message,
-                    trace_id=result.trace_id,
-                    command_info=(
-                        CommandInfo.model_validate(result.command_info)
-                        if result.command_info
-                        else None
+
+            def grouped(column: ColumnElement, commands_only: bool = False):
+                query = _apply_filters(session.query(column, func.count()), filters)
+                if commands_only:
+                    query = query.filter(LogEntryModel.command_info.isnot(None))
+                return query.group_by(column).order_by(column).all()
+
+            by_severity = dict(grouped(LogEntryModel.severity))
+            by_action = dict(grouped(_ACTION, commands_only=True))
+            by_exit_code = dict(grouped(_EXIT_CODE, commands_only=True))
+            by_time = grouped(time_bucket)
+
+        return LogStats(
+            total=sum(by_severity.values()),
+            by_severity=by_severity,
+            by_action=by_action,
+            by_exit_code=by_exit_code,
+            by_time=[
+                TimeBucketCount(
+                    bucket_start=(
+                        datetime.fromisoformat(start)
+                        if isinstance(start, str)
+                        else start
                     ),
+                    count=count,
                 )
-            return None
+                for start, count in by_time
+            ],
+        )
 
+    @tracing.traced("db_logger.get_next_entry_id")
     def get_next_entry_id(self) -> int:
         with self.Session() as session:
             # TODO: test in real postgres
             return session.execute(Sequence("log_entry_id_seq")).scalar()
+
+    @tracing.traced("db_logger.get_next_entry_ids")
+    def get_next_entry_ids(self, count: int) -> List[int]:
+        if self.engine.dialect.name != "postgresql":
+            return [self.get_next_entry_id() for _ in range(count)]
+
+        with self.Session() as session:
+            return list(
+                session.scalars(
+                    select(Sequence("log_entry_id_seq").next_value()).select_from(
+                        func.generate_series(1, count)
+                    )
+                )
+            )
@@ -1,13 +1,36 @@
-from typing import Optional, List, Protocol
+from typing import AbstractSet, Iterator, Optional, List, Protocol
 
-from shared.models import LogEntry, Paging, LogsFilter
+from shared.models import (
+    LogEntry,
+    LogEntryField,
+    LogEntrySummary,
+    LogStats,
+    Paging,
+    LogsFilter,
+    StatsBucket,
+)
 
 
 class IDBLogger(Protocol):
     def insert_log(self, log_entry: LogEntry) -> None: ...
 
-    def get_logs(self, filters: LogsFilter, paging: Paging) -> List[LogEntry]: ...
+    def get_logs(
+        self,
+        filters: LogsFilter,
+        paging: Paging,
+        fields: Optional[AbstractSet[LogEntryField]] = None,
+    ) -> List[LogEntrySummary]:
+        """`fields=None` loads every field, otherwise only the given ones are set"""
+        ...
 
     def get_log_entry(self, log_id: int) -> Optional[LogEntry]: ...
 
-    def get_next_entry_id(self) -> int: ...
+    def iter_logs(self, filters: LogsFilter) -> Iterator[LogEntry]:
+        """Every matching entry, oldest first, without loading them all at once"""
+        ...
+
+    def get_log_stats(self, filters: LogsFilter, bucket: StatsBucket) -> LogStats: ...
+
+    def get_next_entry_id(self) -> int:
+        """Ids below 1 are provisional, the entry is stored under another one"""
+        ...
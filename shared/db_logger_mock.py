@@ -1,46 +1,163 @@
-from typing import List, Optional
-from shared.models import LogEntry, Paging, LogsFilter
+import heapq
+import threading
+from collections import Counter, deque
+from itertools import islice
+from typing import AbstractSet, Deque, Dict, Iterator, List, Optional
+from uuid import UUID
+
 from shared.db_logger_interface import IDBLogger
+from shared.models import (
+    LogEntry,
+    LogEntryField,
+    LogEntrySummary,
+    LogSeverity,
+    LogStats,
+    Paging,
+    LogsFilter,
+    StatsBucket,
+    TimeBucketCount,
+)
 
 
 class DBLoggerMock(IDBLogger):
-    def __init__(self):
-        self.logs: List[LogEntry] = []
-        self.next_id: int = 1
+    """
+    In-memory log store, the default backend when no database is configured.
 
-    def insert_log(self, log_entry: LogEntry) -> None:
-        log_entry.entry_id = self.next_id
-        self.logs.append(log_entry)
-        self.next_id += 1
+    Entries are kept in insertion (time) order and indexed by id, trace id,
+    severity and presence of command info. Every index is a deque of insertion
+    sequence numbers, oldest first, so paging walks it from the right and
+    evicting the oldest entry is a popleft on each index it appears in.
+    """
 
-    def get_logs(self, filters: LogsFilter, paging: Paging) -> List[LogEntry]:
-        filtered_logs = self.logs
+    DEFAULT_MAX_ENTRIES = 100_000
 
-        if filters.trace_id:
-            filtered_logs = [
-                log for log in filtered_logs if log.trace_id == filters.trace_id
-            ]
+    def __init__(self, max_entries: Optional[int] = DEFAULT_MAX_ENTRIES):
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._next_seq = 0
 
-        if filters.commands_only:
-            filtered_logs = [
-                log for log in filtered_logs if log.command_info is not None
-            ]
+        self._entries: Dict[int, LogEntry] = {}  # seq -> entry
+        self._seq_by_id: Dict[int, int] = {}
+        self._timeline: Deque[int] = deque()
+        self._by_trace_id: Dict[UUID, Deque[int]] = {}
+        self._by_severity: Dict[LogSeverity, Deque[int]] = {
+            severity: deque() for severity in LogSeverity
+        }
+        self._commands: Deque[int] = deque()
+
+    def insert_log(self, log_entry: LogEntry) -> None:
+        with self._lock:
+            if log_entry.entry_id in self._seq_by_id:
+                raise ValueError(f"Log entry {log_entry.entry_id} already exists")
+
+            seq = self._next_seq
+            self._next_seq += 1
 
-        if filters.severity:
-            filtered_logs = [
-                log for log in filtered_logs if log.severity in filters.severity
-            ]
+            self._entries[seq] = log_entry
+            self._seq_by_id[log_entry.entry_id] = seq
+            self._timeline.append(seq)
+            self._by_trace_id.setdefault(log_entry.trace_id, deque()).append(seq)
+            self._by_severity[log_entry.severity].append(seq)
+            if log_entry.command_info:
+                self._commands.append(seq)
 
+            if self._max_entries is not None:
+                while len(self._timeline) > self._max_entries:
+                    self._evict_oldest()
+
+    def get_logs(
+        self,
+        filters: LogsFilter,
+        paging: Paging,
+        fields: Optional[AbstractSet[LogEntryField]] = None,
+    ) -> List[LogEntrySummary]:
         start = (paging.page - 1) * paging.page_size
-        end = start + paging.page_size
 
-        return filtered_logs[start:end]
+        with self._lock:
+            page = list(
+                islice(self._newest_first(filters), start, start + paging.page_size)
+            )
+
+        return [LogEntrySummary.of(log, fields) for log in page]
+
+    def get_log_stats(self, filters: LogsFilter, bucket: StatsBucket) -> LogStats:
+        with self._lock:
+            filtered_logs = list(self._newest_first(filters))
+
+        commands = [log.command_info for log in filtered_logs if log.command_info]
+        by_time = Counter(bucket.truncate(log.timestamp) for log in filtered_logs)
+
+        return LogStats(
+            total=len(filtered_logs),
+            by_severity=Counter(log.severity for log in filtered_logs),
+            by_action=Counter(command.action for command in commands),
+            by_exit_code=Counter(command.exit_code for command in commands),
+            by_time=[
+                TimeBucketCount(bucket_start=start, count=count)
+                for start, count in sorted(by_time.items())
+            ],
+        )
 
     def get_log_entry(self, log_id: int) -> Optional[LogEntry]:
-        for log in self.logs:
-            if log.entry_id == log_id:
-                return log
-        return None
+        with self._lock:
+            seq = self._seq_by_id.get(log_id)
+            return self._entries[seq] if seq is not None else None
+
+    def iter_logs(self, filters: LogsFilter) -> Iterator[LogEntry]:
+        # entries are already in memory, the snapshot only copies references
+        with self._lock:
+            filtered_logs = list(self._newest_first(filters))
+
+        return reversed(filtered_logs)
 
     def get_next_entry_id(self) -> int:
-        return self.next_id
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            return entry_id
+
+    def _newest_first(self, filters: LogsFilter) -> Iterator[LogEntry]:
+        """Must be consumed while holding the lock"""
+        candidates: List[tuple[int, Iterator[int]]] = []
+
+        if filters.trace_id:
+            trace = self._by_trace_id.get(filters.trace_id, ())
+            candidates.append((len(trace), reversed(trace)))
+
+        if filters.commands_only:
+            candidates.append((len(self._commands), reversed(self._commands)))
+
+        severities = set(filters.severity)
+        if severities != set(LogSeverity):
+            postings = [self._by_severity[severity] for severity in severities]
+            candidates.append(
+                (
+                    sum(len(posting) for posting in postings),
+                    heapq.merge(*map(reversed, postings), reverse=True),
+                )
+            )
+
+        if not candidates:
+            candidates.append((len(self._timeline), reversed(self._timeline)))
+
+        # walk the shortest index and check the remaining conditions per entry
+        _, seqs = min(candidates, key=lambda candidate: candidate[0])
+        for seq in seqs:
+            log_entry = self._entries[seq]
+            if filters.matches(log_entry):
+                yield log_entry
+
+    def _evict_oldest(self) -> None:
+        seq = self._timeline.popleft()
+        log_entry = self._entries.pop(seq)
+        del self._seq_by_id[log_entry.entry_id]
+
+        self._by_severity[log_entry.severity].popleft()
+        if log_entry.command_info:
+            self._commands.popleft()
+
+        trace = self._by_trace_id[log_entry.trace_id]
+        trace.popleft()
+        if not trace:
+            del self._by_trace_id[log_entry.trace_id]
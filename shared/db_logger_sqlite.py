@@ -0,0 +1,196 @@
+import atexit
+import logging
+import threading
+from typing import AbstractSet, Iterator, List, Optional
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+
+from shared import metrics
+from shared.db_logger import DBLogger, LogEntryModel
+from shared.models import (
+    LogEntry,
+    LogEntryField,
+    LogEntrySummary,
+    LogsFilter,
+    LogStats,
+    Paging,
+    StatsBucket,
+)
+
+_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",  # durable across app crashes, not power loss
+    "PRAGMA foreign_keys=ON",
+    "PRAGMA busy_timeout=5000",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-16000",  # 16 MB
+    "PRAGMA mmap_size=268435456",  # 256 MB
+)
+
+
+_log = logging.getLogger(__name__)
+
+_DROPPED = metrics.counter(
+    "sqlite_log_entries_dropped_total",
+    "Log entries the SQLite backend never stored, because its write buffer"
+    + " was full or the database rejected them",
+    ("reason",),
+)
+
+
+def _apply_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in _PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+class SQLiteDBLogger(DBLogger):
+    """
+    DBLogger on an embedded SQLite file, for single-node installs without Postgres.
+
+    Writes are buffered and committed in batches, either when `batch_size`
+    entries are pending or every `flush_interval_seconds`. Reads flush first,
+    so they see every entry inserted before them, unless the flush fails; they
+    then serve what is on disk. Entry ids come from an in-process counter, the
+    file must not be shared between processes.
+
+    While the file cannot be written, e.g. locked or on a full disk, entries
+    stay buffered and are retried, up to `max_pending`, beyond which the
+    oldest are dropped. An entry the database rejects is dropped too, so it
+    cannot fail every later flush.
+    """
+
+    BATCH_SIZE = 100
+    FLUSH_INTERVAL_SECONDS = 0.5
+    MAX_PENDING = 10_000
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = BATCH_SIZE,
+        flush_interval_seconds: float = FLUSH_INTERVAL_SECONDS,
+        max_pending: int = MAX_PENDING,
+    ):
+        super().__init__(is_test=True)
+        engine = create_engine(
+            f"sqlite:///{path}",
+            connect_args={"check_same_thread": False, "cached_statements": 256},
+        )
+        event.listen(engine, "connect", _apply_pragmas)
+        self._connect(engine)
+
+        self._batch_size = batch_size
+        self._max_pending = max_pending
+        self._lock = threading.Lock()
+        self._pending: List[LogEntry] = []
+        with self.Session() as session:
+            self._next_id = (
+                session.scalar(select(func.max(LogEntryModel.id))) or 0
+            ) + 1
+
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(
+            target=self._flush_periodically,
+            args=(flush_interval_seconds,),
+            name="sqlite-log-flusher",
+            daemon=True,
+        )
+        self._flusher.start()
+        atexit.register(self.close)
+
+    def insert_log(self, log_entry: LogEntry) -> None:
+        with self._lock:
+            self._pending.append(log_entry)
+            if len(self._pending) > self._max_pending:
+                del self._pending[0]
+                _DROPPED.inc("buffer_full")
+            if len(self._pending) >= self._batch_size:
+                try:
+                    self._flush_locked()
+                except OperationalError:  # retried by the next flush
+                    pass
+
+    def get_logs(
+        self,
+        filters: LogsFilter,
+        paging: Paging,
+        fields: Optional[AbstractSet[LogEntryField]] = None,
+    ) -> List[LogEntrySummary]:
+        self._flush_for_read()
+        return super().get_logs(filters, paging, fields)
+
+    def get_log_entry(self, log_id: int) -> Optional[LogEntry]:
+        self._flush_for_read()
+        return super().get_log_entry(log_id)
+
+    def iter_logs(self, filters: LogsFilter) -> Iterator[LogEntry]:
+        self._flush_for_read()
+        return super().iter_logs(filters)
+
+    def get_log_stats(self, filters: LogsFilter, bucket: StatsBucket) -> LogStats:
+        self._flush_for_read()
+        return super().get_log_stats(filters, bucket)
+
+    def get_next_entry_id(self) -> int:
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            return entry_id
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush_locked()
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._flusher.join()
+        self.flush()
+        self.engine.dispose()
+
+    def _flush_for_read(self) -> None:
+        try:
+            self.flush()
+        except OperationalError:  # entries stay pending, the read goes on
+            _log.warning("Flushing pending log entries failed", exc_info=True)
+
+    def _flush_locked(self) -> None:
+        if not self._pending:
+            return
+        try:
+            self._insert_committed(self._pending)
+        except OperationalError:
+            raise  # the file cannot be written now, the entries stay pending
+        except SQLAlchemyError:
+            self._insert_one_by_one()
+        self._pending = []
+
+    def _insert_one_by_one(self) -> None:
+        # a rejected entry failed the whole batch, the others are still stored
+        done = 0
+        try:
+            for log_entry in self._pending:
+                try:
+                    self._insert_committed([log_entry])
+                except OperationalError:
+                    raise
+                except SQLAlchemyError:
+                    _DROPPED.inc("rejected")
+                done += 1
+        finally:
+            del self._pending[:done]
+
+    def _insert_committed(self, log_entries: List[LogEntry]) -> None:
+        with self.Session() as session:
+            self._insert_entries(session, log_entries)
+            session.commit()
+
+    def _flush_periodically(self, interval_seconds: float) -> None:
+        while not self._closed.wait(interval_seconds):
+            try:
+                self.flush()
+            except Exception:  # entries stay pending and are retried next tick
+                pass
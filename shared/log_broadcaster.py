@@ -0,0 +1,94 @@
+import asyncio
+import threading
+from collections import deque
+from typing import Deque, List, Set
+
+from shared.models import LogEntry, LogsFilter
+
+
+class LogSubscription:
+    """
+    Receives new entries matching `filters`. Entries are buffered up to
+    `buffer_size`, a subscriber that falls behind loses the oldest ones and
+    sees how many in `dropped`.
+    """
+
+    def __init__(
+        self, filters: LogsFilter, loop: asyncio.AbstractEventLoop, buffer_size: int
+    ):
+        self.filters = filters
+        self.dropped = 0
+        self._loop = loop
+        self._buffer: Deque[LogEntry] = deque(maxlen=buffer_size)
+        self._ready = asyncio.Event()
+
+    async def next_batch(self) -> List[LogEntry]:
+        await self._ready.wait()
+        self._ready.clear()
+        batch = list(self._buffer)
+        self._buffer.clear()
+        return batch
+
+    def _push(self, log_entry: LogEntry) -> None:
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(log_entry)
+        self._ready.set()
+
+
+class LogBroadcaster:
+    """
+    In-process fan-out of new log entries to live subscribers.
+
+    `publish` may be called from any thread, each subscription is fed on the
+    event loop it was created on. The same entry id is only published once,
+    so local writes and Postgres notifications can feed it side by side.
+    """
+
+    BUFFER_SIZE = 1000
+    _SEEN_IDS_LIMIT = 10_000
+
+    def __init__(self, buffer_size: int = BUFFER_SIZE):
+        self._buffer_size = buffer_size
+        self._lock = threading.Lock()
+        self._subscriptions: Set[LogSubscription] = set()
+        self._seen_ids: Set[int] = set()
+        self._seen_order: Deque[int] = deque()
+
+    def subscribe(self, filters: LogsFilter) -> LogSubscription:
+        subscription = LogSubscription(
+            filters, asyncio.get_running_loop(), self._buffer_size
+        )
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: LogSubscription) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def has_published(self, entry_id: int) -> bool:
+        with self._lock:
+            return entry_id in self._seen_ids
+
+    def publish(self, log_entry: LogEntry) -> None:
+        with self._lock:
+            if log_entry.entry_id in self._seen_ids:
+                return
+            self._seen_ids.add(log_entry.entry_id)
+            self._seen_order.append(log_entry.entry_id)
+            if len(self._seen_order) > self._SEEN_IDS_LIMIT:
+                self._seen_ids.discard(self._seen_order.popleft())
+
+            subscriptions = [
+                subscription
+                for subscription in self._subscriptions
+                if subscription.filters.matches(log_entry)
+            ]
+
+        for subscription in subscriptions:
+            try:
+                # noinspection PyProtectedMember
+                subscription._loop.call_soon_threadsafe(subscription._push, log_entry)
+            except RuntimeError:  # its event loop is closed
+                self.unsubscribe(subscription)
@@ -0,0 +1,136 @@
+import random
+import threading
+import time
+from collections import Counter, OrderedDict
+from typing import Callable, List, NamedTuple, Optional, Tuple
+
+from shared.models import CommandInfo, LogPolicyConfig, LogPolicyStats, LogSeverity
+
+_SEVERITY_RANK = {severity: rank for rank, severity in enumerate(LogSeverity)}
+
+
+class LogDecision(NamedTuple):
+    persist: bool  # write the entry to the database (and publish it)
+    echo: bool  # write it to the console and the log file
+    # (severity, message) of repeats whose suppression window just closed
+    summaries: List[Tuple[LogSeverity, str]]
+
+
+class _Repeats:
+    __slots__ = ("severity", "message", "window_end", "suppressed")
+
+    def __init__(self, severity: LogSeverity, message: str, window_end: float):
+        self.severity = severity
+        self.message = message
+        self.window_end = window_end
+        self.suppressed = 0
+
+
+class LogPolicy:
+    """
+    Decides which log entries are kept, changeable at runtime.
+
+    ERROR entries and entries with CommandInfo (the audit trail) are always
+    persisted; for the latter `action_sample_rates` only thins the console
+    and file echo. Everything else is dropped below `min_severity`, sampled by
+    `severity_sample_rates`, and identical messages repeated within
+    `dedupe_window_seconds` are suppressed and reported as one summary entry
+    when the window closes.
+    """
+
+    MAX_TRACKED_MESSAGES = 1000
+
+    def __init__(
+        self,
+        config: Optional[LogPolicyConfig] = None,
+        sample: Callable[[], float] = random.random,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._config = config or LogPolicyConfig()
+        self._sample = sample
+        self._clock = clock
+        self._lock = threading.Lock()
+        # oldest window first, so closed windows are popped from the front
+        self._repeats: OrderedDict[Tuple[LogSeverity, str], _Repeats] = OrderedDict()
+        self._sampled_out: Counter[LogSeverity] = Counter()
+        self._suppressed: Counter[LogSeverity] = Counter()
+
+    @property
+    def config(self) -> LogPolicyConfig:
+        return self._config
+
+    def update(self, config: LogPolicyConfig) -> List[Tuple[LogSeverity, str]]:
+        """Returns the summaries of suppressions cut short by the change"""
+        with self._lock:
+            self._config = config
+            return self._close_windows(float("inf"))
+
+    def stats(self) -> LogPolicyStats:
+        with self._lock:
+            return LogPolicyStats(
+                sampled_out=dict(self._sampled_out), suppressed=dict(self._suppressed)
+            )
+
+    def decide(
+        self,
+        severity: LogSeverity,
+        message: str,
+        command_info: Optional[CommandInfo] = None,
+    ) -> LogDecision:
+        config = self._config
+        with self._lock:
+            now = self._clock()
+            summaries = self._close_windows(now) if self._repeats else []
+
+            if command_info is not None:
+                rate = config.action_sample_rates.get(command_info.action, 1)
+                return LogDecision(True, self._keep(rate), summaries)
+
+            if severity == LogSeverity.ERROR:
+                return LogDecision(True, True, summaries)
+
+            if _SEVERITY_RANK[severity] < _SEVERITY_RANK[config.min_severity] or (
+                not self._keep(config.severity_sample_rates.get(severity, 1))
+            ):
+                self._sampled_out[severity] += 1
+                return LogDecision(False, False, summaries)
+
+            if config.dedupe_window_seconds:
+                key = (severity, message)
+                repeats = self._repeats.get(key)
+                if repeats is not None:
+                    repeats.suppressed += 1
+                    self._suppressed[severity] += 1
+                    return LogDecision(False, False, summaries)
+
+                self._repeats[key] = _Repeats(
+                    severity, message, now + config.dedupe_window_seconds
+                )
+                if len(self._repeats) > self.MAX_TRACKED_MESSAGES:
+                    summaries += self._summarize(self._repeats.popitem(last=False)[1])
+
+            return LogDecision(True, True, summaries)
+
+    def _keep(self, rate: float) -> bool:
+        return rate >= 1 or (rate > 0 and self._sample() < rate)
+
+    def _close_windows(self, now: float) -> List[Tuple[LogSeverity, str]]:
+        summaries = []
+        while self._repeats:
+            repeats = next(iter(self._repeats.values()))
+            if repeats.window_end > now:
+                break
+            self._repeats.popitem(last=False)
+            summaries += self._summarize(repeats)
+        return summaries
+
+    @staticmethod
+    def _summarize(repeats: _Repeats) -> List[Tuple[LogSeverity, str]]:
+        if not repeats.suppressed:
+            return []
+        return [
+            (
+                repeats.severity,
+                f"{repeats.suppressed} identical messages suppressed: {repeats.message}",
+            )
+        ]
@@ -0,0 +1,269 @@
+import atexit
+import contextvars
+import enum
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count, islice
+from typing import AbstractSet, Deque, Iterator, List, Optional
+
+from pydantic import ValidationError
+
+from shared.db_logger import DBLogger
+from shared.db_logger_interface import IDBLogger
+from shared.models import (
+    LogEntry,
+    LogEntryField,
+    LogEntrySummary,
+    LogsFilter,
+    LogStats,
+    Paging,
+    StatsBucket,
+)
+
+
+class SpoolFsync(enum.StrEnum):
+    ALWAYS = "always"  # every append survives power loss
+    INTERVAL = "interval"  # at most FSYNC_INTERVAL_SECONDS of appends can be lost
+    NEVER = "never"  # left to the OS, survives process crashes only
+
+
+class LogSpool:
+    """
+    Append-only file of log entries waiting for the database, one JSON per line.
+
+    Replay works on a copy: `begin_replay` moves the spooled entries aside to
+    `<path>.replaying`, so appends continue in a fresh file, and `end_replay`
+    deletes it once the entries are stored. A replay file left over by a crash
+    is picked up again by the next `begin_replay`.
+    """
+
+    FSYNC_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, path: str, fsync: SpoolFsync = SpoolFsync.INTERVAL):
+        self._path = path
+        self._replay_path = path + ".replaying"
+        self._fsync = fsync
+        self._lock = threading.Lock()
+        self._file = open(path, "ab")
+        self._last_fsync = 0.0
+
+    def append(self, log_entry: LogEntry) -> None:
+        line = log_entry.model_dump_json().encode("utf-8") + b"\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            if self._fsync == SpoolFsync.ALWAYS or (
+                self._fsync == SpoolFsync.INTERVAL
+                and time.monotonic() - self._last_fsync >= self.FSYNC_INTERVAL_SECONDS
+            ):
+                os.fsync(self._file.fileno())
+                self._last_fsync = time.monotonic()
+
+    def has_entries(self) -> bool:
+        with self._lock:
+            return self._file.tell() > 0 or os.path.exists(self._replay_path)
+
+    def begin_replay(self) -> Iterator[LogEntry]:
+        with self._lock:
+            if not os.path.exists(self._replay_path) and self._file.tell() > 0:
+                self._file.close()
+                os.replace(self._path, self._replay_path)
+                self._file = open(self._path, "ab")
+                if self._fsync != SpoolFsync.NEVER:
+                    self._fsync_directory()
+
+        return self._read(self._replay_path)
+
+    def end_replay(self) -> bool:
+        """Drops the replayed entries, True if nothing was spooled meanwhile"""
+        with self._lock:
+            if os.path.exists(self._replay_path):
+                os.remove(self._replay_path)
+            return self._file.tell() == 0
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+    @staticmethod
+    def _read(path: str) -> Iterator[LogEntry]:
+        if not os.path.exists(path):
+            return
+        with open(path, "rb") as file:
+            for line in file:
+                try:
+                    yield LogEntry.model_validate_json(line)
+                except ValidationError:  # torn last line of a crashed append
+                    continue
+
+    def _fsync_directory(self) -> None:
+        directory = os.open(os.path.dirname(os.path.abspath(self._path)), os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+
+
+class SpoolingDBLogger(IDBLogger):
+    """
+    DBLogger wrapper that keeps log writes off the database when it misbehaves.
+
+    An insert that fails or takes longer than `latency_budget_seconds` goes to
+    the spool instead, and so does every insert after it until a background
+    thread has replayed the spool into the database. Replay is in bulk and
+    skips entry ids the database already has, e.g. from an insert that was
+    only slow. Reads go to the database directly.
+
+    Entry ids come from a reserve of sequence values, filled before the first
+    request and topped up in the background, so handing one out never waits
+    on the database. Once an outage has used it up, entries get provisional
+    negative ids and go to the spool; replay gives them real ids, under which
+    they can then be read back.
+    """
+
+    LATENCY_BUDGET_SECONDS = 0.25
+    REPLAY_INTERVAL_SECONDS = 5.0
+    REPLAY_BATCH_SIZE = 500
+    ID_RESERVE_SIZE = 1000
+
+    def __init__(
+        self,
+        db_logger: DBLogger,
+        spool: LogSpool,
+        latency_budget_seconds: float = LATENCY_BUDGET_SECONDS,
+        replay_interval_seconds: float = REPLAY_INTERVAL_SECONDS,
+    ):
+        self.db_logger = db_logger
+        self._spool = spool
+        self._latency_budget_seconds = latency_budget_seconds
+        self._writer = ThreadPoolExecutor(1, thread_name_prefix="log-writer")
+
+        self._ids_lock = threading.Lock()
+        self._ids: Deque[int] = deque()
+        self._provisional_ids = count(-1, -1)
+        self._spooling = threading.Event()
+        if spool.has_entries():
+            self._spooling.set()
+
+        try:
+            self._refill_ids()
+        except Exception:  # database down at startup, the maintainer keeps trying
+            pass
+
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+        self._maintainer = threading.Thread(
+            target=self._maintain,
+            args=(replay_interval_seconds,),
+            name="log-spool-replay",
+            daemon=True,
+        )
+        self._maintainer.start()
+        atexit.register(self.close)
+
+    @property
+    def spooling(self) -> bool:
+        return self._spooling.is_set()
+
+    def insert_log(self, log_entry: LogEntry) -> None:
+        if log_entry.entry_id < 0:  # provisional, only replay can store it
+            self._spooling.set()
+            self._wake.set()
+        elif not self._spooling.is_set():
+            # in the caller's context, so the insert span nests under its trace
+            future = self._writer.submit(
+                contextvars.copy_context().run, self.db_logger.insert_log, log_entry
+            )
+            try:
+                future.result(timeout=self._latency_budget_seconds)
+                return
+            except Exception:  # slow or failing, the spool takes over until replay
+                self._spooling.set()
+                self._wake.set()
+
+        self._spool.append(log_entry)
+
+    def get_logs(
+        self,
+        filters: LogsFilter,
+        paging: Paging,
+        fields: Optional[AbstractSet[LogEntryField]] = None,
+    ) -> List[LogEntrySummary]:
+        return self.db_logger.get_logs(filters, paging, fields)
+
+    def get_log_entry(self, log_id: int) -> Optional[LogEntry]:
+        return self.db_logger.get_log_entry(log_id)
+
+    def iter_logs(self, filters: LogsFilter) -> Iterator[LogEntry]:
+        return self.db_logger.iter_logs(filters)
+
+    def get_log_stats(self, filters: LogsFilter, bucket: StatsBucket) -> LogStats:
+        return self.db_logger.get_log_stats(filters, bucket)
+
+    def get_next_entry_id(self) -> int:
+        with self._ids_lock:
+            if len(self._ids) < self.ID_RESERVE_SIZE // 2:
+                self._wake.set()
+            if self._ids:
+                return self._ids.popleft()
+            return next(self._provisional_ids)
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._wake.set()
+        self._maintainer.join()
+        self._writer.shutdown(wait=False)
+        self._spool.close()
+
+    def _maintain(self, interval_seconds: float) -> None:
+        while not self._closed.is_set():
+            try:
+                self._refill_ids()
+                if self._spool.has_entries():
+                    self._replay()
+                self._wake.wait(interval_seconds)
+            except Exception:  # database still unavailable, wakeups wait too
+                self._closed.wait(interval_seconds)
+            self._wake.clear()
+
+    def _refill_ids(self) -> None:
+        with self._ids_lock:
+            missing = self.ID_RESERVE_SIZE - len(self._ids)
+        if missing > self.ID_RESERVE_SIZE // 2:
+            ids = self.db_logger.get_next_entry_ids(missing)
+            with self._ids_lock:
+                self._ids.extend(ids)
+
+    def _replay(self) -> None:
+        log_entries = self._spool.begin_replay()
+        try:
+            while batch := list(islice(log_entries, self.REPLAY_BATCH_SIZE)):
+                self.db_logger.insert_logs(self._with_real_ids(batch))
+        finally:
+            log_entries.close()
+
+        if self._spool.end_replay():
+            self._spooling.clear()
+
+    def _with_real_ids(self, log_entries: List[LogEntry]) -> List[LogEntry]:
+        # not idempotent like the rest of replay: provisional entries stored
+        # by a replay that crashed before end_replay are stored again
+        provisional = [
+            index
+            for index, log_entry in enumerate(log_entries)
+            if log_entry.entry_id < 0
+        ]
+        if not provisional:
+            return log_entries
+
+        ids = self.db_logger.get_next_entry_ids(len(provisional))
+        for index, entry_id in zip(provisional, ids):
+            log_entries[index] = log_entries[index].model_copy(
+                update={"entry_id": entry_id}
+            )
+        return log_entries
@@ -1,12 +1,38 @@
+import atexit
+import json
 import logging
+import queue
 import sys
+import threading
 from datetime import datetime
-from logging.handlers import RotatingFileHandler
-from typing import List, Optional, Callable
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import AbstractSet, ClassVar, Iterator, List, Optional, Callable, Tuple
 from uuid import UUID
 
 from shared.db_logger_interface import IDBLogger
-from shared.models import LogEntry, LogSeverity, CommandInfo, LogsFilter, Paging
+from shared.log_broadcaster import LogBroadcaster
+from shared.log_policy import LogPolicy
+from shared.recent_log_cache import RecentLogCache
+from shared.models import (
+    CacheStats,
+    LogEntry,
+    LogEntryField,
+    LogEntrySummary,
+    LogSeverity,
+    CommandInfo,
+    LogsFilter,
+    LogPolicyConfig,
+    LogStats,
+    Paging,
+    StatsBucket,
+)
+from shared.ttl_cache import TTLCache
+
+
+def _rounded_down(timestamp: Optional[datetime], seconds: float) -> Optional[datetime]:
+    if timestamp is None:
+        return None
+    return datetime.fromtimestamp(timestamp.timestamp() // seconds * seconds)
 
 
 class TraceIdProvider:
@@ -17,6 +43,43 @@ class TraceIdProvider:
         return self.get_trace_id()
 
 
+class TextLineFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__(
+            "%(asctime)s - %(levelname)s - [TraceID: %(trace_id)s] - %(message)s"
+        )
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        command = getattr(record, "command", None)
+        return f"{line} - Command: {command}" if command else line
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        line = {
+            "timestamp": datetime.fromtimestamp(record.created).isoformat(),
+            "severity": record.levelname,
+            "traceId": str(getattr(record, "trace_id", None)),
+            "message": record.getMessage(),
+        }
+        command = getattr(record, "command", None)
+        if command:
+            line["command"] = command
+        if record.exc_info:
+            line["exception"] = self.formatException(record.exc_info)
+        return json.dumps(line)
+
+
+class _EnqueueHandler(QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the message is a plain string already, formatting is left to the sinks
+        return record
+
+
+_LEVELS = {severity: logging.getLevelName(severity.name) for severity in LogSeverity}
+
+
 class Logger:
     _UNSCOPED_TRACE_ID = UUID("00000000-0000-0000-0000-000000000000")
 
@@ -24,39 +87,101 @@ class Logger:
     MAX_FILE_SIZE = 10 * 1024 * 1024  # 10 MB
     BACKUP_COUNT = 5
     LOGLEVEL = logging.DEBUG
+    STATS_CACHE_TTL_SECONDS = 5
+    STATS_CACHE_MAX_ENTRIES = 128
+    # assumes this process is the only writer, pass 0 when others share the db
+    RECENT_CACHE_SIZE = 1000
+
+    # console and file sinks are shared by every Logger in the process
+    _listener: ClassVar[Optional[QueueListener]] = None
+    _listener_lock: ClassVar[threading.Lock] = threading.Lock()
 
     def __init__(
-        self, trace_id_provider: TraceIdProvider, db_logger: IDBLogger
+        self,
+        trace_id_provider: TraceIdProvider,
+        db_logger: IDBLogger,
+        broadcaster: Optional[LogBroadcaster] = None,
+        json_format: bool = False,
+        policy: Optional[LogPolicy] = None,
+        recent_cache_size: int = RECENT_CACHE_SIZE,
     ) -> None:
         self.db_logger = db_logger
         self.trace_id_provider = trace_id_provider
+        self.broadcaster = broadcaster or LogBroadcaster()
+        self.policy = policy or LogPolicy()
+        self._recent_logs = RecentLogCache(
+            recent_cache_size, shared_trace_ids=[self._UNSCOPED_TRACE_ID]
+        )
+        self._stats_cache: TTLCache[LogStats] = TTLCache(
+            self.STATS_CACHE_TTL_SECONDS, self.STATS_CACHE_MAX_ENTRIES
+        )
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(self.LOGLEVEL)
+        self._start_listener(self.logger, json_format)
 
-        # Console handler
-        console_handler = logging.StreamHandler(sys.stdout)
-        console_handler.setLevel(self.LOGLEVEL)
-        console_handler.setFormatter(
-            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        )
-        self.logger.addHandler(console_handler)
+    @classmethod
+    def _start_listener(cls, logger: logging.Logger, json_format: bool) -> None:
+        """
+        Console and file writes (and rotation) run on a listener thread, a log
+        call only enqueues the record. Set up once, the first Logger picks the format.
+        """
+        with cls._listener_lock:
+            if cls._listener is not None:
+                return
 
-        # File handler with rotation
-        file_handler = RotatingFileHandler(
-            self.LOG_FILE, maxBytes=self.MAX_FILE_SIZE, backupCount=self.BACKUP_COUNT
-        )
-        file_handler.setLevel(self.LOGLEVEL)
-        file_handler.setFormatter(
-            logging.Formatter("%(asctime)s - %(levelname)s - %(message)s")
-        )
-        self.logger.addHandler(file_handler)
+            formatter = JsonLineFormatter() if json_format else TextLineFormatter()
+
+            # Console handler
+            console_handler = logging.StreamHandler(sys.stdout)
+            console_handler.setLevel(cls.LOGLEVEL)
+            console_handler.setFormatter(formatter)
+
+            # File handler with rotation
+            file_handler = RotatingFileHandler(
+                cls.LOG_FILE, maxBytes=cls.MAX_FILE_SIZE, backupCount=cls.BACKUP_COUNT
+            )
+            file_handler.setLevel(cls.LOGLEVEL)
+            file_handler.setFormatter(formatter)
+
+            records: queue.SimpleQueue = queue.SimpleQueue()
+            cls._listener = QueueListener(
+                records, console_handler, file_handler, respect_handler_level=True
+            )
+            cls._listener.start()
+            atexit.register(cls._listener.stop)  # drains what is still queued
+            logger.addHandler(_EnqueueHandler(records))
 
     def log(
         self,
         severity: LogSeverity,
         message: str,
         command_info: Optional[CommandInfo] = None,
-    ) -> int:
+    ) -> Optional[int]:
+        """
+        Returns the entry id, or None if the log policy dropped the entry or
+        it has no id to be read back by yet, see IDBLogger.get_next_entry_id
+        """
+        decision = self.policy.decide(severity, message, command_info)
+        self._write_summaries(decision.summaries)
+        if not decision.persist:
+            return None
+
+        return self._write(severity, message, command_info, decision.echo)
+
+    def set_policy(self, config: LogPolicyConfig) -> None:
+        self._write_summaries(self.policy.update(config))
+
+    def _write_summaries(self, summaries: List[Tuple[LogSeverity, str]]) -> None:
+        for severity, message in summaries:
+            self._write(severity, message, None, echo=True)
+
+    def _write(
+        self,
+        severity: LogSeverity,
+        message: str,
+        command_info: Optional[CommandInfo],
+        echo: bool,
+    ) -> Optional[int]:
         log_entry = LogEntry(
             entry_id=self.db_logger.get_next_entry_id(),
             timestamp=datetime.now(),
@@ -66,19 +191,67 @@ class Logger:
             command_info=command_info,
         )
 
-        # Log to console and file
-        log_message = f"[TraceID: {log_entry.trace_id}] - {log_entry.message}"
-        if log_entry.command_info:
-            log_message += f" - Command: {log_entry.command_info.command}"
-        self.logger.log(logging.getLevelName(severity.name), log_message)
+        # Log to console and file, formatted on the listener thread
+        if echo:
+            self.logger.log(
+                _LEVELS[severity],
+                log_entry.message,
+                extra={
+                    "trace_id": log_entry.trace_id,
+                    "command": (
+                        log_entry.command_info.command
+                        if log_entry.command_info
+                        else None
+                    ),
+                },
+            )
 
         # Log to database
         self.db_logger.insert_log(log_entry)
+        if log_entry.entry_id <= 0:
+            # provisional, published under its real id once the spool replay
+            # stores it, see PostgresLogListener
+            return None
+        self._recent_logs.add(log_entry)
+
+        # Push to live subscribers
+        self.broadcaster.publish(log_entry)
 
         return log_entry.entry_id
 
-    def get_logs(self, filters: LogsFilter, paging: Paging) -> List[LogEntry]:
-        return self.db_logger.get_logs(filters, paging)
+    def get_logs(
+        self,
+        filters: LogsFilter,
+        paging: Paging,
+        fields: Optional[AbstractSet[LogEntryField]] = None,
+    ) -> List[LogEntrySummary]:
+        logs = self._recent_logs.get_logs(filters, paging, fields)
+        if logs is None:
+            logs = self.db_logger.get_logs(filters, paging, fields)
+        return logs
+
+    def get_recent_cache_stats(self) -> CacheStats:
+        return self._recent_logs.stats()
 
     def get_log_entry(self, log_id: int) -> Optional[LogEntry]:
         return self.db_logger.get_log_entry(log_id)
+
+    def iter_logs(self, filters: LogsFilter) -> Iterator[LogEntry]:
+        return self.db_logger.iter_logs(filters)
+
+    def get_log_stats(self, filters: LogsFilter, bucket: StatsBucket) -> LogStats:
+        # dashboards poll the same recent windows, a few seconds of staleness is
+        # fine; windows relative to now are keyed in steps of the TTL to repeat
+        step = self.STATS_CACHE_TTL_SECONDS
+        rounded = filters.model_copy(
+            update={
+                "date_from": _rounded_down(filters.date_from, step),
+                "date_to": _rounded_down(filters.date_to, step),
+            }
+        )
+        key = (rounded.model_dump_json(), bucket)
+        stats = self._stats_cache.get(key)
+        if stats is None:
+            stats = self.db_logger.get_log_stats(filters, bucket)
+            self._stats_cache.put(key, stats)
+        return stats
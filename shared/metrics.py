@@ -0,0 +1,265 @@
+"""
+In-process metrics, rendered in the Prometheus text exposition format.
+
+Updates take no lock: each thread writes to its own shard of a metric and only
+`Registry.render` walks all shards. Request handlers running on the event loop
+share a single shard, thread pool workers get one each, so the only lock is
+the one taken the first time a thread touches a metric. Shard updates rely on
+the GIL making single dict and list item operations atomic; a scrape racing
+an update may see it half applied, which Prometheus tolerates.
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Any, Awaitable, Callable, ClassVar, Dict, List, Optional, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = Tuple[str, ...]
+
+
+class _Metric:
+    TYPE: ClassVar[str]
+
+    def __init__(self, name: str, documentation: str, label_names: Labels = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self._local = threading.local()
+        self._shards: List[Dict[Labels, Any]] = []
+        self._shards_lock = threading.Lock()
+
+    def _shard(self) -> Dict[Labels, Any]:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:  # kept after the thread exits, counts included
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self) -> List[Dict[Labels, Any]]:
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [dict(shard) for shard in shards]
+
+    def _check(self, labels: Labels) -> None:
+        if len(labels) != len(self.label_names):
+            raise ValueError(
+                f"{self.name} takes labels {self.label_names}, got {labels}"
+            )
+
+    def samples(self) -> List[Tuple[str, Labels, Labels, float]]:
+        """(name suffix, extra label names, label values, value) per sample"""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {_escape_help(self.documentation)}",
+            f"# TYPE {self.name} {self.TYPE}",
+        ]
+        for suffix, extra_names, labels, value in self.samples():
+            names = self.label_names + extra_names
+            label_text = ",".join(
+                f'{name}="{_escape_label(str(value))}"'
+                for name, value in zip(names, labels)
+            )
+            label_text = f"{{{label_text}}}" if label_text else ""
+            lines.append(f"{self.name}{suffix}{label_text} {_format(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._check(labels)
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def samples(self) -> List[Tuple[str, Labels, Labels, float]]:
+        return [("", (), labels, value) for labels, value in _sum(self._snapshots())]
+
+
+class Gauge(_Metric):
+    """
+    Summed over shards, so `inc` and `dec` may happen on different threads.
+    Values known only at scrape time come from `callback` instead, which
+    returns the value per label tuple.
+    """
+
+    TYPE = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Labels = (),
+        callback: Optional[Callable[[], Dict[Labels, float]]] = None,
+    ):
+        super().__init__(name, documentation, label_names)
+        self._callback = callback
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        self._check(labels)
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0.0) + amount
+
+    def dec(self, *labels: str, amount: float = 1.0) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def samples(self) -> List[Tuple[str, Labels, Labels, float]]:
+        values = dict(_sum(self._snapshots()))
+        if self._callback:
+            for labels, value in self._callback().items():
+                values[labels] = values.get(labels, 0.0) + value
+        return [("", (), labels, value) for labels, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Labels = (),
+        buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, *labels: str) -> None:
+        self._check(labels)
+        shard = self._shard()
+        # per bucket counts, not cumulative, with +Inf last and the sum after it
+        counts = shard.get(labels)
+        if counts is None:
+            counts = shard[labels] = [0.0] * (len(self.buckets) + 2)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def samples(self) -> List[Tuple[str, Labels, Labels, float]]:
+        totals: Dict[Labels, List[float]] = {}
+        for shard in self._snapshots():
+            for labels, counts in shard.items():
+                total = totals.setdefault(labels, [0.0] * len(counts))
+                for index, count in enumerate(list(counts)):
+                    total[index] += count
+
+        samples = []
+        for labels, total in sorted(totals.items()):
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (math.inf,), total):
+                cumulative += count
+                samples.append(
+                    ("_bucket", ("le",), labels + (_format(bound),), cumulative)
+                )
+            samples.append(("_sum", (), labels, total[-1]))
+            samples.append(("_count", (), labels, cumulative))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> None:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "".join(line + "\n" for metric in metrics for line in metric.render())
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, label_names: Labels = ()) -> Counter:
+    metric = Counter(name, documentation, label_names)
+    REGISTRY.register(metric)
+    return metric
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    label_names: Labels = (),
+    callback: Optional[Callable[[], Dict[Labels, float]]] = None,
+) -> Gauge:
+    metric = Gauge(name, documentation, label_names, callback)
+    REGISTRY.register(metric)
+    return metric
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    label_names: Labels = (),
+    buckets: Tuple[float, ...] = DEFAULT_BUCKETS,
+) -> Histogram:
+    metric = Histogram(name, documentation, label_names, buckets)
+    REGISTRY.register(metric)
+    return metric
+
+
+# the HTTP metrics are the same for the core and front servers
+HTTP_REQUEST_DURATION = histogram(
+    "http_server_request_duration_seconds",
+    "Time to handle an HTTP request, by route template",
+    ("method", "route", "status_code"),
+)
+HTTP_REQUESTS_IN_FLIGHT = gauge(
+    "http_server_requests_in_flight",
+    "HTTP requests being handled",
+    ("method",),
+)
+
+
+async def measure_request(request: Any, call_next: Callable[[Any], Awaitable[Any]]):
+    """`call_next` of an HTTP middleware, recorded in the HTTP metrics"""
+    HTTP_REQUESTS_IN_FLIGHT.inc(request.method)
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        HTTP_REQUESTS_IN_FLIGHT.dec(request.method)
+        # the route template, not the path, keeps the label count bounded
+        route = getattr(request.scope.get("route"), "path", "unmatched")
+        HTTP_REQUEST_DURATION.observe(
+            time.perf_counter() - started, request.method, route, str(status_code)
+        )
+
+
+def _sum(shards: List[Dict[Labels, float]]) -> List[Tuple[Labels, float]]:
+    totals: Dict[Labels, float] = {}
+    for shard in shards:
+        for labels, value in shard.items():
+            totals[labels] = totals.get(labels, 0.0) + value
+    return sorted(totals.items())
+
+
+def _format(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value))
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _escape_label(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
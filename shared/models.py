@@ -1,9 +1,9 @@
 import enum
 from datetime import datetime
-from typing import Optional, List
+from typing import AbstractSet, Annotated, ClassVar, Dict, Optional, List
 from uuid import UUID
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class LogSeverity(enum.StrEnum):
@@ -21,6 +21,40 @@ class LogsFilter(BaseModel):
     trace_id: Optional[UUID] = None
     commands_only: bool
     severity: List[LogSeverity]
+    date_from: Optional[datetime] = None  # inclusive
+    date_to: Optional[datetime] = None  # exclusive
+    # keyset of the last entry already read, newest first pages continue after
+    # it; before_id breaks ties between entries with the same timestamp
+    before: Optional[datetime] = None
+    before_id: Optional[int] = None
+
+    @field_validator("date_from", "date_to", "before")
+    @classmethod
+    def _to_local_time(cls, value: Optional[datetime]) -> Optional[datetime]:
+        # entries are stamped with naive local time, compare on the same clock
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)
+        return value
+
+    @model_validator(mode="after")
+    def _check_keyset(self) -> "LogsFilter":
+        if (self.before is None) != (self.before_id is None):
+            raise ValueError("before and before_id are only valid together")
+        return self
+
+    def matches(self, log_entry: "LogEntry") -> bool:
+        return (
+            log_entry.severity in self.severity
+            and (not self.trace_id or log_entry.trace_id == self.trace_id)
+            and (not self.commands_only or log_entry.command_info is not None)
+            and (not self.date_from or log_entry.timestamp >= self.date_from)
+            and (not self.date_to or log_entry.timestamp < self.date_to)
+            and (
+                not self.before
+                or (log_entry.timestamp, log_entry.entry_id)
+                < (self.before, self.before_id)
+            )
+        )
 
 
 class Paging(BaseModel):
@@ -37,6 +71,12 @@ class KeyType(enum.StrEnum):
         return [s.upper() for s in KeyType]
 
 
+class CertificateChangeType(enum.StrEnum):
+    CREATED = "created"
+    RENEWED = "renewed"
+    REVOKED = "revoked"
+
+
 class CommandInfo(BaseModel):
     command: str
     output: str
@@ -44,6 +84,26 @@ class CommandInfo(BaseModel):
     action: str
 
 
+class CommandSummary(BaseModel):
+    OUTPUT_PREVIEW_LENGTH: ClassVar[int] = 200
+
+    command: str
+    exit_code: int
+    action: str
+    output_preview: str
+    output_size: int
+
+    @classmethod
+    def of(cls, command_info: CommandInfo) -> "CommandSummary":
+        return cls(
+            command=command_info.command,
+            exit_code=command_info.exit_code,
+            action=command_info.action,
+            output_preview=command_info.output[: cls.OUTPUT_PREVIEW_LENGTH],
+            output_size=len(command_info.output.encode("utf-8")),
+        )
+
+
 class LogEntry(BaseModel):
     timestamp: datetime
     entry_id: int
@@ -51,3 +111,102 @@ class LogEntry(BaseModel):
     trace_id: UUID
     message: str
     command_info: Optional[CommandInfo] = None
+
+
+class LogEntryField(enum.StrEnum):
+    ENTRY_ID = "entry_id"
+    TIMESTAMP = "timestamp"
+    SEVERITY = "severity"
+    TRACE_ID = "trace_id"
+    MESSAGE = "message"
+    COMMAND_INFO = "command_info"
+
+
+class LogEntrySummary(BaseModel):
+    timestamp: datetime
+    entry_id: int
+    severity: LogSeverity
+    trace_id: UUID
+    message: str
+    command_info: Optional[CommandSummary] = None
+
+    @classmethod
+    def of(
+        cls,
+        log_entry: LogEntry,
+        fields: Optional[AbstractSet[LogEntryField]] = None,
+    ) -> "LogEntrySummary":
+        summary = cls(
+            timestamp=log_entry.timestamp,
+            entry_id=log_entry.entry_id,
+            severity=log_entry.severity,
+            trace_id=log_entry.trace_id,
+            message=log_entry.message,
+            command_info=(
+                CommandSummary.of(log_entry.command_info)
+                if log_entry.command_info
+                else None
+            ),
+        )
+        return summary if fields is None else summary.project(fields)
+
+    def project(self, fields: AbstractSet[LogEntryField]) -> "LogEntrySummary":
+        """Partial copy holding only `fields`; the other attributes stay unset."""
+        return LogEntrySummary.model_construct(
+            **{field.value: getattr(self, field.value) for field in fields}
+        )
+
+
+class StatsBucket(enum.StrEnum):
+    MINUTE = "minute"
+    HOUR = "hour"
+    DAY = "day"
+
+    def truncate(self, timestamp: datetime) -> datetime:
+        timestamp = timestamp.replace(second=0, microsecond=0)
+        if self in (StatsBucket.HOUR, StatsBucket.DAY):
+            timestamp = timestamp.replace(minute=0)
+        if self == StatsBucket.DAY:
+            timestamp = timestamp.replace(hour=0)
+        return timestamp
+
+
+class TimeBucketCount(BaseModel):
+    bucket_start: datetime
+    count: int
+
+
+class LogStats(BaseModel):
+    total: int
+    by_severity: Dict[LogSeverity, int]
+    by_action: Dict[str, int]
+    by_exit_code: Dict[int, int]
+    by_time: List[TimeBucketCount]  # oldest bucket first
+
+
+SampleRate = Annotated[float, Field(ge=0, le=1)]
+
+
+class LogPolicyConfig(BaseModel):
+    min_severity: LogSeverity = LogSeverity.DEBUG
+    # share of entries kept, severities and actions not listed keep everything
+    severity_sample_rates: Dict[LogSeverity, SampleRate] = {}
+    action_sample_rates: Dict[str, SampleRate] = {}
+    dedupe_window_seconds: float = Field(0, ge=0)  # 0 disables deduplication
+
+
+class LogPolicyStats(BaseModel):
+    sampled_out: Dict[LogSeverity, int]
+    suppressed: Dict[LogSeverity, int]
+
+
+class CacheStats(BaseModel):
+    hits: int
+    misses: int
+    size: int
+    capacity: int
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,70 @@
+import select
+import threading
+
+from shared.db_logger import DBLogger, LOG_NOTIFY_CHANNEL
+from shared.log_broadcaster import LogBroadcaster
+
+
+class PostgresLogListener:
+    """
+    Feeds a LogBroadcaster with entries written by other processes.
+
+    DBLogger sends a NOTIFY with the new entry ids on every insert on Postgres;
+    this listens on that channel from a background thread and publishes the
+    entries it did not publish itself.
+    """
+
+    POLL_TIMEOUT_SECONDS = 1.0
+    RECONNECT_DELAY_SECONDS = 5.0
+
+    def __init__(self, db_logger: DBLogger, broadcaster: LogBroadcaster):
+        self._db_logger = db_logger
+        self._broadcaster = broadcaster
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="pg-log-listener", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                self._listen()
+            except Exception:  # connection lost, retry after a pause
+                self._stopped.wait(self.RECONNECT_DELAY_SECONDS)
+
+    def _listen(self) -> None:
+        connection = self._db_logger.engine.raw_connection()
+        try:
+            dbapi_connection = connection.driver_connection
+            dbapi_connection.autocommit = True
+            with dbapi_connection.cursor() as cursor:
+                cursor.execute(f"LISTEN {LOG_NOTIFY_CHANNEL}")
+
+            while not self._stopped.is_set():
+                readable, _, _ = select.select(
+                    [dbapi_connection], [], [], self.POLL_TIMEOUT_SECONDS
+                )
+                if not readable:
+                    continue
+
+                dbapi_connection.poll()
+                while dbapi_connection.notifies:
+                    notify = dbapi_connection.notifies.pop(0)
+                    for entry_id in map(int, notify.payload.split(",")):
+                        self._publish(entry_id)
+        finally:
+            connection.invalidate()  # never hand a LISTENing connection back
+
+    def _publish(self, entry_id: int) -> None:
+        if self._broadcaster.has_published(entry_id):
+            return
+        log_entry = self._db_logger.get_log_entry(entry_id)
+        if log_entry:
+            self._broadcaster.publish(log_entry)
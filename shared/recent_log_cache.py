@@ -0,0 +1,97 @@
+import threading
+from collections import deque
+from typing import AbstractSet, Collection, Deque, Dict, List, Optional, Set
+from uuid import UUID
+
+from shared.models import (
+    CacheStats,
+    LogEntry,
+    LogEntryField,
+    LogEntrySummary,
+    LogsFilter,
+    Paging,
+)
+
+
+class RecentLogCache:
+    """
+    Ring buffer of the entries most recently logged by this process.
+
+    Every entry newer than the oldest cached one is in the buffer, so a page
+    that can be filled from it is exactly what the database would return. A
+    shorter result may continue in older entries and is a miss, except for
+    trace ids first seen by the cache and not evicted since: those traces are
+    known to be complete. `shared_trace_ids` are never treated as complete.
+    """
+
+    def __init__(self, capacity: int, shared_trace_ids: Collection[UUID] = ()):
+        self._capacity = capacity
+        self._shared_trace_ids = frozenset(shared_trace_ids)
+        self._lock = threading.Lock()
+        self._entries: Deque[LogEntrySummary] = deque()  # oldest first
+        self._trace_counts: Dict[UUID, int] = {}
+        self._evicted_traces: Set[UUID] = set()  # partly evicted, still cached
+        self._hits = 0
+        self._misses = 0
+
+    def add(self, log_entry: LogEntry) -> None:
+        if not self._capacity:
+            return
+
+        summary = LogEntrySummary.of(log_entry)
+        with self._lock:
+            self._entries.append(summary)
+            trace_id = summary.trace_id
+            self._trace_counts[trace_id] = self._trace_counts.get(trace_id, 0) + 1
+
+            if len(self._entries) > self._capacity:
+                evicted = self._entries.popleft().trace_id
+                self._trace_counts[evicted] -= 1
+                if self._trace_counts[evicted]:
+                    self._evicted_traces.add(evicted)
+                else:
+                    del self._trace_counts[evicted]
+                    self._evicted_traces.discard(evicted)
+
+    def get_logs(
+        self,
+        filters: LogsFilter,
+        paging: Paging,
+        fields: Optional[AbstractSet[LogEntryField]] = None,
+    ) -> Optional[List[LogEntrySummary]]:
+        """The requested page, newest first, or None if the database is needed"""
+        start = (paging.page - 1) * paging.page_size
+        end = start + paging.page_size
+
+        with self._lock:
+            matches = []
+            for summary in reversed(self._entries):
+                if filters.matches(summary):
+                    matches.append(summary)
+                    if len(matches) == end:
+                        break
+
+            if len(matches) < end and not self._has_whole_trace(filters.trace_id):
+                self._misses += 1
+                return None
+            self._hits += 1
+
+        page = matches[start:end]
+        return page if fields is None else [log.project(fields) for log in page]
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                size=len(self._entries),
+                capacity=self._capacity,
+            )
+
+    def _has_whole_trace(self, trace_id: Optional[UUID]) -> bool:
+        return (
+            trace_id is not None
+            and trace_id in self._trace_counts
+            and trace_id not in self._evicted_traces
+            and trace_id not in self._shared_trace_ids
+        )
@@ -0,0 +1,92 @@
+import re
+import secrets
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator, Optional
+
+from pydantic import BaseModel
+
+TRACEPARENT_HEADER = "traceparent"
+
+# version 00 of https://www.w3.org/TR/trace-context/#traceparent-header
+_TRACEPARENT = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+
+class TraceContext(BaseModel):
+    trace_id: uuid.UUID
+    span_id: str  # 16 lowercase hex digits
+    sampled: bool = True
+    parent_span_id: Optional[str] = None  # set for spans started in this process
+
+    @classmethod
+    def new(cls) -> "TraceContext":
+        return cls(trace_id=uuid.uuid4(), span_id=_new_span_id())
+
+    @classmethod
+    def parse(cls, traceparent: Optional[str]) -> Optional["TraceContext"]:
+        """None if the header is missing or malformed"""
+        match = _TRACEPARENT.match((traceparent or "").strip().lower())
+        if not match:
+            return None
+
+        trace_id, span_id, flags = match.groups()
+        if trace_id == _INVALID_TRACE_ID or span_id == _INVALID_SPAN_ID:
+            return None
+        return cls(
+            trace_id=uuid.UUID(trace_id),
+            span_id=span_id,
+            sampled=bool(int(flags, 16) & 1),
+        )
+
+    def child(self) -> "TraceContext":
+        return TraceContext(
+            trace_id=self.trace_id,
+            span_id=_new_span_id(),
+            sampled=self.sampled,
+            parent_span_id=self.span_id,
+        )
+
+    def to_traceparent(self) -> str:
+        flags = "01" if self.sampled else "00"
+        return f"00-{self.trace_id.hex}-{self.span_id}-{flags}"
+
+
+# a ContextVar follows each asyncio task and is copied into thread pool calls,
+# so concurrent requests on one thread never see each other's trace
+_current: ContextVar[Optional[TraceContext]] = ContextVar("trace_context", default=None)
+
+
+def get_current() -> Optional[TraceContext]:
+    return _current.get()
+
+
+def set_current(context: TraceContext) -> Token:
+    return _current.set(context)
+
+
+def reset_current(token: Token) -> None:
+    _current.reset(token)
+
+
+def get_current_trace_id() -> Optional[uuid.UUID]:
+    context = _current.get()
+    return context.trace_id if context else None
+
+
+@contextmanager
+def trace_scope(parent: Optional[TraceContext] = None) -> Iterator[TraceContext]:
+    """Continues the trace of `parent` in a new span, or starts a new trace"""
+    context = parent.child() if parent else TraceContext.new()
+    token = _current.set(context)
+    try:
+        yield context
+    finally:
+        _current.reset(token)
+
+
+def _new_span_id() -> str:
+    span_id = secrets.token_hex(8)
+    return span_id if span_id != _INVALID_SPAN_ID else _new_span_id()
@@ -0,0 +1,213 @@
+"""
+Timed spans, exported as OTLP/JSON lines (one ExportTraceServiceRequest per
+line, as read by the OpenTelemetry collector's otlpjsonfile receiver).
+
+Tracing is off until `configure` is called. While off, `span` returns a shared
+no-op and `traced` functions only pay for one extra call and a None check.
+"""
+
+import atexit
+import functools
+import inspect
+import json
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from shared import trace_context
+from shared.trace_context import TraceContext
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+_STATUS_ERROR = 2
+_SPAN_KIND_INTERNAL = 1
+_SPAN_KIND_SERVER = 2
+
+
+class SpanFileExporter:
+    FLUSH_INTERVAL_SECONDS = 1.0
+
+    def __init__(self, path: str, service_name: str):
+        self._path = path
+        self._resource = {
+            "attributes": [_attribute("service.name", service_name)],
+        }
+        self._spans: queue.SimpleQueue = queue.SimpleQueue()
+        self._closed = threading.Event()
+        self._writer = threading.Thread(
+            target=self._write_periodically, name="span-exporter", daemon=True
+        )
+        self._writer.start()
+
+    def export(self, span: Dict[str, Any]) -> None:
+        self._spans.put(span)
+
+    def close(self) -> None:
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._writer.join()
+        self._write_pending()
+
+    def _write_periodically(self) -> None:
+        while not self._closed.wait(self.FLUSH_INTERVAL_SECONDS):
+            self._write_pending()
+
+    def _write_pending(self) -> None:
+        spans: List[Dict[str, Any]] = []
+        while not self._spans.empty():
+            spans.append(self._spans.get_nowait())
+        if not spans:
+            return
+
+        request = {
+            "resourceSpans": [
+                {
+                    "resource": self._resource,
+                    "scopeSpans": [{"scope": {"name": __name__}, "spans": spans}],
+                }
+            ]
+        }
+        with open(self._path, "a", encoding="utf-8") as file:
+            file.write(json.dumps(request, separators=(",", ":")) + "\n")
+
+
+_exporter: Optional[SpanFileExporter] = None
+
+
+def configure(path: str, service_name: str) -> None:
+    global _exporter
+    shutdown()
+    _exporter = SpanFileExporter(path, service_name)
+    atexit.register(shutdown)
+
+
+def shutdown() -> None:
+    """Writes the spans still pending and turns tracing off"""
+    global _exporter
+    exporter, _exporter = _exporter, None
+    if exporter:
+        exporter.close()
+
+
+def is_enabled() -> bool:
+    return _exporter is not None
+
+
+class _NoopSpan:
+    def __enter__(self) -> "_NoopSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        return None
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class Span:
+    __slots__ = ("_name", "_attributes", "_scope", "_kind", "_token", "_start")
+
+    def __init__(
+        self,
+        name: str,
+        attributes: Optional[Dict[str, Any]],
+        scope: Optional[TraceContext],
+    ):
+        self._name = name
+        self._attributes = dict(attributes or {})
+        self._scope = scope
+        self._kind = _SPAN_KIND_SERVER if scope else _SPAN_KIND_INTERNAL
+        self._token = None
+
+    def __enter__(self) -> "Span":
+        if self._scope is None:
+            current = trace_context.get_current()
+            self._scope = current.child() if current else TraceContext.new()
+            self._token = trace_context.set_current(self._scope)
+        self._start = time.time_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback) -> None:
+        end = time.time_ns()
+        if self._token is not None:
+            trace_context.reset_current(self._token)
+
+        exporter = _exporter
+        if exporter is None:
+            return
+
+        span = {
+            "traceId": self._scope.trace_id.hex,
+            "spanId": self._scope.span_id,
+            "name": self._name,
+            "kind": self._kind,
+            "startTimeUnixNano": str(self._start),
+            "endTimeUnixNano": str(end),
+            "attributes": [
+                _attribute(key, value) for key, value in self._attributes.items()
+            ],
+        }
+        if self._scope.parent_span_id:
+            span["parentSpanId"] = self._scope.parent_span_id
+        if exc is not None:
+            span["status"] = {"code": _STATUS_ERROR, "message": repr(exc)}
+        exporter.export(span)
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self._attributes[key] = value
+
+
+def span(
+    name: str,
+    attributes: Optional[Dict[str, Any]] = None,
+    scope: Optional[TraceContext] = None,
+) -> Span | _NoopSpan:
+    """
+    Times the block as a child of the current span. With `scope`, records the
+    already entered trace scope itself instead, e.g. for a server request.
+    """
+    if _exporter is None:
+        return _NOOP_SPAN
+    return Span(name, attributes, scope)
+
+
+def traced(name: str) -> Callable[[_F], _F]:
+    def decorate(func: _F) -> _F:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _exporter is None:
+                    return await func(*args, **kwargs)
+                with Span(name, None, None):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with Span(name, None, None):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def _attribute(key: str, value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        any_value = {"boolValue": value}
+    elif isinstance(value, int):
+        any_value = {"intValue": str(value)}  # int64 is a string in proto3 JSON
+    elif isinstance(value, float):
+        any_value = {"doubleValue": value}
+    else:
+        any_value = {"stringValue": str(value)}
+    return {"key": key, "value": any_value}
@@ -0,0 +1,68 @@
+"""Log entries and a counting DBLogger shared by the log backend tests"""
+
+import threading
+from datetime import datetime
+from typing import Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+
+from shared.db_logger import DBLogger
+from shared.models import CommandInfo, LogEntry, LogSeverity
+
+START = datetime(2024, 1, 1, 10, 0, 0)
+
+
+def log_entry(
+    entry_id: int,
+    timestamp: Optional[datetime] = None,
+    severity: LogSeverity = LogSeverity.INFO,
+    trace_id: Optional[UUID] = None,
+    action: Optional[str] = None,
+    exit_code: int = 0,
+    output: str = "test output",
+) -> LogEntry:
+    """Stamped now unless `timestamp` is given, with a command if `action` is"""
+    return LogEntry(
+        entry_id=entry_id,
+        timestamp=timestamp or datetime.now(),
+        severity=severity,
+        message=f"Test log message {entry_id}",
+        trace_id=trace_id or uuid4(),
+        command_info=(
+            CommandInfo(
+                command="test_command",
+                output=output,
+                exit_code=exit_code,
+                action=action,
+            )
+            if action
+            else None
+        ),
+    )
+
+
+class CountingDBLogger(DBLogger):
+    """SQLite has no sequences, ids are handed out by a counter instead"""
+
+    def __init__(self, path: Optional[str] = None):
+        super().__init__(is_test=True)
+        if path is None:  # in memory, every session shares the one connection
+            engine = create_engine(
+                "sqlite://",
+                connect_args={"check_same_thread": False},
+                poolclass=StaticPool,
+            )
+        else:  # a file, concurrent sessions need their own connections
+            engine = create_engine(
+                f"sqlite:///{path}", connect_args={"check_same_thread": False}
+            )
+        self._connect(engine)
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def get_next_entry_id(self) -> int:
+        with self._lock:
+            self._next_id += 1
+            return self._next_id - 1
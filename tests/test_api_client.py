@@ -0,0 +1,188 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from typing import List
+from unittest.mock import Mock
+
+import httpx
+import uvicorn
+from fastapi.testclient import TestClient
+
+import front.main
+from core.api_server import APIServer, _bind_unix_socket
+from core.certificate_manager_mock import CertificateManagerMock
+from front.api_client import APIClient
+from shared.api_models import CertificateGenerateRequest
+from shared.models import KeyType
+
+
+class TestAPIClient(unittest.IsolatedAsyncioTestCase):
+    def _client(self, responses: List, retries: int = 2) -> APIClient:
+        self.requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            response = responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+
+        return APIClient(
+            "http://core",
+            retries=retries,
+            retry_backoff=0.001,
+            transport=httpx.MockTransport(handler),
+        )
+
+    async def test_read_is_retried(self):
+        api_client = self._client(
+            [
+                httpx.ConnectError("refused"),
+                httpx.Response(503),
+                httpx.Response(200, json=[]),
+            ]
+        )
+        self.assertEqual(await api_client.list_certificates(), [])
+        self.assertEqual(len(self.requests), 3)
+        await api_client.close()
+
+    async def test_logs_are_retried(self):
+        api_client = self._client([httpx.Response(502), httpx.Response(200, json=[])])
+        self.assertEqual(await api_client.get_logs(), [])
+        self.assertEqual(len(self.requests), 2)
+        await api_client.close()
+
+    async def test_retries_are_bounded(self):
+        api_client = self._client([httpx.Response(503)] * 2, retries=1)
+        with self.assertRaises(httpx.HTTPStatusError):
+            await api_client.list_certificates()
+        await api_client.close()
+
+        api_client = self._client([httpx.ReadTimeout("slow")] * 2, retries=1)
+        with self.assertRaises(httpx.ReadTimeout):
+            await api_client.list_certificates()
+        self.assertEqual(len(self.requests), 2)
+        await api_client.close()
+
+    async def test_commands_are_not_retried(self):
+        api_client = self._client([httpx.Response(503), httpx.Response(200)])
+        with self.assertRaises(httpx.HTTPStatusError):
+            await api_client.generate_certificate(
+                CertificateGenerateRequest(
+                    keyName="test", keyType=KeyType.RSA, duration=3600
+                )
+            )
+        self.assertEqual(len(self.requests), 1)
+        self.assertEqual(
+            self.requests[0].extensions["timeout"]["read"],
+            APIClient.COMMAND_TIMEOUT.read,
+        )
+        await api_client.close()
+
+
+class TestUnixSocket(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "core.sock")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_socket_permissions(self):
+        open(self.path, "w").close()
+        with self.assertRaises(OSError):  # not a stale socket, left alone
+            _bind_unix_socket(self.path, 0o600)
+        os.unlink(self.path)
+
+        _bind_unix_socket(self.path, 0o600).close()
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o600)
+        _bind_unix_socket(self.path, 0o660).close()  # replaces the stale one
+        self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o660)
+
+    async def test_client_over_unix_socket(self):
+        api_server = APIServer(CertificateManagerMock(), Mock(), "1.0.0", 8000)
+        sock = _bind_unix_socket(self.path, APIServer.UDS_MODE)
+        server = uvicorn.Server(uvicorn.Config(api_server.App, log_level="warning"))
+        thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]})
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+
+        api_client = APIClient("http://core", uds=self.path)
+        try:
+            self.assertTrue(await api_client.list_certificates())
+        finally:
+            await api_client.close()
+            server.should_exit = True
+            thread.join()
+            sock.close()
+
+
+class TestFrontAPIClient(unittest.TestCase):
+    def test_client_is_shared_by_requests(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            requests.append(request)
+            return httpx.Response(200, json=[])
+
+        with TestClient(front.main.app) as client:
+            api_client = front.main.app.state.api_client
+            api_client.client._transport = httpx.MockTransport(handler)
+
+            self.assertEqual(client.get("/logs").status_code, 200)
+            self.assertEqual(client.get("/logs").status_code, 200)
+            self.assertIs(front.main.app.state.api_client, api_client)
+            self.assertEqual(len(requests), 2)
+        self.assertTrue(api_client.client.is_closed)
+
+    def test_mutation_invalidates_pages(self):
+        requests = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.startswith("/certificates"):
+                requests.append(request.url.path)
+            if request.url.path == "/certificates/revoke":
+                return httpx.Response(
+                    200,
+                    json={
+                        "success": True,
+                        "message": "Certificate revoked",
+                        "logEntryId": 1,
+                        "certificateId": "cert1",
+                        "revocationDate": "2024-01-01T00:00:00",
+                    },
+                )
+            if request.url.path == "/logs/stats":  # a degraded page is not cached
+                return httpx.Response(
+                    200,
+                    json={
+                        "total": 0,
+                        "bucket": "hour",
+                        "bySeverity": {},
+                        "byAction": {},
+                        "byExitCode": {},
+                        "byTime": [],
+                    },
+                )
+            return httpx.Response(200, json=[])
+
+        with TestClient(front.main.app) as client:
+            api_client = front.main.app.state.api_client
+            api_client.client._transport = httpx.MockTransport(handler)
+
+            client.get("/")
+            client.get("/")
+            self.assertEqual(requests, ["/certificates"])
+
+            client.portal.call(api_client.revoke_certificate, "cert1")
+            client.get("/")
+            self.assertEqual(
+                requests, ["/certificates", "/certificates/revoke", "/certificates"]
+            )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,36 @@
+import asyncio
+import csv
+import io
+import marshal
 import unittest
-from datetime import datetime, timedelta
-from unittest.mock import Mock
-from uuid import UUID
+from datetime import datetime, timedelta, timezone
+from logging import Logger as PythonLogger
+from unittest.mock import Mock, patch
+from uuid import UUID, uuid4
 
 from fastapi.testclient import TestClient
 
 from core.api_server import APIServer
+from shared.api_models import LogEntryDTO
+from shared.db_logger_mock import DBLoggerMock
+from shared.log_broadcaster import LogBroadcaster
 from core.certificate_manager import CertificateManager, Certificate, CertificateResult
+from shared.log_policy import LogPolicy
 from shared.logger import Logger
-from shared.models import LogSeverity, CommandInfo
+from shared.trace_context import TraceContext
+from shared.models import (
+    CacheStats,
+    LogEntry,
+    LogSeverity,
+    CommandInfo,
+    CommandSummary,
+    LogEntryField,
+    LogEntrySummary,
+    LogsFilter,
+    LogStats,
+    StatsBucket,
+    TimeBucketCount,
+)
 
 
 class TestAPIServer(unittest.TestCase):
@@ -19,6 +41,7 @@ class TestAPIServer(unittest.TestCase):
             self.cert_manager_mock, self.logger_mock, "1.0.0", 8000
         )
         self.client = TestClient(self.api_server.App)
+        self.admin = {"X-Admin-Token": "secret"}
 
     def test_list_certificates_preview(self):
         self.cert_manager_mock.preview_list_certificates.return_value = (
@@ -174,11 +197,12 @@ class TestAPIServer(unittest.TestCase):
                 severity=LogSeverity.ERROR,
                 message="Test log entry 2",
                 trace_id=UUID("87654321-4321-8765-4321-876543210987"),
-                command_info=CommandInfo(
+                command_info=CommandSummary(
                     command="test command",
-                    output="test output",
                     exit_code=1,
                     action="TEST",
+                    output_preview="test output",
+                    output_size=11,
                 ),
             ),
         ]
@@ -197,6 +221,434 @@ class TestAPIServer(unittest.TestCase):
         self.assertEqual(len(response.json()), 2)
         self.assertEqual(response.json()[0]["entryId"], 1)
         self.assertEqual(response.json()[1]["entryId"], 2)
+        self.assertEqual(
+            response.json()[1]["commandInfo"],
+            {
+                "command": "test command",
+                "exitCode": 1,
+                "action": "TEST",
+                "outputPreview": "test output",
+                "outputSize": 11,
+            },
+        )
+
+    def test_list_certificates_sparse_fields(self):
+        self.cert_manager_mock.list_certificates.return_value = [
+            Certificate(
+                id="cert1",
+                name="Cert 1",
+                status="valid",
+                expiration_date=datetime.now() + timedelta(days=30),
+            )
+        ]
+        response = self.client.get(
+            "/certificates?preview=false&fields=id&fields=status"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), [{"id": "cert1", "status": "valid"}])
+
+    def test_get_logs_sparse_fields(self):
+        timestamp = datetime(2024, 1, 1, 12, 0, 0)
+        self.logger_mock.get_logs.return_value = [
+            LogEntrySummary.model_construct(
+                entry_id=1, severity=LogSeverity.INFO, timestamp=timestamp
+            )
+        ]
+        response = self.client.post(
+            "/logs",
+            json={
+                "traceId": None,
+                "commandsOnly": False,
+                "severity": ["INFO"],
+                "page": 1,
+                "pageSize": 10,
+                "fields": ["entryId", "severity", "timestamp"],
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            [{"entryId": 1, "severity": "INFO", "timestamp": "2024-01-01T12:00:00"}],
+        )
+        self.assertEqual(
+            self.logger_mock.get_logs.call_args[0][2],
+            {LogEntryField.ENTRY_ID, LogEntryField.SEVERITY, LogEntryField.TIMESTAMP},
+        )
+
+    @patch.object(PythonLogger, "log")
+    def test_logs_with_offset_dates(self, _):
+        trace_id_provider = Mock()
+        trace_id_provider.get_current.return_value = None
+        logger = Logger(trace_id_provider, DBLoggerMock())
+        logger.log(LogSeverity.INFO, "Test log entry")
+        client = TestClient(APIServer(Mock(), logger, "1.0.0", 8000).App)
+        before = (datetime.now(timezone.utc) - timedelta(hours=1)).isoformat()
+        after = (datetime.now(timezone.utc) + timedelta(hours=1)).isoformat()
+
+        response = client.post(
+            "/logs",
+            json={
+                "traceId": None,
+                "commandsOnly": False,
+                "severity": ["INFO"],
+                "dateFrom": before,
+                "dateTo": after,
+                "page": 1,
+                "pageSize": 10,
+            },
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()), 1)
+
+        params = {"dateFrom": after}
+        response = client.get("/logs/stats", params=params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["total"], 0)
+        response = client.get("/logs/export", params=params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.text, "")
+
+    def test_logs_keyset(self):
+        self.logger_mock.get_logs.return_value = []
+        request = {
+            "traceId": None,
+            "commandsOnly": False,
+            "severity": ["INFO"],
+            "page": 1,
+            "pageSize": 10,
+            "before": "2024-01-01T12:00:00",
+        }
+        self.assertEqual(self.client.post("/logs", json=request).status_code, 422)
+
+        response = self.client.post("/logs", json={**request, "beforeId": 7})
+        self.assertEqual(response.status_code, 200)
+        filters = self.logger_mock.get_logs.call_args[0][0]
+        self.assertEqual(filters.before, datetime(2024, 1, 1, 12))
+        self.assertEqual(filters.before_id, 7)
+
+    def test_log_stream_skips_invalid_entry(self):
+        async def events():
+            broadcaster = LogBroadcaster(buffer_size=10)
+            self.logger_mock.broadcaster = broadcaster
+            subscription = broadcaster.subscribe(
+                LogsFilter(severity=list(LogSeverity), commands_only=False)
+            )
+            for entry_id in [-1, 1]:  # -1 fails LogEntrySummaryDTO validation
+                broadcaster.publish(
+                    LogEntry(
+                        entry_id=entry_id,
+                        timestamp=datetime.now(),
+                        severity=LogSeverity.INFO,
+                        message="Test log entry",
+                        trace_id=uuid4(),
+                    )
+                )
+            stream = self.api_server._log_events(subscription)
+            try:
+                return await anext(stream)
+            finally:
+                await stream.aclose()
+
+        self.assertTrue(asyncio.run(events()).startswith("id: 1\n"))
+
+    def test_get_log_stats(self):
+        bucket_start = datetime(2024, 1, 1, 12, 0, 0)
+        self.logger_mock.get_log_stats.return_value = LogStats(
+            total=3,
+            by_severity={LogSeverity.INFO: 2, LogSeverity.ERROR: 1},
+            by_action={"RENEW_CERT": 1},
+            by_exit_code={1: 1},
+            by_time=[TimeBucketCount(bucket_start=bucket_start, count=3)],
+        )
+        response = self.client.get("/logs/stats?bucket=day&severity=INFO")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "total": 3,
+                "bucket": "day",
+                "bySeverity": {"INFO": 2, "ERROR": 1},
+                "byAction": {"RENEW_CERT": 1},
+                "byExitCode": {"1": 1},
+                "byTime": [{"bucketStart": "2024-01-01T12:00:00", "count": 3}],
+            },
+        )
+        filters, bucket = self.logger_mock.get_log_stats.call_args[0]
+        self.assertEqual(filters.severity, [LogSeverity.INFO])
+        self.assertEqual(bucket, StatsBucket.DAY)
+
+    def _export_logs(self):
+        return [
+            LogEntry(
+                entry_id=1,
+                timestamp=datetime(2024, 1, 1, 12, 0, 0),
+                severity=LogSeverity.INFO,
+                message="Test log entry 1",
+                trace_id=UUID("12345678-1234-5678-1234-567812345678"),
+                command_info=None,
+            ),
+            LogEntry(
+                entry_id=2,
+                timestamp=datetime(2024, 1, 1, 12, 1, 0),
+                severity=LogSeverity.ERROR,
+                message="Test, log entry 2",
+                trace_id=UUID("87654321-4321-8765-4321-876543210987"),
+                command_info=CommandInfo(
+                    command="test command",
+                    output="line 1\nline 2",
+                    exit_code=1,
+                    action="TEST",
+                ),
+            ),
+        ]
+
+    def test_export_logs_ndjson(self):
+        self.logger_mock.iter_logs.return_value = iter(self._export_logs())
+        self.api_server.EXPORT_ROWS_PER_CHUNK = 1
+
+        response = self.client.get("/logs/export?severity=INFO&severity=ERROR")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/x-ndjson")
+        lines = response.text.splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(LogEntryDTO.model_validate_json(lines[0]).entryId, 1)
+        self.assertEqual(
+            LogEntryDTO.model_validate_json(lines[1]).commandInfo.output,
+            "line 1\nline 2",
+        )
+        filters = self.logger_mock.iter_logs.call_args[0][0]
+        self.assertEqual(filters.severity, [LogSeverity.INFO, LogSeverity.ERROR])
+
+    def test_export_logs_csv(self):
+        self.logger_mock.iter_logs.return_value = iter(self._export_logs())
+
+        response = self.client.get("/logs/export?format=csv")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/csv"))
+        self.assertIn("logs.csv", response.headers["content-disposition"])
+        rows = list(csv.reader(io.StringIO(response.text)))
+        self.assertEqual(rows[0][:3], ["entryId", "timestamp", "severity"])
+        self.assertEqual(rows[1][0], "1")
+        self.assertEqual(rows[2][4], "Test, log entry 2")
+        self.assertEqual(rows[2][-1], "line 1\nline 2")
+
+    def test_log_policy_requires_admin_token(self):
+        self.assertEqual(self.client.get("/admin/log-policy").status_code, 403)
+
+        self.api_server._admin_token = "secret"
+        response = self.client.get(
+            "/admin/log-policy", headers={"X-Admin-Token": "wrong"}
+        )
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.content, b"Invalid admin token")
+
+    def test_set_log_policy(self):
+        self.api_server._admin_token = "secret"
+        self.logger_mock.policy = LogPolicy()
+        self.logger_mock.set_policy.side_effect = self.logger_mock.policy.update
+
+        response = self.client.put(
+            "/admin/log-policy",
+            headers={"X-Admin-Token": "secret"},
+            json={
+                "minSeverity": "INFO",
+                "severitySampleRates": {"INFO": 0.1},
+                "dedupeWindowSeconds": 5,
+            },
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {
+                "policy": {
+                    "minSeverity": "INFO",
+                    "severitySampleRates": {"INFO": 0.1},
+                    "actionSampleRates": {},
+                    "dedupeWindowSeconds": 5,
+                },
+                "sampledOut": {},
+                "suppressed": {},
+            },
+        )
+        self.assertEqual(self.logger_mock.policy.config.min_severity, LogSeverity.INFO)
+
+    def test_get_log_cache_stats(self):
+        self.api_server._admin_token = "secret"
+        self.logger_mock.get_recent_cache_stats.return_value = CacheStats(
+            hits=3, misses=1, size=10, capacity=1000
+        )
+        response = self.client.get(
+            "/admin/log-cache", headers={"X-Admin-Token": "secret"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json(),
+            {"hits": 3, "misses": 1, "hitRatio": 0.75, "size": 10, "capacity": 1000},
+        )
+
+    def test_set_log_policy_rejects_invalid_rate(self):
+        self.api_server._admin_token = "secret"
+        response = self.client.put(
+            "/admin/log-policy",
+            headers={"X-Admin-Token": "secret"},
+            json={"severitySampleRates": {"INFO": 2}},
+        )
+        self.assertEqual(response.status_code, 422)
+
+    def test_profile_request(self):
+        self.api_server._admin_token = "secret"
+        self.logger_mock.get_log_entry.return_value = None
+
+        response = self.client.get("/logs/single?logId=1", headers={"X-Profile": "1"})
+        self.assertEqual(
+            self.client.get("/admin/profiles", headers=self.admin).json(), []
+        )
+
+        response = self.client.get(
+            "/logs/single?logId=1", headers={"X-Profile": "1", **self.admin}
+        )
+        context = TraceContext.parse(response.headers["traceparent"])
+        trace_id = context.trace_id
+
+        profiles = self.client.get("/admin/profiles", headers=self.admin).json()
+        self.assertEqual(len(profiles), 1)
+        self.assertEqual(profiles[0]["traceId"], str(trace_id))
+        self.assertEqual(profiles[0]["spanId"], context.span_id)
+        self.assertEqual(profiles[0]["path"], "/logs/single")
+
+        # a second call of the same page load, under the same trace
+        response = self.client.get(
+            "/logs/single?logId=2",
+            headers={
+                "X-Profile": "1",
+                "traceparent": response.headers["traceparent"],
+                **self.admin,
+            },
+        )
+        second = TraceContext.parse(response.headers["traceparent"])
+        self.assertEqual(second.trace_id, trace_id)
+        profiles = self.client.get("/admin/profiles", headers=self.admin).json()
+        self.assertEqual(
+            [profile["spanId"] for profile in profiles],
+            [second.span_id, context.span_id],
+        )
+        response = self.client.get(
+            f"/admin/profiles/{trace_id}?spanId={context.span_id}&format=text",
+            headers=self.admin,
+        )
+        self.assertIn("function calls", response.text)
+
+        response = self.client.get(f"/admin/profiles/{trace_id}", headers=self.admin)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["content-type"], "application/octet-stream")
+        self.assertIsInstance(marshal.loads(response.content), dict)
+
+        response = self.client.get(
+            f"/admin/profiles/{trace_id}?format=text", headers=self.admin
+        )
+        self.assertIn("function calls", response.text)
+
+        response = self.client.get(f"/admin/profiles/{uuid4()}", headers=self.admin)
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_log_entry_not_modified(self):
+        self.logger_mock.get_log_entry.return_value = LogEntry(
+            entry_id=1,
+            timestamp=datetime.now(),
+            severity=LogSeverity.INFO,
+            trace_id=UUID("12345678-1234-5678-1234-567812345678"),
+            message="Test log",
+        )
+        response = self.client.get("/logs/single?logId=1")
+        etag = response.headers["ETag"]
+
+        response = self.client.get(
+            "/logs/single?logId=1", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(response.content, b"")
+
+    def test_list_certificates_etag_follows_changes(self):
+        self.cert_manager_mock.list_certificates.return_value = []
+        etag = self.client.get("/certificates?preview=false").headers["ETag"]
+        sparse = self.client.get("/certificates?preview=false&fields=id")
+
+        self.assertNotEqual(sparse.headers["ETag"], etag)
+        self.assertEqual(
+            self.client.get(
+                "/certificates?preview=false", headers={"If-None-Match": etag}
+            ).status_code,
+            304,
+        )
+
+        self.cert_manager_mock.revoke_certificate.return_value = CertificateResult(
+            success=True,
+            message="Certificate revoked",
+            log_entry_id=1,
+            certificate_id="cert1",
+            revocation_date=datetime.now(),
+        )
+        self.client.post("/certificates/revoke?certId=cert1&preview=false")
+        response = self.client.get(
+            "/certificates?preview=false", headers={"If-None-Match": etag}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+
+    def test_certificate_changes(self):
+        self.cert_manager_mock.list_certificates.return_value = []
+        listing = self.client.get("/certificates?preview=false")
+        version = listing.headers["X-Certificates-Version"]
+        etag = listing.headers["ETag"]
+        self.assertEqual(
+            self.client.get(
+                "/certificates?preview=false", headers={"If-None-Match": etag}
+            ).headers["X-Certificates-Version"],
+            version,
+        )
+
+        self.cert_manager_mock.revoke_certificate.return_value = CertificateResult(
+            success=True,
+            message="Certificate revoked",
+            log_entry_id=1,
+            certificate_id="cert1",
+            revocation_date=datetime(2024, 1, 1),
+        )
+        self.cert_manager_mock.preview_revoke_certificate.return_value = "step-ca"
+        self.client.post("/certificates/revoke?certId=cert1&preview=false")
+        self.client.post("/certificates/revoke?certId=cert1&preview=true")
+
+        response = self.client.get(f"/certificates/changes?since={version}")
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.json()["resyncRequired"])
+        self.assertNotEqual(response.json()["version"], version)
+        changes = response.json()["changes"]
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(changes[0]["changeType"], "revoked")
+        self.assertEqual(changes[0]["certificateId"], "cert1")
+        self.assertEqual(changes[0]["revocationDate"], "2024-01-01T00:00:00")
+
+    def test_certificate_changes_invalid_token(self):
+        response = self.client.get("/certificates/changes?since=abc.def")
+        self.assertEqual(response.status_code, 400)
+
+    def test_metrics(self):
+        self.logger_mock.get_log_entry.return_value = None
+        self.client.get("/logs/single?logId=1")
+
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.headers["content-type"].startswith("text/plain"))
+        self.assertIn(
+            'http_server_request_duration_seconds_count{method="GET",'
+            + 'route="/logs/single",status_code="404"}',
+            response.text,
+        )
+        self.assertIn('http_server_requests_in_flight{method="GET"} 1.0', response.text)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+import os
+import tempfile
+import unittest
+
+from core.certificate_change_log import CertificateChangeLog
+from shared.models import CertificateChangeType
+
+
+class TestCertificateChangeLog(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "changes.jsonl")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _record(self, change_log: CertificateChangeLog, count: int) -> None:
+        for index in range(count):
+            change_log.record(CertificateChangeType.CREATED, f"cert{index}")
+
+    def test_changes_since(self):
+        change_log = CertificateChangeLog()
+        start = change_log.version
+        change_log.record(
+            CertificateChangeType.CREATED, "cert1", certificate_name="Cert 1"
+        )
+        middle = change_log.version
+        change_log.record(CertificateChangeType.REVOKED, "cert1")
+
+        changes = change_log.changes_since(start)
+        self.assertFalse(changes.resync_required)
+        self.assertEqual(changes.version, change_log.version)
+        self.assertEqual(
+            [(c.change_type, c.certificate_id) for c in changes.changes],
+            [
+                (CertificateChangeType.CREATED, "cert1"),
+                (CertificateChangeType.REVOKED, "cert1"),
+            ],
+        )
+        self.assertEqual(changes.changes[0].certificate_name, "Cert 1")
+
+        changes = change_log.changes_since(middle)
+        self.assertEqual([c.version for c in changes.changes], [2])
+        self.assertEqual(change_log.changes_since(change_log.version).changes, [])
+
+    def test_resync_when_too_old(self):
+        change_log = CertificateChangeLog(capacity=2)
+        start = change_log.version
+        self._record(change_log, 2)
+        self.assertFalse(change_log.changes_since(start).resync_required)
+
+        self._record(change_log, 1)
+        changes = change_log.changes_since(start)
+        self.assertTrue(changes.resync_required)
+        self.assertEqual(changes.changes, [])
+        self.assertEqual(changes.version, change_log.version)
+
+    def test_resync_for_unknown_token(self):
+        change_log = CertificateChangeLog()
+        other = CertificateChangeLog()
+        self._record(other, 3)
+
+        self.assertTrue(change_log.changes_since(other.version).resync_required)
+        self.assertTrue(change_log.changes_since("0").resync_required)
+
+    def test_invalid_token(self):
+        with self.assertRaises(ValueError):
+            CertificateChangeLog().changes_since("abc.def")
+
+    def test_persisted_fallback(self):
+        change_log = CertificateChangeLog(self.path, capacity=2)
+        start = change_log.version
+        self._record(change_log, 5)
+
+        changes = change_log.changes_since(start)
+        self.assertFalse(changes.resync_required)
+        self.assertEqual([c.version for c in changes.changes], [1, 2, 3, 4, 5])
+
+    def test_reload(self):
+        change_log = CertificateChangeLog(self.path, capacity=2)
+        start = change_log.version
+        self._record(change_log, 3)
+
+        reloaded = CertificateChangeLog(self.path, capacity=2)
+        self.assertEqual(reloaded.version, change_log.version)
+        self.assertEqual(len(reloaded.changes_since(start).changes), 3)
+
+        reloaded.record(CertificateChangeType.RENEWED, "cert0")
+        changes = reloaded.changes_since(change_log.version)
+        self.assertEqual([c.version for c in changes.changes], [4])
+
+    def test_reload_skips_torn_line(self):
+        change_log = CertificateChangeLog(self.path)
+        start = change_log.version
+        self._record(change_log, 2)
+        with open(self.path, "a", encoding="utf-8") as file:
+            file.write('{"version": 3, "change')
+
+        reloaded = CertificateChangeLog(self.path)
+        self.assertEqual(len(reloaded.changes_since(start).changes), 2)
+
+    def test_compaction(self):
+        change_log = CertificateChangeLog(self.path, capacity=1, persisted_capacity=3)
+        start = change_log.version
+        self._record(change_log, 6)
+
+        with open(self.path, encoding="utf-8") as file:
+            self.assertEqual(len(file.readlines()), 1 + 3)
+        self.assertTrue(change_log.changes_since(start).resync_required)
+
+        changes = change_log.changes_since(start.replace(".0", ".3"))
+        self.assertEqual([c.version for c in changes.changes], [4, 5, 6])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,14 +1,28 @@
 import unittest
-from datetime import datetime
+from datetime import datetime, timedelta
 from random import random
 from uuid import uuid4
 
-from sqlalchemy import create_engine
+from sqlalchemy import JSON, Text, cast, create_engine, select, text
 from sqlalchemy.orm import sessionmaker
 
 # noinspection PyProtectedMember
-from shared.db_logger import DBLogger, _Base as Base, LogEntryModel
-from shared.models import LogEntry, LogsFilter, Paging, LogSeverity, CommandInfo
+from shared.db_logger import (
+    DBLogger,
+    _Base as Base,
+    LogEntryModel,
+    CommandOutputModel,
+)
+from shared.models import (
+    LogEntry,
+    LogEntryField,
+    LogsFilter,
+    Paging,
+    LogSeverity,
+    CommandInfo,
+    CommandSummary,
+    StatsBucket,
+)
 
 
 class TestDBLogger(unittest.TestCase):
@@ -23,6 +37,32 @@ class TestDBLogger(unittest.TestCase):
         self.db_logger.engine = self.engine
         self.db_logger.Session = self.Session
 
+    def test_indexes_are_added_to_existing_table(self):
+        engine = create_engine("sqlite:///:memory:")
+        with engine.begin() as connection:
+            connection.execute(
+                text(
+                    "CREATE TABLE log_entries (id INTEGER PRIMARY KEY,"
+                    + " timestamp DATETIME, severity VARCHAR, message VARCHAR,"
+                    + " trace_id VARCHAR, command_info JSON)"
+                )
+            )
+
+        for _ in range(2):  # and left alone once they exist
+            DBLogger(is_test=True)._connect(engine)
+
+        with engine.connect() as connection:
+            indexes = connection.execute(
+                text(
+                    "SELECT name FROM sqlite_master"
+                    + " WHERE type = 'index' AND tbl_name = 'log_entries'"
+                )
+            ).scalars()
+            self.assertEqual(
+                set(indexes),
+                {index.name for index in LogEntryModel.__table__.indexes},
+            )
+
     def test_insert_log(self):
         timestamp = datetime.now()
         trace_id = uuid4()
@@ -50,8 +90,115 @@ class TestDBLogger(unittest.TestCase):
             self.assertEqual(result.message, "Test log message")
             self.assertEqual(result.trace_id, str(trace_id))
             self.assertEqual(
-                CommandInfo.model_validate(result.command_info), command_info
+                CommandSummary.model_validate(result.command_info),
+                CommandSummary.of(command_info),
+            )
+            self.assertIsNotNone(session.get(CommandOutputModel, 1))
+
+    def test_command_output_is_stored_separately(self):
+        output = "certificate line\n" * 1000
+        command_info = CommandInfo(
+            command="step-ca certificate", output=output, exit_code=0, action="TEST"
+        )
+        self.db_logger.insert_log(
+            LogEntry(
+                entry_id=1,
+                timestamp=datetime.now(),
+                severity=LogSeverity.INFO,
+                message="Big output",
+                trace_id=uuid4(),
+                command_info=command_info,
+            )
+        )
+
+        with self.Session() as session:
+            self.assertNotIn("output", session.get(LogEntryModel, 1).command_info)
+            stored = session.get(CommandOutputModel, 1).output
+            self.assertLess(len(stored), len(output))
+
+        filters = LogsFilter(severity=[LogSeverity.INFO], commands_only=True)
+        summary = self.db_logger.get_logs(filters, Paging(page=1, page_size=10))[0]
+        self.assertEqual(summary.command_info.output_size, len(output))
+        self.assertEqual(
+            summary.command_info.output_preview,
+            output[: CommandSummary.OUTPUT_PREVIEW_LENGTH],
+        )
+
+        self.assertEqual(self.db_logger.get_log_entry(1).command_info, command_info)
+
+    def _insert_legacy_row(self, entry_id: int) -> None:
+        # written by the ORM before none_as_null, which stored JSON null
+        with self.Session() as session:
+            session.add(
+                LogEntryModel(
+                    id=entry_id,
+                    timestamp=datetime.now(),
+                    severity=LogSeverity.INFO,
+                    message="Legacy row",
+                    trace_id=str(uuid4()),
+                    command_info=JSON.NULL,
+                )
             )
+            session.commit()
+
+    def test_legacy_json_null_command_info(self):
+        self._insert_legacy_row(1)
+
+        filters = LogsFilter(severity=[LogSeverity.INFO], commands_only=False)
+        paging = Paging(page=1, page_size=10)
+        self.assertIsNone(self.db_logger.get_logs(filters, paging)[0].command_info)
+        partial = self.db_logger.get_logs(filters, paging, {LogEntryField.COMMAND_INFO})
+        self.assertIsNone(partial[0].command_info)
+        self.assertIsNone(self.db_logger.get_log_entry(1).command_info)
+
+    def test_legacy_json_null_is_migrated(self):
+        self._insert_legacy_row(1)
+
+        self.db_logger._connect(self.engine)
+
+        filters = LogsFilter(severity=[LogSeverity.INFO], commands_only=True)
+        self.assertEqual(
+            self.db_logger.get_logs(filters, Paging(page=1, page_size=10)), []
+        )
+        with self.Session() as session:
+            self.assertIsNone(
+                session.scalar(
+                    select(cast(LogEntryModel.command_info, Text)).where(
+                        LogEntryModel.id == 1
+                    )
+                )
+            )
+
+    def test_command_info_stored_before_output_split(self):
+        command_info = CommandInfo(
+            command="step-ca certificate",
+            output="old output",
+            exit_code=1,
+            action="TEST",
+        )
+        with self.Session() as session:
+            session.add(
+                LogEntryModel(
+                    id=1,
+                    timestamp=datetime.now(),
+                    severity=LogSeverity.ERROR,
+                    message="Old row",
+                    trace_id=str(uuid4()),
+                    command_info=command_info.model_dump(),
+                )
+            )
+            session.commit()
+
+        filters = LogsFilter(severity=[LogSeverity.ERROR], commands_only=True)
+        paging = Paging(page=1, page_size=10)
+        summary = self.db_logger.get_logs(filters, paging)[0]
+        self.assertEqual(summary.command_info, CommandSummary.of(command_info))
+        partial = self.db_logger.get_logs(filters, paging, {LogEntryField.COMMAND_INFO})
+        self.assertEqual(partial[0].command_info, CommandSummary.of(command_info))
+
+        self.assertEqual(self.db_logger.get_log_entry(1).command_info, command_info)
+        exported = list(self.db_logger.iter_logs(filters))
+        self.assertEqual(exported[0].command_info, command_info)
 
     def test_get_logs(self):
         # Insert some test logs
@@ -162,6 +309,91 @@ class TestDBLogger(unittest.TestCase):
         logs = self.db_logger.get_logs(filters, paging)
         self.assertEqual(len(logs), 0)
 
+    def test_get_logs_selected_fields(self):
+        self.db_logger.insert_log(
+            LogEntry(
+                entry_id=1,
+                timestamp=datetime.now(),
+                severity=LogSeverity.ERROR,
+                message="Test log message",
+                trace_id=uuid4(),
+                command_info=None,
+            )
+        )
+
+        filters = LogsFilter(severity=[LogSeverity.ERROR], commands_only=False)
+        paging = Paging(page=1, page_size=10)
+        fields = {LogEntryField.ENTRY_ID, LogEntryField.SEVERITY}
+        log = self.db_logger.get_logs(filters, paging, fields)[0]
+
+        self.assertEqual(log.model_fields_set, {"entry_id", "severity"})
+        self.assertEqual(log.entry_id, 1)
+        self.assertEqual(log.severity, LogSeverity.ERROR)
+
+    def _insert_command_log(self, entry_id, timestamp, severity, action, exit_code):
+        self.db_logger.insert_log(
+            LogEntry(
+                entry_id=entry_id,
+                timestamp=timestamp,
+                severity=severity,
+                message="Test log message",
+                trace_id=uuid4(),
+                command_info=CommandInfo(
+                    command="test_command",
+                    output="test output",
+                    exit_code=exit_code,
+                    action=action,
+                ),
+            )
+        )
+
+    def test_commands_only_filter(self):
+        self._insert_command_log(1, datetime.now(), LogSeverity.INFO, "TEST", 0)
+        self.db_logger.insert_log(
+            LogEntry(
+                entry_id=2,
+                timestamp=datetime.now(),
+                severity=LogSeverity.INFO,
+                message="No command",
+                trace_id=uuid4(),
+            )
+        )
+
+        filters = LogsFilter(severity=[LogSeverity.INFO], commands_only=True)
+        logs = self.db_logger.get_logs(filters, Paging(page=1, page_size=10))
+
+        self.assertEqual([log.entry_id for log in logs], [1])
+
+    def test_get_log_stats(self):
+        start = datetime(2024, 1, 1, 10, 0, 0)
+        self._insert_command_log(1, start, LogSeverity.INFO, "GENERATE_CERT", 0)
+        self._insert_command_log(
+            2, start + timedelta(minutes=5), LogSeverity.INFO, "RENEW_CERT", 0
+        )
+        self._insert_command_log(
+            3, start + timedelta(hours=1), LogSeverity.ERROR, "RENEW_CERT", 1
+        )
+        self._insert_command_log(
+            4, start + timedelta(days=1), LogSeverity.INFO, "RENEW_CERT", 0
+        )
+
+        filters = LogsFilter(
+            severity=list(LogSeverity),
+            commands_only=False,
+            date_from=start,
+            date_to=start + timedelta(hours=2),
+        )
+        stats = self.db_logger.get_log_stats(filters, StatsBucket.HOUR)
+
+        self.assertEqual(stats.total, 3)
+        self.assertEqual(stats.by_severity, {LogSeverity.INFO: 2, LogSeverity.ERROR: 1})
+        self.assertEqual(stats.by_action, {"GENERATE_CERT": 1, "RENEW_CERT": 2})
+        self.assertEqual(stats.by_exit_code, {0: 2, 1: 1})
+        self.assertEqual(
+            [(b.bucket_start, b.count) for b in stats.by_time],
+            [(start, 2), (start + timedelta(hours=1), 1)],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
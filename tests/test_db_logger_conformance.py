@@ -0,0 +1,225 @@
+"""
+Behaviour every IDBLogger backend must share, run once per backend.
+
+DBLogger runs on in-memory SQLite here; set TEST_POSTGRES_URL to also run
+the suite against a real (disposable) Postgres database.
+"""
+
+import os
+import tempfile
+import unittest
+from datetime import timedelta
+from uuid import uuid4
+
+from sqlalchemy import create_engine
+
+# noinspection PyProtectedMember
+from shared.db_logger import DBLogger, _Base as Base
+from shared.db_logger_interface import IDBLogger
+from shared.db_logger_mock import DBLoggerMock
+from shared.db_logger_sqlite import SQLiteDBLogger
+from shared.models import (
+    LogEntryField,
+    LogSeverity,
+    LogsFilter,
+    Paging,
+    StatsBucket,
+)
+from tests.log_fixtures import START, CountingDBLogger, log_entry
+
+
+class DBLoggerConformance:
+    db_logger: IDBLogger
+
+    def create_db_logger(self) -> IDBLogger:
+        raise NotImplementedError
+
+    def setUp(self):
+        self.db_logger = self.create_db_logger()
+
+    def _insert(self, minutes=0, severity=LogSeverity.INFO, trace_id=None, **command):
+        entry_id = self.db_logger.get_next_entry_id()
+        self.db_logger.insert_log(
+            log_entry(
+                entry_id,
+                START + timedelta(minutes=minutes),
+                severity,
+                trace_id,
+                **command,
+            )
+        )
+        return entry_id
+
+    def _ids(self, page=1, page_size=10, **filters):
+        filters.setdefault("severity", list(LogSeverity))
+        filters.setdefault("commands_only", False)
+        logs = self.db_logger.get_logs(
+            LogsFilter(**filters), Paging(page=page, page_size=page_size)
+        )
+        return [log.entry_id for log in logs]
+
+    def test_next_entry_ids_are_unique(self):
+        ids = [self.db_logger.get_next_entry_id() for _ in range(5)]
+        self.assertEqual(len(set(ids)), 5)
+
+    def test_get_log_entry_round_trip(self):
+        output = "line\n" * 500
+        entry_id = self._insert(action="GENERATE_CERT", exit_code=2, output=output)
+
+        log_entry = self.db_logger.get_log_entry(entry_id)
+
+        self.assertEqual(log_entry.entry_id, entry_id)
+        self.assertEqual(log_entry.timestamp.replace(tzinfo=None), START)
+        self.assertEqual(log_entry.command_info.output, output)
+        self.assertEqual(log_entry.command_info.exit_code, 2)
+        self.assertIsNone(self.db_logger.get_log_entry(entry_id + 1000))
+
+    def test_get_logs_returns_summaries(self):
+        self._insert(action="GENERATE_CERT", output="x" * 1000)
+
+        log = self.db_logger.get_logs(
+            LogsFilter(severity=list(LogSeverity), commands_only=False),
+            Paging(page=1, page_size=10),
+        )[0]
+
+        self.assertEqual(log.command_info.action, "GENERATE_CERT")
+        self.assertEqual(log.command_info.output_size, 1000)
+        self.assertLess(len(log.command_info.output_preview), 1000)
+
+    def test_newest_first_paging(self):
+        ids = [self._insert(minutes=i) for i in range(5)]
+
+        self.assertEqual(self._ids(page=1, page_size=2), [ids[4], ids[3]])
+        self.assertEqual(self._ids(page=2, page_size=2), [ids[2], ids[1]])
+        self.assertEqual(self._ids(page=3, page_size=2), [ids[0]])
+        self.assertEqual(self._ids(page=4, page_size=2), [])
+
+    def test_keyset_paging(self):
+        older = self._insert(minutes=0)
+        tied = sorted(self._insert(minutes=1) for _ in range(3))
+
+        self.assertEqual(
+            self._ids(before=START + timedelta(minutes=1), before_id=tied[2]),
+            [tied[1], tied[0], older],
+        )
+        self.assertEqual(
+            self._ids(before=START + timedelta(minutes=1), before_id=tied[0]),
+            [older],
+        )
+        self.assertEqual(self._ids(before=START, before_id=older), [])
+
+    def test_filters(self):
+        trace_id = uuid4()
+        info = self._insert(0, LogSeverity.INFO, trace_id)
+        error = self._insert(1, LogSeverity.ERROR, trace_id, action="RENEW_CERT")
+        warning = self._insert(2, LogSeverity.WARNING, action="REVOKE_CERT")
+
+        self.assertEqual(self._ids(trace_id=trace_id), [error, info])
+        self.assertEqual(self._ids(commands_only=True), [warning, error])
+        self.assertEqual(
+            self._ids(severity=[LogSeverity.INFO, LogSeverity.WARNING]),
+            [warning, info],
+        )
+        self.assertEqual(self._ids(severity=[]), [])
+        self.assertEqual(
+            self._ids(
+                date_from=START + timedelta(minutes=1),
+                date_to=START + timedelta(minutes=2),
+            ),
+            [error],
+        )
+        self.assertEqual(
+            self._ids(trace_id=trace_id, severity=[LogSeverity.INFO]), [info]
+        )
+
+    def test_iter_logs_oldest_first_with_full_output(self):
+        output = "line\n" * 500
+        first = self._insert(0, LogSeverity.INFO)
+        second = self._insert(1, LogSeverity.ERROR, action="RENEW_CERT", output=output)
+        self._insert(2, LogSeverity.DEBUG)
+
+        logs = list(
+            self.db_logger.iter_logs(
+                LogsFilter(
+                    severity=[LogSeverity.INFO, LogSeverity.ERROR], commands_only=False
+                )
+            )
+        )
+
+        self.assertEqual([log.entry_id for log in logs], [first, second])
+        self.assertIsNone(logs[0].command_info)
+        self.assertEqual(logs[1].command_info.output, output)
+
+    def test_selected_fields(self):
+        entry_id = self._insert(severity=LogSeverity.ERROR)
+
+        log = self.db_logger.get_logs(
+            LogsFilter(severity=list(LogSeverity), commands_only=False),
+            Paging(page=1, page_size=10),
+            {LogEntryField.ENTRY_ID, LogEntryField.SEVERITY},
+        )[0]
+
+        self.assertEqual(log.model_fields_set, {"entry_id", "severity"})
+        self.assertEqual((log.entry_id, log.severity), (entry_id, LogSeverity.ERROR))
+
+    def test_log_stats(self):
+        self._insert(0, LogSeverity.INFO, action="GENERATE_CERT")
+        self._insert(1, LogSeverity.INFO, action="RENEW_CERT")
+        self._insert(61, LogSeverity.ERROR, action="RENEW_CERT", exit_code=1)
+        self._insert(62, LogSeverity.DEBUG)
+        self._insert(60 * 24, LogSeverity.INFO)
+
+        stats = self.db_logger.get_log_stats(
+            LogsFilter(
+                severity=list(LogSeverity),
+                commands_only=False,
+                date_to=START + timedelta(hours=2),
+            ),
+            StatsBucket.HOUR,
+        )
+
+        self.assertEqual(stats.total, 4)
+        self.assertEqual(
+            stats.by_severity,
+            {LogSeverity.INFO: 2, LogSeverity.ERROR: 1, LogSeverity.DEBUG: 1},
+        )
+        self.assertEqual(stats.by_action, {"GENERATE_CERT": 1, "RENEW_CERT": 2})
+        self.assertEqual(stats.by_exit_code, {0: 2, 1: 1})
+        self.assertEqual(
+            [(b.bucket_start.replace(tzinfo=None), b.count) for b in stats.by_time],
+            [(START, 2), (START + timedelta(hours=1), 2)],
+        )
+
+
+class TestDBLoggerConformance(DBLoggerConformance, unittest.TestCase):
+    def create_db_logger(self) -> IDBLogger:
+        return CountingDBLogger()
+
+
+class TestSQLiteDBLoggerConformance(DBLoggerConformance, unittest.TestCase):
+    def create_db_logger(self) -> IDBLogger:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        db_logger = SQLiteDBLogger(os.path.join(directory.name, "logs.db"))
+        self.addCleanup(db_logger.close)
+        return db_logger
+
+
+class TestDBLoggerMockConformance(DBLoggerConformance, unittest.TestCase):
+    def create_db_logger(self) -> IDBLogger:
+        return DBLoggerMock()
+
+
+@unittest.skipUnless(os.getenv("TEST_POSTGRES_URL"), "TEST_POSTGRES_URL is not set")
+class TestPostgresDBLoggerConformance(DBLoggerConformance, unittest.TestCase):
+    def create_db_logger(self) -> IDBLogger:
+        engine = create_engine(os.getenv("TEST_POSTGRES_URL"))
+        Base.metadata.drop_all(engine)
+        self.addCleanup(engine.dispose)
+        db_logger = DBLogger(is_test=True)
+        db_logger._connect(engine)
+        return db_logger
+
+
+if __name__ == "__main__":
+    unittest.main()
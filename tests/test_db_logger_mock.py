@@ -0,0 +1,89 @@
+import unittest
+from uuid import uuid4
+
+from shared.db_logger_mock import DBLoggerMock
+from shared.models import LogsFilter, Paging, LogSeverity
+from tests.log_fixtures import log_entry
+
+
+class TestDBLoggerMock(unittest.TestCase):
+    def setUp(self):
+        self.db_logger = DBLoggerMock(max_entries=5)
+
+    def _insert(self, severity=LogSeverity.INFO, trace_id=None, command=False):
+        entry_id = self.db_logger.get_next_entry_id()
+        self.db_logger.insert_log(
+            log_entry(
+                entry_id,
+                severity=severity,
+                trace_id=trace_id,
+                action="TEST" if command else None,
+            )
+        )
+        return entry_id
+
+    def _ids(self, filters, page=1, page_size=10):
+        logs = self.db_logger.get_logs(filters, Paging(page=page, page_size=page_size))
+        return [log.entry_id for log in logs]
+
+    def test_get_next_entry_id_is_unique(self):
+        self.assertEqual(
+            [self.db_logger.get_next_entry_id() for _ in range(3)], [1, 2, 3]
+        )
+
+    def test_newest_first_paging(self):
+        for _ in range(5):
+            self._insert()
+
+        filters = LogsFilter(severity=list(LogSeverity), commands_only=False)
+        self.assertEqual(self._ids(filters, page=1, page_size=2), [5, 4])
+        self.assertEqual(self._ids(filters, page=3, page_size=2), [1])
+
+    def test_combined_filters(self):
+        trace_id = uuid4()
+        self._insert(LogSeverity.INFO, trace_id)
+        self._insert(LogSeverity.ERROR, trace_id, command=True)
+        self._insert(LogSeverity.ERROR, command=True)
+        self._insert(LogSeverity.WARNING, trace_id, command=True)
+
+        filters = LogsFilter(
+            trace_id=trace_id,
+            commands_only=True,
+            severity=[LogSeverity.ERROR, LogSeverity.WARNING],
+        )
+        self.assertEqual(self._ids(filters), [4, 2])
+
+    def test_eviction_of_oldest_entries(self):
+        trace_id = uuid4()
+        first = self._insert(LogSeverity.ERROR, trace_id, command=True)
+        for _ in range(5):
+            self._insert()
+
+        self.assertIsNone(self.db_logger.get_log_entry(first))
+        self.assertEqual(
+            self._ids(
+                LogsFilter(
+                    trace_id=trace_id, severity=list(LogSeverity), commands_only=False
+                )
+            ),
+            [],
+        )
+        self.assertEqual(
+            self._ids(LogsFilter(severity=[LogSeverity.ERROR], commands_only=True)),
+            [],
+        )
+        self.assertEqual(
+            self._ids(LogsFilter(severity=list(LogSeverity), commands_only=False)),
+            [6, 5, 4, 3, 2],
+        )
+
+    def test_duplicate_entry_id_is_rejected(self):
+        entry_id = self._insert()
+        log_entry = self.db_logger.get_log_entry(entry_id)
+
+        with self.assertRaises(ValueError):
+            self.db_logger.insert_log(log_entry)
+
+
+if __name__ == "__main__":
+    unittest.main()
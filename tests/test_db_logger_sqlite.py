@@ -0,0 +1,113 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from typing import Optional
+from unittest.mock import patch
+from uuid import uuid4
+
+from sqlalchemy import func, select, text
+from sqlalchemy.exc import OperationalError
+
+from shared.db_logger import LogEntryModel
+from shared.db_logger_sqlite import SQLiteDBLogger
+from shared.models import LogEntry, LogSeverity
+
+
+class TestSQLiteDBLogger(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "logs.db")
+        self.db_logger = self._open(batch_size=10, flush_interval_seconds=60)
+
+    def _open(self, **kwargs) -> SQLiteDBLogger:
+        db_logger = SQLiteDBLogger(self.path, **kwargs)
+        self.addCleanup(db_logger.close)
+        return db_logger
+
+    def _insert(self, db_logger: SQLiteDBLogger, entry_id: Optional[int] = None) -> int:
+        entry_id = entry_id or db_logger.get_next_entry_id()
+        db_logger.insert_log(
+            LogEntry(
+                entry_id=entry_id,
+                timestamp=datetime.now(),
+                severity=LogSeverity.INFO,
+                message="Test log message",
+                trace_id=uuid4(),
+            )
+        )
+        return entry_id
+
+    def _stored_count(self) -> int:
+        with self.db_logger.Session() as session:
+            return session.scalar(select(func.count()).select_from(LogEntryModel))
+
+    def test_wal_mode(self):
+        with self.db_logger.engine.connect() as connection:
+            mode = connection.execute(text("PRAGMA journal_mode")).scalar()
+        self.assertEqual(mode, "wal")
+
+    def test_inserts_are_committed_in_batches(self):
+        for _ in range(9):
+            self._insert(self.db_logger)
+        self.assertEqual(self._stored_count(), 0)
+
+        self._insert(self.db_logger)
+        self.assertEqual(self._stored_count(), 10)
+
+    def test_reads_flush_pending_entries(self):
+        entry_id = self._insert(self.db_logger)
+
+        self.assertIsNotNone(self.db_logger.get_log_entry(entry_id))
+
+    def test_ids_continue_after_reopen(self):
+        last_id = self._insert(self.db_logger)
+        self.db_logger.close()
+
+        reopened = self._open()
+
+        self.assertEqual(reopened.get_next_entry_id(), last_id + 1)
+        self.assertIsNotNone(reopened.get_log_entry(last_id))
+
+    def test_rejected_entry_is_dropped(self):
+        stored_id = self._insert(self.db_logger)
+        self.db_logger.flush()
+
+        self._insert(self.db_logger, entry_id=stored_id)  # duplicate primary key
+        for _ in range(9):
+            self._insert(self.db_logger)
+
+        self.assertEqual(self._stored_count(), 10)
+        self.assertIsNotNone(self.db_logger.get_log_entry(stored_id))
+
+    def test_pending_entries_are_bounded(self):
+        db_logger = self._open(batch_size=2, flush_interval_seconds=60, max_pending=3)
+        locked = OperationalError("INSERT", {}, Exception("database is locked"))
+        with patch.object(db_logger, "_insert_entries", side_effect=locked):
+            ids = [self._insert(db_logger) for _ in range(5)]
+            with self.assertRaises(OperationalError):
+                db_logger.flush()
+
+        db_logger.flush()
+        self.assertIsNone(db_logger.get_log_entry(ids[1]))
+        for entry_id in ids[2:]:
+            self.assertIsNotNone(db_logger.get_log_entry(entry_id))
+
+    def test_reads_serve_stored_entries_while_locked(self):
+        stored = self._insert(self.db_logger)
+        self.db_logger.flush()
+        pending = self._insert(self.db_logger)
+
+        locked = OperationalError("INSERT", {}, Exception("database is locked"))
+        with patch.object(self.db_logger, "_insert_entries", side_effect=locked):
+            with self.assertLogs("shared.db_logger_sqlite", "WARNING"):
+                self.assertIsNotNone(self.db_logger.get_log_entry(stored))
+            with self.assertLogs("shared.db_logger_sqlite", "WARNING"):
+                self.assertIsNone(self.db_logger.get_log_entry(pending))
+
+        self.assertIsNotNone(self.db_logger.get_log_entry(pending))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import Mock
+
+import httpx
+from freezegun import freeze_time
+
+from core.api_server import APIServer
+from core.certificate_manager_mock import CertificateManagerMock
+from core.etags import InventoryVersion, content_etag, etag_matches
+from front.api_client import APIClient, ResponseCache
+from shared.api_models import CertificateGenerateRequest
+from shared.models import KeyType
+
+
+class TestETags(unittest.TestCase):
+    def test_etag_matches(self):
+        self.assertTrue(etag_matches('"a"', '"a"'))
+        self.assertTrue(etag_matches('"b", W/"a"', '"a"'))
+        self.assertTrue(etag_matches("*", '"a"'))
+        self.assertFalse(etag_matches('"b"', '"a"'))
+        self.assertFalse(etag_matches(None, '"a"'))
+
+    def test_content_etag(self):
+        self.assertEqual(content_etag(b"entry"), content_etag(b"entry"))
+        self.assertNotEqual(content_etag(b"entry"), content_etag(b"other"))
+
+    def test_inventory_version(self):
+        version = InventoryVersion()
+        etag = version.etag()
+        self.assertEqual(version.etag(), etag)
+        self.assertNotEqual(version.etag("id,name"), etag)
+
+        version.bump()
+        self.assertNotEqual(version.etag(), etag)
+        self.assertNotEqual(InventoryVersion().etag(), version.etag())
+
+    def test_inventory_version_changes_on_expiration(self):
+        now = datetime(2024, 1, 1)
+        version = InventoryVersion()
+        with freeze_time(now):
+            version.observe_expirations(
+                [now - timedelta(days=1), now + timedelta(hours=1)]
+            )
+            etag = version.etag()
+
+        with freeze_time(now + timedelta(minutes=59)):
+            self.assertEqual(version.etag(), etag)
+        with freeze_time(now + timedelta(hours=1)):
+            self.assertNotEqual(version.etag(), etag)
+
+
+class TestConditionalRequests(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.cert_manager = CertificateManagerMock()
+        logger = Mock()
+        api_server = APIServer(self.cert_manager, logger, "1.0.0", 8000)
+        self.statuses = []
+
+        async def record_status(response: httpx.Response) -> None:
+            self.statuses.append(response.status_code)
+
+        self.api_client = APIClient("http://core", ResponseCache())
+        self.api_client.client = httpx.AsyncClient(
+            base_url="http://core",
+            transport=httpx.ASGITransport(app=api_server.App),
+            event_hooks={"response": [record_status]},
+        )
+
+    async def asyncTearDown(self):
+        await self.api_client.close()
+
+    async def test_unchanged_list_is_revalidated(self):
+        first = await self.api_client.list_certificates()
+        second = await self.api_client.list_certificates()
+
+        self.assertEqual(second, first)
+        self.assertEqual(self.statuses, [200, 304])
+
+    async def test_generate_invalidates_list(self):
+        before = await self.api_client.list_certificates()
+        await self.api_client.generate_certificate(
+            CertificateGenerateRequest(
+                keyName="new-cert", keyType=KeyType.RSA, duration=3600
+            )
+        )
+        after = await self.api_client.list_certificates()
+
+        self.assertEqual(self.statuses, [200, 200, 200])
+        self.assertEqual(len(after), len(before) + 1)
+
+    async def test_cache_is_bounded(self):
+        cache = ResponseCache(max_entries=1)
+        self.api_client.cache = cache
+        cache.put(("/other", ()), Mock())
+
+        await self.api_client.list_certificates()
+        self.assertIsNone(cache.get(("/other", ())))
+        await self.api_client.list_certificates()
+        self.assertEqual(self.statuses, [200, 304])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,92 @@
+import json
+import re
+import unittest
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi.testclient import TestClient
+
+import front.main
+
+
+class TestLogsPage(unittest.TestCase):
+    def setUp(self):
+        self.start = datetime(2024, 1, 1)
+        self.logs = [self._log(entry_id) for entry_id in range(1, 121)]
+        self.requests = []
+
+    def _log(self, entry_id: int) -> dict:
+        return {
+            "entryId": entry_id,
+            "timestamp": (self.start + timedelta(seconds=entry_id)).isoformat(),
+            "severity": "INFO",
+            "message": f"<b>entry {entry_id}</b>",
+            "traceId": str(uuid.uuid4()),
+            "commandInfo": None,
+        }
+
+    def _core(self, request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        self.requests.append(body)
+        logs = [
+            log
+            for log in reversed(self.logs)
+            if (not body["dateTo"] or log["timestamp"] < body["dateTo"])
+            and (
+                not body["before"]
+                or (log["timestamp"], log["entryId"])
+                < (body["before"], body["beforeId"])
+            )
+        ]
+        offset = (body["page"] - 1) * body["pageSize"]
+        return httpx.Response(200, json=logs[offset : offset + body["pageSize"]])
+
+    def _entry_ids(self, html: str):
+        return [int(entry_id) for entry_id in re.findall(r"<td>(\d+)</td>", html)]
+
+    def test_load_more(self):
+        with TestClient(front.main.app) as client:
+            transport = httpx.MockTransport(self._core)
+            front.main.app.state.api_client.client._transport = transport
+
+            response = client.get("/logs?commands_only=1&severity=INFO")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self._entry_ids(response.text), list(range(120, 70, -1)))
+            self.assertIn("&lt;b&gt;entry 120&lt;/b&gt;", response.text)
+            next_page = re.search(r'data-next="([^"]+)"', response.text).group(1)
+            next_page = next_page.replace("&amp;", "&")
+
+            self.logs.append(self._log(121))  # logged while the user reads
+            response = client.get(next_page)
+            self.assertEqual(self._entry_ids(response.text), list(range(70, 20, -1)))
+            self.assertNotIn("<html", response.text)
+
+            response = client.get(response.headers["X-Next-Page"])
+            self.assertEqual(self._entry_ids(response.text), list(range(20, 0, -1)))
+            self.assertNotIn("X-Next-Page", response.headers)
+
+        for request in self.requests:
+            self.assertTrue(request["commandsOnly"])
+            self.assertEqual(request["severity"], ["INFO"])
+            self.assertEqual(request["page"], 1)
+        self.assertEqual(
+            [request["beforeId"] for request in self.requests], [None, 71, 21]
+        )
+
+    def test_single_page(self):
+        self.logs = self.logs[:10]
+        with TestClient(front.main.app) as client:
+            transport = httpx.MockTransport(self._core)
+            front.main.app.state.api_client.client._transport = transport
+
+            response = client.get("/logs?date_from=2024-01-01&date_to=2024-01-01")
+            self.assertEqual(len(self._entry_ids(response.text)), 10)
+            self.assertIn('data-next=""', response.text)
+
+        self.assertEqual(self.requests[0]["dateFrom"], "2024-01-01T00:00:00")
+        self.assertEqual(self.requests[0]["dateTo"], "2024-01-02T00:00:00")
+
+
+if __name__ == "__main__":
+    unittest.main()
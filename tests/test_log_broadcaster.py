@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import unittest
+from datetime import datetime
+from uuid import uuid4
+
+from shared.log_broadcaster import LogBroadcaster
+from shared.models import LogEntry, LogSeverity, LogsFilter
+
+
+def _log_entry(entry_id: int, severity=LogSeverity.INFO) -> LogEntry:
+    return LogEntry(
+        entry_id=entry_id,
+        timestamp=datetime.now(),
+        severity=severity,
+        message=f"Test log message {entry_id}",
+        trace_id=uuid4(),
+    )
+
+
+class TestLogBroadcaster(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.broadcaster = LogBroadcaster(buffer_size=3)
+
+    async def test_publishes_matching_entries(self):
+        subscription = self.broadcaster.subscribe(
+            LogsFilter(severity=[LogSeverity.ERROR], commands_only=False)
+        )
+
+        self.broadcaster.publish(_log_entry(1, LogSeverity.INFO))
+        self.broadcaster.publish(_log_entry(2, LogSeverity.ERROR))
+
+        batch = await asyncio.wait_for(subscription.next_batch(), 1)
+        self.assertEqual([log.entry_id for log in batch], [2])
+
+    async def test_same_entry_is_published_once(self):
+        subscription = self.broadcaster.subscribe(
+            LogsFilter(severity=list(LogSeverity), commands_only=False)
+        )
+
+        self.broadcaster.publish(_log_entry(1))
+        self.broadcaster.publish(_log_entry(1))
+
+        batch = await asyncio.wait_for(subscription.next_batch(), 1)
+        self.assertEqual(len(batch), 1)
+        self.assertTrue(self.broadcaster.has_published(1))
+
+    async def test_slow_subscriber_drops_oldest_entries(self):
+        subscription = self.broadcaster.subscribe(
+            LogsFilter(severity=list(LogSeverity), commands_only=False)
+        )
+
+        for entry_id in range(1, 6):
+            self.broadcaster.publish(_log_entry(entry_id))
+
+        batch = await asyncio.wait_for(subscription.next_batch(), 1)
+        self.assertEqual([log.entry_id for log in batch], [3, 4, 5])
+        self.assertEqual(subscription.dropped, 2)
+
+    async def test_publish_from_another_thread(self):
+        subscription = self.broadcaster.subscribe(
+            LogsFilter(severity=list(LogSeverity), commands_only=False)
+        )
+
+        thread = threading.Thread(
+            target=self.broadcaster.publish, args=(_log_entry(1),)
+        )
+        thread.start()
+        thread.join()
+
+        batch = await asyncio.wait_for(subscription.next_batch(), 1)
+        self.assertEqual([log.entry_id for log in batch], [1])
+
+    async def test_unsubscribed_receives_nothing(self):
+        subscription = self.broadcaster.subscribe(
+            LogsFilter(severity=list(LogSeverity), commands_only=False)
+        )
+        self.broadcaster.unsubscribe(subscription)
+
+        self.broadcaster.publish(_log_entry(1))
+
+        with self.assertRaises(asyncio.TimeoutError):
+            await asyncio.wait_for(subscription.next_batch(), 0.05)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+import unittest
+
+from shared.log_policy import LogPolicy
+from shared.models import CommandInfo, LogPolicyConfig, LogSeverity
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLogPolicy(unittest.TestCase):
+    def setUp(self):
+        self.clock = _Clock()
+        self.samples = iter([])
+        self.policy = LogPolicy(sample=lambda: next(self.samples), clock=self.clock)
+
+    def test_default_keeps_everything(self):
+        for severity in LogSeverity:
+            decision = self.policy.decide(severity, "message")
+            self.assertTrue(decision.persist)
+            self.assertTrue(decision.echo)
+
+    def test_min_severity(self):
+        self.policy.update(LogPolicyConfig(min_severity=LogSeverity.WARNING))
+
+        self.assertFalse(self.policy.decide(LogSeverity.DEBUG, "message").persist)
+        self.assertFalse(self.policy.decide(LogSeverity.INFO, "message").persist)
+        self.assertTrue(self.policy.decide(LogSeverity.WARNING, "message").persist)
+        self.assertEqual(
+            self.policy.stats().sampled_out,
+            {LogSeverity.DEBUG: 1, LogSeverity.INFO: 1},
+        )
+
+    def test_severity_sampling(self):
+        self.policy.update(
+            LogPolicyConfig(severity_sample_rates={LogSeverity.INFO: 0.5})
+        )
+        self.samples = iter([0.2, 0.7])
+
+        self.assertTrue(self.policy.decide(LogSeverity.INFO, "first").persist)
+        self.assertFalse(self.policy.decide(LogSeverity.INFO, "second").persist)
+        self.assertTrue(self.policy.decide(LogSeverity.DEBUG, "third").persist)
+
+    def test_errors_and_commands_are_never_dropped(self):
+        self.policy.update(
+            LogPolicyConfig(
+                min_severity=LogSeverity.ERROR,
+                severity_sample_rates={severity: 0 for severity in LogSeverity},
+                action_sample_rates={"RENEW_CERT": 0},
+                dedupe_window_seconds=60,
+            )
+        )
+        command_info = CommandInfo(
+            command="step ca renew", output="", exit_code=0, action="RENEW_CERT"
+        )
+
+        for _ in range(3):
+            self.assertTrue(self.policy.decide(LogSeverity.ERROR, "boom").persist)
+            decision = self.policy.decide(LogSeverity.INFO, "renewed", command_info)
+            self.assertTrue(decision.persist)
+            self.assertFalse(decision.echo)
+
+    def test_repeats_are_suppressed_and_summarized(self):
+        self.policy.update(LogPolicyConfig(dedupe_window_seconds=10))
+
+        self.assertTrue(self.policy.decide(LogSeverity.INFO, "repeated").persist)
+        for _ in range(3):
+            self.assertFalse(self.policy.decide(LogSeverity.INFO, "repeated").persist)
+        self.assertTrue(self.policy.decide(LogSeverity.INFO, "other").persist)
+
+        self.clock.now = 10
+        decision = self.policy.decide(LogSeverity.DEBUG, "later")
+
+        self.assertEqual(
+            decision.summaries,
+            [(LogSeverity.INFO, "3 identical messages suppressed: repeated")],
+        )
+        self.assertTrue(self.policy.decide(LogSeverity.INFO, "repeated").persist)
+        self.assertEqual(self.policy.stats().suppressed, {LogSeverity.INFO: 3})
+
+    def test_update_closes_open_windows(self):
+        self.policy.update(LogPolicyConfig(dedupe_window_seconds=10))
+        self.policy.decide(LogSeverity.INFO, "repeated")
+        self.policy.decide(LogSeverity.INFO, "repeated")
+
+        summaries = self.policy.update(LogPolicyConfig())
+
+        self.assertEqual(
+            summaries, [(LogSeverity.INFO, "1 identical messages suppressed: repeated")]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
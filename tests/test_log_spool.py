@@ -0,0 +1,203 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from shared import trace_context, tracing
+from shared.log_spool import LogSpool, SpoolFsync, SpoolingDBLogger
+from shared.models import LogEntry, LogsFilter, LogSeverity, Paging
+from tests.log_fixtures import CountingDBLogger, log_entry
+
+
+def _log_entry(entry_id: int) -> LogEntry:
+    return log_entry(entry_id, action="TEST", output="line\n" * 10)
+
+
+def _wait_until(condition, timeout=2.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TestLogSpool(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "spool.jsonl")
+        self.spool = LogSpool(self.path, SpoolFsync.ALWAYS)
+
+    def tearDown(self):
+        self.spool.close()
+        self.directory.cleanup()
+
+    def test_replay_round_trip(self):
+        self.assertFalse(self.spool.has_entries())
+        self.spool.append(_log_entry(1))
+        self.spool.append(_log_entry(2))
+
+        replayed = list(self.spool.begin_replay())
+
+        self.assertEqual([log.entry_id for log in replayed], [1, 2])
+        self.assertEqual(replayed[0].command_info.output, "line\n" * 10)
+        self.assertTrue(self.spool.end_replay())
+        self.assertFalse(self.spool.has_entries())
+
+    def test_appends_during_replay_are_kept(self):
+        self.spool.append(_log_entry(1))
+        replayed = list(self.spool.begin_replay())
+        self.spool.append(_log_entry(2))
+
+        self.assertFalse(self.spool.end_replay())
+        self.assertEqual([log.entry_id for log in replayed], [1])
+        self.assertEqual([log.entry_id for log in self.spool.begin_replay()], [2])
+
+    def test_torn_line_and_leftover_replay_file(self):
+        self.spool.append(_log_entry(1))
+        list(self.spool.begin_replay())  # crash before end_replay
+        self.spool.close()
+        with open(self.path + ".replaying", "ab") as file:
+            file.write(b'{"entry_id": 2, "timest')
+
+        self.spool = LogSpool(self.path)
+
+        self.assertTrue(self.spool.has_entries())
+        self.assertEqual([log.entry_id for log in self.spool.begin_replay()], [1])
+
+
+class TestSpoolingDBLogger(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.db_logger = CountingDBLogger(os.path.join(self.directory.name, "logs.db"))
+        self.spooling = SpoolingDBLogger(
+            self.db_logger,
+            LogSpool(os.path.join(self.directory.name, "spool.jsonl")),
+            latency_budget_seconds=0.05,
+            replay_interval_seconds=0.05,
+        )
+
+    def tearDown(self):
+        self.spooling.close()
+        self.db_logger.engine.dispose()
+        self.directory.cleanup()
+
+    def _insert(self) -> int:
+        entry_id = self.spooling.get_next_entry_id()
+        self.spooling.insert_log(_log_entry(entry_id))
+        return entry_id
+
+    def test_outage_is_spooled_and_replayed(self):
+        outage = ConnectionError("down")
+        with patch.object(
+            self.db_logger, "insert_log", side_effect=outage
+        ), patch.object(self.db_logger, "insert_logs", side_effect=outage):
+            first = self._insert()
+            second = self._insert()
+            self.assertTrue(self.spooling.spooling)
+            self.assertIsNone(self.db_logger.get_log_entry(first))
+
+        self.assertTrue(_wait_until(lambda: not self.spooling.spooling))
+        self.assertEqual(
+            self.db_logger.get_log_entry(second).command_info.output, "line\n" * 10
+        )
+        self._insert()  # straight to the database again
+
+    def test_insert_span_nests_under_caller(self):
+        path = os.path.join(self.directory.name, "spans.jsonl")
+        tracing.configure(path, "test-service")
+        self.addCleanup(tracing.shutdown)
+        # a spooled insert would be replayed outside the trace, so never time out
+        self.spooling.close()
+        self.spooling = SpoolingDBLogger(
+            self.db_logger,
+            LogSpool(os.path.join(self.directory.name, "spool.jsonl")),
+            latency_budget_seconds=60,
+        )
+
+        with trace_context.trace_scope() as scope:
+            self._insert()
+        tracing.shutdown()
+
+        with open(path) as file:
+            spans = [
+                span
+                for line in file
+                for resource_spans in json.loads(line)["resourceSpans"]
+                for scope_spans in resource_spans["scopeSpans"]
+                for span in scope_spans["spans"]
+                if span["name"] == "db_logger.insert_log"
+            ]
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0]["traceId"], scope.trace_id.hex)
+        self.assertEqual(spans[0]["parentSpanId"], scope.span_id)
+
+    def test_slow_insert_is_not_stored_twice(self):
+        release = threading.Event()
+        insert_log = self.db_logger.insert_log
+
+        def slow_insert_log(log_entry):
+            release.wait()
+            insert_log(log_entry)
+
+        with patch.object(self.db_logger, "insert_log", side_effect=slow_insert_log):
+            started = time.monotonic()
+            entry_id = self._insert()
+            self.assertLess(time.monotonic() - started, 1)
+            release.set()
+
+            self.assertTrue(_wait_until(lambda: not self.spooling.spooling))
+
+        self.assertIsNotNone(self.db_logger.get_log_entry(entry_id))
+
+    def test_insert_logs_skips_stored_ids(self):
+        self.db_logger.insert_log(_log_entry(1))
+
+        inserted = self.db_logger.insert_logs(
+            [_log_entry(1), _log_entry(2), _log_entry(2)]
+        )
+
+        self.assertEqual(inserted, 1)
+        self.assertIsNotNone(self.db_logger.get_log_entry(2))
+
+    def test_entry_ids_come_from_reserve(self):
+        # filled before the first request
+        self.assertEqual(len(self.spooling._ids), self.spooling.ID_RESERVE_SIZE)
+        with patch.object(
+            self.db_logger, "get_next_entry_id", side_effect=ConnectionError("down")
+        ):
+            ids = [self.spooling.get_next_entry_id() for _ in range(10)]
+
+        self.assertEqual(len(set(ids)), 10)
+
+    def test_reserve_exhausted_while_database_is_down(self):
+        def down(*_):
+            time.sleep(0.2)  # a connect timeout
+            raise ConnectionError("down")
+
+        with patch.object(
+            self.db_logger, "get_next_entry_id", side_effect=down
+        ), patch.object(self.db_logger, "insert_log", side_effect=down), patch.object(
+            self.db_logger, "insert_logs", side_effect=down
+        ):
+            self.spooling._ids.clear()
+            started = time.monotonic()
+            ids = [self._insert() for _ in range(10)]
+            self.assertLess(time.monotonic() - started, 0.2)
+            self.assertEqual(ids, list(range(-1, -11, -1)))
+
+        self.assertTrue(_wait_until(lambda: not self.spooling.spooling))
+        stored = self.db_logger.get_logs(
+            LogsFilter(severity=list(LogSeverity), commands_only=False),
+            Paging(page=1, page_size=20),
+        )
+        self.assertEqual(len(stored), 10)
+        self.assertTrue(all(log.entry_id > 0 for log in stored))
+        self.assertEqual(len({log.entry_id for log in stored}), 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,30 @@
+import json
+import logging
 import unittest
 from datetime import datetime
 from logging import Logger as PythonLogger
 from unittest.mock import Mock, patch
 from uuid import UUID
 
-from shared.logger import Logger, TraceIdProvider, IDBLogger
-from shared.models import LogEntry, LogSeverity, CommandInfo, LogsFilter, Paging
+from shared.log_broadcaster import LogBroadcaster
+from shared.log_policy import LogPolicy
+from shared.logger import (
+    Logger,
+    TraceIdProvider,
+    IDBLogger,
+    JsonLineFormatter,
+    TextLineFormatter,
+)
+from shared.models import (
+    LogEntry,
+    LogSeverity,
+    CommandInfo,
+    LogsFilter,
+    LogPolicyConfig,
+    LogStats,
+    Paging,
+    StatsBucket,
+)
 
 
 class TestLogger(unittest.TestCase):
@@ -64,6 +83,95 @@ class TestLogger(unittest.TestCase):
         self.assertEqual(log_entry.message, "Debug message")
         self.assertEqual(log_entry.command_info, command_info)
 
+    @patch.object(PythonLogger, "log")
+    def test_log_with_provisional_entry_id(self, _):
+        self.mock_trace_id_provider.get_current.return_value = None
+        self.mock_db_logger.get_next_entry_id.return_value = -1
+        self.logger.broadcaster = Mock(spec=LogBroadcaster)
+
+        log_id = self.logger.log(LogSeverity.INFO, "Test message")
+
+        self.assertIsNone(log_id)
+        self.mock_db_logger.insert_log.assert_called_once()
+        self.logger.broadcaster.publish.assert_not_called()
+        self.assertEqual(self.logger.get_recent_cache_stats().size, 0)
+
+    @patch.object(PythonLogger, "log")
+    def test_log_publishes_to_broadcaster(self, _):
+        self.mock_trace_id_provider.get_current.return_value = None
+        self.mock_db_logger.get_next_entry_id.return_value = 1
+        self.logger.broadcaster = Mock(spec=LogBroadcaster)
+
+        self.logger.log(LogSeverity.INFO, "Test message")
+
+        log_entry = self.mock_db_logger.insert_log.call_args[0][0]
+        self.logger.broadcaster.publish.assert_called_once_with(log_entry)
+
+    @patch.object(PythonLogger, "log")
+    def test_log_dropped_by_policy(self, mock_log):
+        self.mock_trace_id_provider.get_current.return_value = None
+        self.mock_db_logger.get_next_entry_id.return_value = 1
+        self.logger.policy = LogPolicy(LogPolicyConfig(dedupe_window_seconds=60))
+
+        self.logger.log(LogSeverity.INFO, "Repeated message")
+        log_id = self.logger.log(LogSeverity.INFO, "Repeated message")
+        self.logger.set_policy(LogPolicyConfig())
+
+        self.assertIsNone(log_id)
+        self.assertEqual(self.mock_db_logger.insert_log.call_count, 2)
+        summary = self.mock_db_logger.insert_log.call_args[0][0]
+        self.assertEqual(
+            summary.message, "1 identical messages suppressed: Repeated message"
+        )
+        self.assertEqual(mock_log.call_count, 2)
+
+    @patch.object(PythonLogger, "log")
+    def test_get_logs_served_from_recent_logs(self, _):
+        self.mock_trace_id_provider.get_current.return_value = None
+        self.mock_db_logger.get_next_entry_id.side_effect = [1, 2]
+        self.logger.log(LogSeverity.INFO, "First message")
+        self.logger.log(LogSeverity.INFO, "Second message")
+        filters = LogsFilter(severity=list(LogSeverity), commands_only=False)
+
+        logs = self.logger.get_logs(filters, Paging(page=1, page_size=2))
+        self.logger.get_logs(filters, Paging(page=2, page_size=2))
+
+        self.assertEqual([log.entry_id for log in logs], [2, 1])
+        self.mock_db_logger.get_logs.assert_called_once_with(
+            filters, Paging(page=2, page_size=2), None
+        )
+        stats = self.logger.get_recent_cache_stats()
+        self.assertEqual((stats.hits, stats.misses), (1, 1))
+
+    def test_handlers_are_set_up_once(self):
+        # noinspection PyTypeChecker
+        Logger(self.mock_trace_id_provider, self.mock_db_logger)
+
+        self.assertEqual(len(self.logger.logger.handlers), 1)
+        self.assertIsNotNone(Logger._listener)
+
+    def test_line_formats(self):
+        trace_id = UUID("12345678-1234-5678-1234-567812345678")
+        record = logging.LogRecord(
+            "shared.logger", logging.INFO, __file__, 1, "Test message", None, None
+        )
+        record.trace_id = trace_id
+        record.command = "step ca certificate"
+
+        text = TextLineFormatter().format(record)
+        line = json.loads(JsonLineFormatter().format(record))
+
+        self.assertTrue(
+            text.endswith(
+                f"INFO - [TraceID: {trace_id}] - Test message"
+                + " - Command: step ca certificate"
+            )
+        )
+        self.assertEqual(line["severity"], "INFO")
+        self.assertEqual(line["traceId"], str(trace_id))
+        self.assertEqual(line["message"], "Test message")
+        self.assertEqual(line["command"], "step ca certificate")
+
     def test_get_logs(self):
         filters = LogsFilter(severity=[LogSeverity.INFO], commands_only=False)
         paging = Paging(page=1, page_size=10)
@@ -81,7 +189,7 @@ class TestLogger(unittest.TestCase):
         logs = self.logger.get_logs(filters, paging)
 
         self.assertEqual(logs, expected_logs)
-        self.mock_db_logger.get_logs.assert_called_once_with(filters, paging)
+        self.mock_db_logger.get_logs.assert_called_once_with(filters, paging, None)
 
     def test_get_log_entry(self):
         log_id = 1
@@ -99,6 +207,39 @@ class TestLogger(unittest.TestCase):
         self.assertEqual(log_entry, expected_log)
         self.mock_db_logger.get_log_entry.assert_called_once_with(log_id)
 
+    def test_get_log_stats_is_cached(self):
+        filters = LogsFilter(severity=[LogSeverity.INFO], commands_only=False)
+        stats = LogStats(
+            total=0, by_severity={}, by_action={}, by_exit_code={}, by_time=[]
+        )
+        self.mock_db_logger.get_log_stats.return_value = stats
+
+        first = self.logger.get_log_stats(filters, StatsBucket.HOUR)
+        second = self.logger.get_log_stats(filters, StatsBucket.HOUR)
+        self.logger.get_log_stats(filters, StatsBucket.DAY)
+
+        self.assertIs(first, stats)
+        self.assertIs(second, stats)
+        self.assertEqual(self.mock_db_logger.get_log_stats.call_count, 2)
+
+    def test_get_log_stats_cache_key_is_rounded(self):
+        self.mock_db_logger.get_log_stats.return_value = LogStats(
+            total=0, by_severity={}, by_action={}, by_exit_code={}, by_time=[]
+        )
+
+        for second in [1, 3, 6]:
+            filters = LogsFilter(
+                severity=[LogSeverity.INFO],
+                commands_only=False,
+                date_from=datetime(2024, 1, 1, 12, 0, second, 1000 * second),
+            )
+            self.logger.get_log_stats(filters, StatsBucket.HOUR)
+
+        self.assertEqual(self.mock_db_logger.get_log_stats.call_count, 2)
+        # the database is asked for the exact window
+        filters = self.mock_db_logger.get_log_stats.call_args[0][0]
+        self.assertEqual(filters.date_from, datetime(2024, 1, 1, 12, 0, 6, 6000))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,81 @@
+import threading
+import unittest
+
+from shared.metrics import Counter, Gauge, Histogram, Registry
+
+
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = Registry()
+
+    def _render(self, metric) -> str:
+        self.registry.register(metric)
+        return self.registry.render()
+
+    def test_counter_sums_thread_shards(self):
+        counter = Counter("jobs_total", "Jobs done", ("action",))
+
+        def work():
+            for _ in range(1000):
+                counter.inc("GENERATE_CERT")
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        counter.inc("REVOKE_CERT", amount=2)
+
+        self.assertEqual(
+            self._render(counter),
+            "# HELP jobs_total Jobs done\n"
+            + "# TYPE jobs_total counter\n"
+            + 'jobs_total{action="GENERATE_CERT"} 8000.0\n'
+            + 'jobs_total{action="REVOKE_CERT"} 2.0\n',
+        )
+
+    def test_gauge_inc_and_dec_on_different_threads(self):
+        gauge = Gauge("connections", "Open connections", callback=lambda: {(): 5.0})
+        gauge.inc()
+        thread = threading.Thread(target=gauge.dec, kwargs={"amount": 3})
+        thread.start()
+        thread.join()
+
+        self.assertIn("\nconnections 3.0\n", self._render(gauge))
+
+    def test_histogram_buckets_are_cumulative(self):
+        histogram = Histogram("latency_seconds", "Latency", ("route",), (0.1, 1.0))
+        for value in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(value, "/logs")
+
+        self.assertEqual(
+            self._render(histogram).splitlines()[2:],
+            [
+                'latency_seconds_bucket{route="/logs",le="0.1"} 2.0',
+                'latency_seconds_bucket{route="/logs",le="1.0"} 3.0',
+                'latency_seconds_bucket{route="/logs",le="+Inf"} 4.0',
+                'latency_seconds_sum{route="/logs"} 3.65',
+                'latency_seconds_count{route="/logs"} 4.0',
+            ],
+        )
+
+    def test_label_values_are_escaped(self):
+        counter = Counter("errors_total", "Errors", ("message",))
+        counter.inc('say "hi"\\\n')
+
+        self.assertIn(
+            'errors_total{message="say \\"hi\\"\\\\\\n"} 1.0', self._render(counter)
+        )
+
+    def test_wrong_label_count_raises(self):
+        with self.assertRaises(ValueError):
+            Counter("jobs_total", "Jobs done", ("action",)).inc()
+
+    def test_duplicate_name_raises(self):
+        self.registry.register(Counter("jobs_total", "Jobs done"))
+        with self.assertRaises(ValueError):
+            self.registry.register(Gauge("jobs_total", "Jobs done"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import asyncio
+import unittest
+
+from front.page_cache import PageCache, Uncached
+
+
+class TestPageCache(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.now = 0.0
+        self.cache = PageCache(
+            fresh_seconds=2, stale_seconds=10, max_entries=2, clock=lambda: self.now
+        )
+        self.renders = 0
+
+    async def _render(self) -> str:
+        self.renders += 1
+        await asyncio.sleep(0)
+        return f"page {self.renders}"
+
+    async def _settle(self):
+        for _ in range(5):
+            await asyncio.sleep(0)
+
+    async def test_fresh_entry_is_served(self):
+        self.assertEqual(await self.cache.get("/", self._render), "page 1")
+        self.now = 1.9
+        self.assertEqual(await self.cache.get("/", self._render), "page 1")
+        self.assertEqual(self.renders, 1)
+
+    async def test_stale_entry_is_served_while_refreshed(self):
+        await self.cache.get("/", self._render)
+        self.now = 5
+        self.assertEqual(await self.cache.get("/", self._render), "page 1")
+        self.assertEqual(await self.cache.get("/", self._render), "page 1")
+
+        await self._settle()
+        self.assertEqual(self.renders, 2)
+        self.assertEqual(await self.cache.get("/", self._render), "page 2")
+
+    async def test_expired_entry_is_rendered(self):
+        await self.cache.get("/", self._render)
+        self.now = 12
+        self.assertEqual(await self.cache.get("/", self._render), "page 2")
+
+    async def test_concurrent_misses_share_a_render(self):
+        pages = await asyncio.gather(
+            *(self.cache.get("/", self._render) for _ in "abc")
+        )
+        self.assertEqual(pages, ["page 1"] * 3)
+        self.assertEqual(self.renders, 1)
+
+    async def test_invalidate(self):
+        await self.cache.get("/", self._render)
+        self.cache.invalidate()
+        self.assertEqual(await self.cache.get("/", self._render), "page 2")
+
+    async def test_invalidate_discards_running_render(self):
+        await self.cache.get("/", self._render)
+        self.now = 5
+        await self.cache.get("/", self._render)  # refresh from before the change
+        self.cache.invalidate()
+        await self._settle()
+
+        self.assertEqual(await self.cache.get("/", self._render), "page 3")
+
+    async def test_failed_refresh_keeps_stale_entry(self):
+        await self.cache.get("/", self._render)
+        self.now = 5
+
+        async def fail():
+            raise ConnectionError("core is down")
+
+        self.assertEqual(await self.cache.get("/", fail), "page 1")
+        await self._settle()
+        self.assertEqual(await self.cache.get("/", self._render), "page 1")
+
+        self.cache.invalidate()
+        with self.assertRaises(ConnectionError):
+            await self.cache.get("/", fail)
+
+    async def test_uncached_render_is_not_kept(self):
+        async def degraded():
+            return Uncached("degraded page")
+
+        self.assertEqual(await self.cache.get("/", degraded), "degraded page")
+        self.assertEqual(await self.cache.get("/", self._render), "page 1")
+
+        self.now = 5
+        self.assertEqual(await self.cache.get("/", degraded), "page 1")
+        await self._settle()
+        self.assertEqual(await self.cache.get("/", self._render), "page 1")
+
+    async def test_cache_is_bounded(self):
+        for key in ["/a", "/b", "/c"]:
+            await self.cache.get(key, self._render)
+        self.assertEqual(await self.cache.get("/a", self._render), "page 4")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import asyncio
+import time
+import unittest
+from datetime import datetime, timedelta
+
+import httpx
+from fastapi.testclient import TestClient
+
+import front.main
+from front.page_composer import PageComposer
+
+
+async def _after(seconds: float, value: str) -> str:
+    await asyncio.sleep(seconds)
+    return value
+
+
+class TestPageComposer(unittest.IsolatedAsyncioTestCase):
+    async def test_panels_are_fetched_concurrently(self):
+        started = time.perf_counter()
+        page = await PageComposer().compose(
+            "test", {name: lambda name=name: _after(0.1, name) for name in "abc"}
+        )
+
+        self.assertLess(time.perf_counter() - started, 0.25)
+        self.assertEqual(page.data, {"a": "a", "b": "b", "c": "c"})
+        self.assertEqual(page.failed, frozenset())
+
+    async def test_slow_and_failing_panels_degrade(self):
+        async def fail():
+            raise ConnectionError("core is down")
+
+        started = time.perf_counter()
+        page = await PageComposer(deadline_seconds=0.1).compose(
+            "test",
+            {
+                "fast": lambda: _after(0, "fast"),
+                "slow": lambda: _after(10, "slow"),
+                "failing": fail,
+            },
+        )
+
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertEqual(page.data, {"fast": "fast", "slow": None, "failing": None})
+        self.assertEqual(page.failed, {"slow", "failing"})
+
+
+class TestDashboard(unittest.TestCase):
+    def test_partial_dashboard(self):
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path == "/logs/stats":
+                return httpx.Response(500)
+            if request.url.path == "/logs":
+                return httpx.Response(200, json=[])
+            expiration = datetime.now() + timedelta(days=3)
+            return httpx.Response(
+                200,
+                json=[
+                    {
+                        "id": "cert1",
+                        "name": "Cert 1",
+                        "status": "valid",
+                        "expirationDate": expiration.isoformat(),
+                    }
+                ],
+            )
+
+        with TestClient(front.main.app) as client:
+            api_client = front.main.app.state.api_client
+            api_client.client._transport = httpx.MockTransport(handler)
+
+            response = client.get("/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("Cert 1", response.text)
+        self.assertIn("Expiring within 7 days: 1.", response.text)
+        self.assertIn("Log activity: unavailable.", response.text)
+        self.assertNotIn("Recent logs are unavailable", response.text)
+
+
+if __name__ == "__main__":
+    unittest.main()
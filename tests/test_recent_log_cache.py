@@ -0,0 +1,110 @@
+import unittest
+from datetime import timedelta
+from uuid import UUID, uuid4
+
+from shared.models import (
+    LogEntryField,
+    LogSeverity,
+    LogsFilter,
+    Paging,
+)
+from shared.recent_log_cache import RecentLogCache
+from tests.log_fixtures import START, log_entry
+
+_SHARED_TRACE_ID = UUID("00000000-0000-0000-0000-000000000000")
+
+
+class TestRecentLogCache(unittest.TestCase):
+    def setUp(self):
+        self.cache = RecentLogCache(5, shared_trace_ids=[_SHARED_TRACE_ID])
+        self.next_id = 1
+
+    def _add(self, severity=LogSeverity.INFO, trace_id=None, action=None) -> int:
+        entry_id = self.next_id
+        self.next_id += 1
+        self.cache.add(
+            log_entry(
+                entry_id,
+                START + timedelta(minutes=entry_id),
+                severity,
+                trace_id,
+                action=action,
+            )
+        )
+        return entry_id
+
+    def _ids(self, page=1, page_size=2, **filters):
+        filters.setdefault("severity", list(LogSeverity))
+        filters.setdefault("commands_only", False)
+        logs = self.cache.get_logs(
+            LogsFilter(**filters), Paging(page=page, page_size=page_size)
+        )
+        return None if logs is None else [log.entry_id for log in logs]
+
+    def test_pages_inside_the_cache_are_hits(self):
+        ids = [self._add() for _ in range(5)]
+
+        self.assertEqual(self._ids(page=1), [ids[4], ids[3]])
+        self.assertEqual(self._ids(page=2), [ids[2], ids[1]])
+        self.assertIsNone(self._ids(page=3))  # may continue in older entries
+
+    def test_sparse_filter_falls_through(self):
+        self._add(LogSeverity.ERROR)
+        for _ in range(4):
+            self._add()
+
+        self.assertIsNone(self._ids(severity=[LogSeverity.ERROR]))
+        self.assertEqual(self._ids(severity=[LogSeverity.INFO]), [5, 4])
+
+    def test_whole_trace_is_a_hit(self):
+        trace_id = uuid4()
+        first = self._add(trace_id=trace_id)
+        second = self._add(trace_id=trace_id, action="RENEW_CERT")
+
+        self.assertEqual(self._ids(page_size=10, trace_id=trace_id), [second, first])
+        self.assertEqual(self._ids(page=2, page_size=10, trace_id=trace_id), [])
+        self.assertIsNone(self._ids(page_size=10, trace_id=uuid4()))
+        self.assertIsNone(self._ids(page_size=10, trace_id=_SHARED_TRACE_ID))
+
+    def test_partly_evicted_trace_falls_through(self):
+        trace_id = uuid4()
+        self._add(trace_id=trace_id)
+        for _ in range(4):
+            self._add()
+        last = self._add(trace_id=trace_id)
+
+        self.assertIsNone(self._ids(page_size=10, trace_id=trace_id))
+        self.assertEqual(self._ids(page_size=1, trace_id=trace_id), [last])
+
+    def test_selected_fields(self):
+        self._add()
+
+        log = self.cache.get_logs(
+            LogsFilter(severity=list(LogSeverity), commands_only=False),
+            Paging(page=1, page_size=1),
+            {LogEntryField.ENTRY_ID},
+        )[0]
+
+        self.assertEqual(log.model_fields_set, {"entry_id"})
+
+    def test_stats(self):
+        self._add()
+        self._ids(page_size=1)
+        self._ids(page_size=1)
+        self._ids(page_size=2)
+
+        stats = self.cache.stats()
+
+        self.assertEqual((stats.hits, stats.misses), (2, 1))
+        self.assertEqual((stats.size, stats.capacity), (1, 5))
+        self.assertAlmostEqual(stats.hit_ratio, 2 / 3)
+
+    def test_zero_capacity_never_hits(self):
+        self.cache = RecentLogCache(0)
+        self._add()
+
+        self.assertIsNone(self._ids(page_size=1))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import marshal
+import unittest
+import uuid
+
+from core.request_profiler import RequestProfiler
+
+
+def _work():
+    return sum(range(1000))
+
+
+class TestRequestProfiler(unittest.TestCase):
+    def test_should_profile(self):
+        self.assertFalse(RequestProfiler().should_profile(False))
+        self.assertTrue(RequestProfiler().should_profile(True))
+        self.assertTrue(
+            RequestProfiler(sample_rate=0.5, sample=lambda: 0.2).should_profile(False)
+        )
+        self.assertFalse(
+            RequestProfiler(sample_rate=0.5, sample=lambda: 0.7).should_profile(False)
+        )
+
+    def test_profile_is_kept_by_trace_id(self):
+        profiler = RequestProfiler()
+        trace_id = uuid.uuid4()
+
+        with profiler.profile(trace_id, "00f067aa0ba902b7", "GET", "/logs") as profiled:
+            _work()
+
+        self.assertTrue(profiled)
+        profile = profiler.get_profile(trace_id)
+        self.assertEqual((profile.method, profile.path), ("GET", "/logs"))
+        functions = {function for _, _, function in marshal.loads(profile.stats)}
+        self.assertIn("_work", functions)
+        self.assertIn("_work", profile.as_text())
+
+    def test_keeps_newest_profiles(self):
+        profiler = RequestProfiler(capacity=2)
+        trace_ids = [uuid.uuid4() for _ in range(3)]
+        for trace_id in trace_ids:
+            with profiler.profile(trace_id, "00f067aa0ba902b7", "GET", "/"):
+                pass
+
+        self.assertIsNone(profiler.get_profile(trace_ids[0]))
+        self.assertEqual(
+            [profile.trace_id for profile in profiler.get_profiles()],
+            trace_ids[:0:-1],
+        )
+
+    def test_spans_of_one_trace_are_kept_apart(self):
+        profiler = RequestProfiler()
+        trace_id = uuid.uuid4()
+        for span_id, path in [("00f067aa0ba902b7", "/a"), ("53995c3f42cd8ad8", "/b")]:
+            with profiler.profile(trace_id, span_id, "GET", path):
+                pass
+
+        self.assertEqual(len(profiler.get_profiles()), 2)
+        self.assertEqual(profiler.get_profile(trace_id, "00f067aa0ba902b7").path, "/a")
+        self.assertEqual(profiler.get_profile(trace_id, "53995c3f42cd8ad8").path, "/b")
+        self.assertEqual(profiler.get_profile(trace_id).path, "/b")  # newest
+        self.assertIsNone(profiler.get_profile(trace_id, "b7ad6b7169203331"))
+
+    def test_one_profile_at_a_time(self):
+        profiler = RequestProfiler()
+        outer, inner = uuid.uuid4(), uuid.uuid4()
+
+        with profiler.profile(outer, "00f067aa0ba902b7", "GET", "/"):
+            with profiler.profile(inner, "53995c3f42cd8ad8", "GET", "/") as profiled:
+                self.assertFalse(profiled)
+
+        self.assertIsNotNone(profiler.get_profile(outer))
+        self.assertIsNone(profiler.get_profile(inner))
+
+
+if __name__ == "__main__":
+    unittest.main()
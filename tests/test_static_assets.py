@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+import httpx
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import front.main
+from front import static_assets
+from front.static_assets import IMMUTABLE, StaticAssets
+
+_CSS = b"body { color: red; }\n" * 50
+
+
+class TestStaticAssets(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self._write("styles.css", _CSS)
+        self._write("tiny.js", b"x")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def _write(self, name: str, body: bytes) -> None:
+        with open(os.path.join(self.directory.name, name), "wb") as file:
+            file.write(body)
+
+    def _client(self):
+        assets = StaticAssets(self.directory.name)
+        app = FastAPI()
+        app.mount("/static", assets, name="static")
+        return assets, TestClient(app)
+
+    def test_fingerprinted_url(self):
+        assets, client = self._client()
+        url = assets.url("styles.css")
+        self.assertRegex(url, r"^/static/styles\.[0-9a-f]{12}\.css$")
+
+        response = client.get(url, headers={"Accept-Encoding": "identity"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, _CSS)
+        self.assertEqual(response.headers["Cache-Control"], IMMUTABLE)
+        self.assertTrue(response.headers["Content-Type"].startswith("text/css"))
+
+        self._write("styles.css", _CSS + b"a { }\n")
+        self.assertNotEqual(StaticAssets(self.directory.name).url("styles.css"), url)
+
+    def test_plain_name_is_revalidated(self):
+        _, client = self._client()
+        response = client.get("/static/styles.css")
+        self.assertEqual(response.headers["Cache-Control"], "no-cache")
+
+        response = client.get(
+            "/static/styles.css",
+            headers={"If-None-Match": response.headers["ETag"]},
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_compression(self):
+        assets, client = self._client()
+        response = client.get(
+            assets.url("styles.css"), headers={"Accept-Encoding": "gzip, br;q=0"}
+        )
+        self.assertEqual(response.headers["Content-Encoding"], "gzip")
+        self.assertEqual(response.headers["Vary"], "Accept-Encoding")
+        self.assertLess(int(response.headers["Content-Length"]), len(_CSS))
+        self.assertEqual(response.content, _CSS)  # decoded by the client
+
+        # not worth compressing
+        response = client.get(
+            assets.url("tiny.js"), headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertNotIn("Content-Encoding", response.headers)
+
+    @unittest.skipUnless(static_assets.brotli, "brotli is not installed")
+    def test_brotli_is_preferred(self):
+        assets, client = self._client()
+        response = client.get(
+            assets.url("styles.css"), headers={"Accept-Encoding": "gzip, br"}
+        )
+        self.assertEqual(response.headers["Content-Encoding"], "br")
+
+    def test_unknown_file(self):
+        _, client = self._client()
+        self.assertEqual(client.get("/static/missing.css").status_code, 404)
+        self.assertEqual(client.get("/static/../main.py").status_code, 404)
+        self.assertEqual(client.post("/static/styles.css").status_code, 405)
+
+
+class TestFrontTemplates(unittest.TestCase):
+    def test_pages_link_fingerprinted_assets(self):
+        env = front.main.templates.env
+        cache_directory = env.bytecode_cache.directory
+        self.addCleanup(setattr, env.bytecode_cache, "directory", cache_directory)
+        with tempfile.TemporaryDirectory() as directory:
+            env.bytecode_cache.directory = directory
+            env.cache.clear()
+            with TestClient(front.main.app) as client:
+                self.assertTrue(os.listdir(directory))  # warmed up at startup
+
+                api_client = front.main.app.state.api_client
+                api_client.client._transport = httpx.MockTransport(
+                    lambda request: httpx.Response(200, json=[])
+                )
+                for path, name in [
+                    ("/logs", "styles.css"),
+                    ("/logs", "logs.js"),
+                    ("/", "script.js"),
+                ]:
+                    url = front.main.static_assets.url(name)
+                    self.assertIn(f'"{url}"', client.get(path).text)
+                    response = client.get(url)
+                    self.assertEqual(response.headers["Cache-Control"], IMMUTABLE)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,145 @@
+import asyncio
+import random
+import unittest
+import uuid
+from logging import Logger as PythonLogger
+from unittest.mock import Mock, patch
+
+import httpx
+
+from core.api_server import APIServer
+from core.certificate_manager import CertificateManager
+from core.trace_id_handler import TraceIdHandler
+from front.api_client import APIClient
+from shared import trace_context
+from shared.db_logger_mock import DBLoggerMock
+from shared.logger import Logger, TraceIdProvider
+from shared.models import LogSeverity, LogsFilter, Paging
+from shared.trace_context import TraceContext
+
+_TRACEPARENT = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+
+class TestTraceContext(unittest.IsolatedAsyncioTestCase):
+    def test_traceparent_round_trip(self):
+        context = TraceContext.parse(_TRACEPARENT)
+
+        self.assertEqual(
+            context.trace_id, uuid.UUID("4bf92f3577b34da6a3ce929d0e0e4736")
+        )
+        self.assertEqual(context.span_id, "00f067aa0ba902b7")
+        self.assertTrue(context.sampled)
+        self.assertEqual(context.to_traceparent(), _TRACEPARENT)
+
+    def test_invalid_traceparent(self):
+        for header in [
+            None,
+            "",
+            "garbage",
+            "01-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01",
+            "00-00000000000000000000000000000000-00f067aa0ba902b7-01",
+            "00-4bf92f3577b34da6a3ce929d0e0e4736-0000000000000000-01",
+            "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7",
+        ]:
+            self.assertIsNone(TraceContext.parse(header), header)
+
+    def test_scope_joins_parent_trace_in_new_span(self):
+        parent = TraceContext.parse(_TRACEPARENT)
+
+        with trace_context.trace_scope(parent) as context:
+            self.assertEqual(context.trace_id, parent.trace_id)
+            self.assertNotEqual(context.span_id, parent.span_id)
+            self.assertEqual(trace_context.get_current(), context)
+
+        self.assertIsNone(trace_context.get_current())
+
+    async def test_concurrent_tasks_keep_their_own_trace(self):
+        async def task():
+            async with TraceIdHandler.logging_scope() as context:
+                for _ in range(5):
+                    await asyncio.sleep(random.random() / 1000)
+                    self.assertEqual(
+                        TraceIdHandler.get_current_trace_id(), context.trace_id
+                    )
+                    self.assertEqual(
+                        await asyncio.to_thread(TraceIdHandler.get_current_trace_id),
+                        context.trace_id,
+                    )
+            return context.trace_id
+
+        trace_ids = await asyncio.gather(*[task() for _ in range(100)])
+
+        self.assertEqual(len(set(trace_ids)), 100)
+
+    async def test_api_client_propagates_trace(self):
+        sent = []
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            sent.append(request.headers.get("traceparent"))
+            return httpx.Response(200, json=[])
+
+        api_client = APIClient("http://core")
+        api_client.client._transport = httpx.MockTransport(handler)
+
+        await api_client.list_certificates()
+        with trace_context.trace_scope() as context:
+            await api_client.list_certificates()
+        await api_client.close()
+
+        self.assertIsNone(sent[0])
+        self.assertEqual(sent[1], context.to_traceparent())
+
+
+class TestCoreTracePropagation(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        python_logger = patch.object(PythonLogger, "log")  # no application.log
+        python_logger.start()
+        self.addCleanup(python_logger.stop)
+        self.db_logger = DBLoggerMock()
+        logger = Logger(
+            TraceIdProvider(TraceIdHandler.get_current_trace_id), self.db_logger
+        )
+        api_server = APIServer(Mock(spec=CertificateManager), logger, "1.0.0", 8000)
+
+        @api_server.App.get("/test/log")
+        async def log_with_awaits(message: str):
+            for _ in range(3):
+                await asyncio.sleep(random.random() / 1000)
+                await asyncio.to_thread(logger.log, LogSeverity.DEBUG, message)
+            return {}
+
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=api_server.App), base_url="http://core"
+        )
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+
+    async def test_concurrent_requests_log_under_their_own_trace(self):
+        contexts = [TraceContext.new() for _ in range(100)]
+
+        responses = await asyncio.gather(
+            *[
+                self.client.get(
+                    "/test/log",
+                    params={"message": str(context.trace_id)},
+                    headers={"traceparent": context.to_traceparent()},
+                )
+                for context in contexts
+            ]
+        )
+
+        for context, response in zip(contexts, responses):
+            returned = TraceContext.parse(response.headers["traceparent"])
+            self.assertEqual(returned.trace_id, context.trace_id)
+        logs = self.db_logger.get_logs(
+            LogsFilter(severity=list(LogSeverity), commands_only=False),
+            Paging(page=1, page_size=1000),
+        )
+        self.assertEqual(len(logs), 300)
+        for log in logs:
+            self.assertEqual(str(log.trace_id), log.message)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+import json
+import os
+import tempfile
+import unittest
+
+from shared import trace_context, tracing
+from shared.trace_context import TraceContext
+
+
+@tracing.traced("test.sync")
+def _sync_call(fail: bool = False) -> str:
+    with tracing.span("test.inner", {"answer": 42}):
+        if fail:
+            raise ValueError("failed")
+        return "done"
+
+
+@tracing.traced("test.async")
+async def _async_call() -> str:
+    return _sync_call()
+
+
+class TestTracing(unittest.IsolatedAsyncioTestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "spans.jsonl")
+
+    def tearDown(self):
+        tracing.shutdown()
+        self.directory.cleanup()
+
+    def _exported_spans(self):
+        tracing.shutdown()
+        spans = {}
+        with open(self.path) as file:
+            for line in file:
+                for resource_spans in json.loads(line)["resourceSpans"]:
+                    for scope_spans in resource_spans["scopeSpans"]:
+                        for span in scope_spans["spans"]:
+                            spans[span["name"]] = span
+        return spans
+
+    def test_disabled_is_a_no_op(self):
+        with tracing.span("test.span") as span:
+            span.set_attribute("key", "value")
+            self.assertIsNone(trace_context.get_current())
+
+        self.assertEqual(_sync_call(), "done")
+        self.assertFalse(os.path.exists(self.path))
+
+    async def test_nested_spans_are_exported(self):
+        tracing.configure(self.path, "test-service")
+
+        with trace_context.trace_scope() as scope:
+            self.assertEqual(await _async_call(), "done")
+
+        spans = self._exported_spans()
+        self.assertEqual(set(spans), {"test.async", "test.sync", "test.inner"})
+        self.assertEqual(
+            {span["traceId"] for span in spans.values()}, {scope.trace_id.hex}
+        )
+        self.assertEqual(spans["test.async"]["parentSpanId"], scope.span_id)
+        self.assertEqual(
+            spans["test.sync"]["parentSpanId"], spans["test.async"]["spanId"]
+        )
+        self.assertEqual(
+            spans["test.inner"]["parentSpanId"], spans["test.sync"]["spanId"]
+        )
+        self.assertEqual(
+            spans["test.inner"]["attributes"],
+            [{"key": "answer", "value": {"intValue": "42"}}],
+        )
+        self.assertLessEqual(
+            int(spans["test.inner"]["startTimeUnixNano"]),
+            int(spans["test.inner"]["endTimeUnixNano"]),
+        )
+        self.assertIsNone(trace_context.get_current())
+
+    def test_error_status_and_server_scope(self):
+        tracing.configure(self.path, "test-service")
+        parent = TraceContext.new()
+
+        with trace_context.trace_scope(parent) as scope, tracing.span(
+            "GET /test", scope=scope
+        ):
+            with self.assertRaises(ValueError):
+                _sync_call(fail=True)
+
+        spans = self._exported_spans()
+        self.assertEqual(spans["GET /test"]["spanId"], scope.span_id)
+        self.assertEqual(spans["GET /test"]["parentSpanId"], parent.span_id)
+        self.assertEqual(spans["test.inner"]["status"]["code"], 2)
+        self.assertEqual(spans["test.sync"]["status"]["code"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()